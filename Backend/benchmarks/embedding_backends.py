@@ -0,0 +1,102 @@
+"""
+Compare the ONNX Runtime embedding backends against the torch backend on CPU.
+
+Reports encode throughput and how closely the vectors agree: per-text cosine
+similarity to the torch vector and the overlap of each text's top-k
+neighbours (recall@k with torch as ground truth).
+
+    cd Backend
+    python -m benchmarks.embedding_backends --texts corpus.txt --backends onnx onnx-int8
+"""
+from src.vectorstorage.embedding_registry import DEFAULT_LOCAL_EMBEDDING_MODEL, EmbeddingRegistry
+from typing import Dict, List
+import numpy as np
+import argparse
+import time
+import json
+
+
+def load_texts(path: str, limit: int) -> List[str]:
+    if not path:
+        # Synthetic corpus of varied length when no file is given
+        words = "notate retrieval embedding vector chroma document local model query index".split()
+        rng = np.random.default_rng(0)
+        return [" ".join(rng.choice(words, size=int(rng.integers(8, 200)))) for _ in range(limit)]
+    with open(path, encoding="utf-8") as f:
+        texts = [line.strip() for line in f if line.strip()]
+    return texts[:limit]
+
+
+def encode(embeddings, texts: List[str], batch_size: int) -> Dict:
+    embeddings.embed_documents(texts[:batch_size])  # warm-up
+    start = time.perf_counter()
+    vectors = []
+    for i in range(0, len(texts), batch_size):
+        vectors.extend(embeddings.embed_documents(texts[i:i + batch_size]))
+    seconds = time.perf_counter() - start
+    return {"vectors": np.asarray(vectors, dtype=np.float32), "seconds": seconds}
+
+
+def agreement(reference: np.ndarray, candidate: np.ndarray, k: int) -> Dict[str, float]:
+    def unit(v):
+        return v / np.clip(np.linalg.norm(v, axis=1, keepdims=True), 1e-12, None)
+
+    reference, candidate = unit(reference), unit(candidate)
+    cosine = (reference * candidate).sum(axis=1)
+    k = min(k, len(reference) - 1)
+    if k < 1:
+        return {"mean_cosine": float(cosine.mean()), "min_cosine": float(cosine.min()), "recall_at_k": 1.0}
+
+    def neighbours(v):
+        scores = v @ v.T
+        np.fill_diagonal(scores, -np.inf)
+        return np.argpartition(-scores, k, axis=1)[:, :k]
+
+    truth, found = neighbours(reference), neighbours(candidate)
+    recall = np.mean([len(set(t) & set(f)) / k for t, f in zip(truth, found)])
+    return {"mean_cosine": float(cosine.mean()), "min_cosine": float(cosine.min()), "recall_at_k": float(recall)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--model", default=DEFAULT_LOCAL_EMBEDDING_MODEL)
+    parser.add_argument("--texts", default=None,
+                        help="Text file, one passage per line")
+    parser.add_argument("--limit", type=int, default=512)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--backends", nargs="+",
+                        default=["onnx", "onnx-int8"])
+    parser.add_argument("--json", action="store_true",
+                        help="Print results as JSON")
+    args = parser.parse_args()
+
+    texts = load_texts(args.texts, args.limit)
+    registry = EmbeddingRegistry()
+    results = {}
+    torch_run = encode(registry.get(args.model, "cpu", backend="torch"),
+                       texts, args.batch_size)
+    results["torch"] = {"texts_per_second": len(texts) / torch_run["seconds"]}
+    for backend in args.backends:
+        run = encode(registry.get(args.model, "cpu", backend=backend),
+                     texts, args.batch_size)
+        results[backend] = {
+            "texts_per_second": len(texts) / run["seconds"],
+            "speedup": torch_run["seconds"] / run["seconds"],
+            **agreement(torch_run["vectors"], run["vectors"], args.k),
+        }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{args.model}: {len(texts)} texts, batch size {args.batch_size}")
+    for backend, row in results.items():
+        line = f"{backend:>10}  {row['texts_per_second']:8.1f} texts/s"
+        if backend != "torch":
+            line += (f"  x{row['speedup']:.2f}  cosine mean {row['mean_cosine']:.4f}"
+                     f" min {row['min_cosine']:.4f}  recall@{args.k} {row['recall_at_k']:.3f}")
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,15 +2,27 @@ import logging
 from src.authentication.api_key_authorization import api_key_auth
 from src.authentication.token import verify_token, verify_token_or_api_key
 from src.data.database.checkAPIKey import check_api_key
-from src.data.dataFetch.youtube import youtube_transcript
 from src.endpoint.deleteStore import delete_vectorstore_collection
-from src.endpoint.models import EmbeddingRequest, QueryRequest, ChatCompletionRequest, VectorStoreQueryRequest, DeleteCollectionRequest, YoutubeTranscriptRequest, WebCrawlRequest, ModelLoadRequest
-from src.endpoint.embed import embed
-from src.endpoint.vectorQuery import query_vectorstore
-from src.endpoint.devApiCall import rag_call, llm_call, vector_call
+from src.endpoint.models import EmbeddingRequest, SyncCollectionRequest, QueryRequest, ChatCompletionRequest, VectorStoreQueryRequest, DeleteCollectionRequest, YoutubeTranscriptRequest, WebCrawlRequest, ModelLoadRequest, CollectionSettingsRequest, BatchVectorStoreQueryRequest, BatchQueryRequest, CompactCollectionRequest, ReembedCollectionRequest, ExportCollectionRequest, ImportCollectionRequest
+from src.endpoint.vectorQuery import query_vectorstore, query_vectorstore_batch
+from src.endpoint.devApiCall import rag_call, llm_call, vector_call, vector_batch_call
 from src.endpoint.transcribe import transcribe_audio
-from src.endpoint.webcrawl import webcrawl
+from src.jobs.runners import submit_job, format_job_event, resume_interrupted_jobs
+from src.jobs.scheduler import Job, job_scheduler
 from src.models.manager import model_manager
+from src.vectorstorage.vectorstore import preload_collections, embedding_cache
+from src.vectorstorage.collection_settings import collection_settings
+from src.vectorstorage.embedding_registry import EMBEDDING_BACKENDS
+from src.vectorstorage.search import VECTOR_ENGINES, apply_quantization
+from src.vectorstorage.quantization import QUANTIZATION_MODES
+from src.vectorstorage.query_cache import query_cache
+from src.vectorstorage.hnsw_settings import validate_hnsw, active_hnsw
+from src.vectorstorage.snapshot import SNAPSHOT_DTYPES
+from src.vectorstorage.collection_stats import collection_stats
+from src.data.database.getCollectionInfo import get_collection_settings as get_collection_info
+from src.vectorstorage.chroma_pool import chroma_pool
+from src.vectorstorage.vectorstore import chroma_db_path
+from src.vectorstorage.helpers.sanitizeCollectionName import sanitize_collection_name
 from fastapi import FastAPI, Depends, File, UploadFile, Request, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import StreamingResponse, JSONResponse
@@ -21,14 +33,10 @@ import sys
 import psutil
 import threading
 import uvicorn
-import json
+from typing import Optional
 from src.endpoint.api import chat_completion_stream
 
 app = FastAPI()
-embedding_task = None
-embedding_event = None
-crawl_task = None
-crawl_event = None
 
 origins = ["http://localhost", "http://127.0.0.1"]
 
@@ -61,6 +69,25 @@ async def timeout_middleware(request: Request, call_next):
 logger = logging.getLogger(__name__)
 
 
+@app.on_event("startup")
+async def preload_vectorstores():
+    """Warm the shared Chroma client with collections listed in NOTATE_PRELOAD_COLLECTIONS"""
+    names = [name.strip() for name in os.environ.get(
+        "NOTATE_PRELOAD_COLLECTIONS", "").split(",") if name.strip()]
+    if names:
+        asyncio.get_event_loop().run_in_executor(
+            None, preload_collections, names)
+
+
+@app.on_event("startup")
+async def resume_ingestion():
+    """Requeue embed and crawl jobs interrupted by a crash or restart"""
+    try:
+        resume_interrupted_jobs()
+    except Exception as e:
+        logger.error(f"Error resuming ingestion jobs: {str(e)}")
+
+
 @app.post("/chat/completions")
 async def chat_completion(request: ChatCompletionRequest, user_id: str = Depends(verify_token_or_api_key)) -> StreamingResponse:
     """Stream chat completion from the model"""
@@ -155,44 +182,36 @@ async def unload_model_endpoint(user_id: str = Depends(verify_token_or_api_key))
         )
 
 
-@app.post("/webcrawl")
-async def webcrawl_endpoint(data: WebCrawlRequest, user_id: str = Depends(verify_token)):
-    if user_id is None:
-        return {"status": "error", "message": "Unauthorized"}
-
-    global crawl_task, crawl_event
-    if crawl_task is not None:
-        return {"status": "error", "message": "A crawl process is already running"}
-
-    crawl_event = asyncio.Event()
-
+def job_stream_response(job: Job) -> StreamingResponse:
+    """Attach an SSE response to a job's progress stream"""
     async def event_generator():
-        global crawl_task, crawl_event
         try:
-            for result in webcrawl(data, crawl_event):
-                if crawl_event.is_set():
-                    yield f"data: {{'type': 'cancelled', 'message': 'Crawl process cancelled'}}\n\n"
-                    break
-                yield f"{result}\n\n"
-                await asyncio.sleep(0.1)
+            async for event in job.stream():
+                yield format_job_event(job, event)
         except Exception as e:
-            error_data = {
-                "status": "error",
-                "data": {
-                    "message": str(e)
-                }
-            }
-            yield f"data: {json.dumps(error_data)}\n\n"
-        finally:
-            crawl_task = None
-            crawl_event = None
+            logger.error(f"Error streaming job {job.id}: {str(e)}")
+            yield f"data: {{'type': 'error', 'message': '{str(e)}'}}\n\n"
 
     response = StreamingResponse(
-        event_generator(), media_type="text/event-stream")
-    crawl_task = asyncio.create_task(event_generator().__anext__())
+        event_generator(),
+        media_type="text/event-stream"
+    )
+
+    # Set response headers for better connection handling
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["Connection"] = "keep-alive"
+    response.headers["X-Accel-Buffering"] = "no"
+    response.headers["X-Job-Id"] = job.id
     return response
 
 
+@app.post("/webcrawl")
+async def webcrawl_endpoint(data: WebCrawlRequest, user_id: str = Depends(verify_token)):
+    if user_id is None:
+        return {"status": "error", "message": "Unauthorized"}
+    return job_stream_response(submit_job("webcrawl", data))
+
+
 @app.post("/transcribe")
 async def transcribe_audio_endpoint(audio_file: UploadFile = File(...), model_name: str = "base", user_id: str = Depends(verify_token)):
     if user_id is None:
@@ -205,77 +224,116 @@ async def add_embedding(data: EmbeddingRequest, user_id: str = Depends(verify_to
     if user_id is None:
         return {"status": "error", "message": "Unauthorized"}
     print("Metadata:", data.metadata)
-    global embedding_task, embedding_event
+    return job_stream_response(submit_job("embed", data))
 
-    if embedding_task is not None:
-        return {"status": "error", "message": "An embedding process is already running"}
 
-    embedding_event = asyncio.Event()
+@app.post("/sync-collection")
+async def sync_collection_endpoint(data: SyncCollectionRequest, user_id: str = Depends(verify_token)):
+    if user_id is None:
+        return {"status": "error", "message": "Unauthorized"}
+    return job_stream_response(submit_job("sync", data))
 
-    async def event_generator():
-        global embedding_task, embedding_event
-        try:
-            async for result in embed(data):
-                if embedding_event.is_set():
-                    yield f"data: {{'type': 'cancelled', 'message': 'Embedding process cancelled'}}\n\n"
-                    break
-
-                if result["status"] == "progress":
-                    progress_data = result["data"]
-                    yield f"data: {{'type': 'progress', 'chunk': {progress_data['chunk']}, 'totalChunks': {progress_data['total_chunks']}, 'percent_complete': '{progress_data['percent_complete']}', 'est_remaining_time': '{progress_data['est_remaining_time']}'}}\n\n"
-                else:
-                    yield f"data: {{'type': '{result['status']}', 'message': '{result['message']}'}}\n\n"
-                await asyncio.sleep(0.1)  # Prevent overwhelming the connection
-        except Exception as e:
-            logger.error(f"Error in embedding process: {str(e)}")
-            yield f"data: {{'type': 'error', 'message': '{str(e)}'}}\n\n"
-        finally:
-            embedding_task = None
-            embedding_event = None
-            logger.info("Embedding task cleanup completed")
 
-    response = StreamingResponse(
-        event_generator(),
-        media_type="text/event-stream"
-    )
+@app.post("/youtube-ingest")
+async def youtube_ingest(data: YoutubeTranscriptRequest, user_id: str = Depends(verify_token)):
+    if user_id is None:
+        return {"status": "error", "message": "Unauthorized"}
+    return job_stream_response(submit_job("youtube", data))
 
-    # Set response headers for better connection handling
-    response.headers["Cache-Control"] = "no-cache"
-    response.headers["Connection"] = "keep-alive"
-    response.headers["X-Accel-Buffering"] = "no"
-    response.headers["Transfer-Encoding"] = "chunked"
 
-    embedding_task = asyncio.create_task(event_generator().__anext__())
-    return response
+@app.get("/collection-stats/{collection_name}")
+async def get_collection_stats(collection_name: str, refresh: bool = False, user_id: str = Depends(verify_token)):
+    if user_id is None:
+        return {"status": "error", "message": "Unauthorized"}
+    name = sanitize_collection_name(collection_name)
+    try:
+        # Paging through metadata can take a while on large collections
+        stats = await asyncio.get_event_loop().run_in_executor(
+            None, collection_stats.get, name, refresh)
+    except Exception as e:
+        return {"status": "error", "message": f"Error computing collection stats: {str(e)}"}
+    info = get_collection_info(user_id, collection_name)
+    embedding_model = collection_settings.get(name).get("embedding_model")
+    if info and not embedding_model:
+        embedding_model = info.local_embedding_model if info.is_local else "openai"
+    return {"status": "success", "stats": {**stats, "embedding_model": embedding_model}}
 
 
-@app.post("/youtube-ingest")
-async def youtube_ingest(data: YoutubeTranscriptRequest, user_id: str = Depends(verify_token)):
+@app.post("/compact-collection")
+async def compact_collection_endpoint(data: CompactCollectionRequest, user_id: str = Depends(verify_token)):
     if user_id is None:
         return {"status": "error", "message": "Unauthorized"}
+    return job_stream_response(submit_job("compact", data))
+
+
+@app.post("/reembed-collection")
+async def reembed_collection_endpoint(data: ReembedCollectionRequest, user_id: str = Depends(verify_token)):
+    if user_id is None:
+        return {"status": "error", "message": "Unauthorized"}
+    if data.embedding_backend and data.embedding_backend not in EMBEDDING_BACKENDS:
+        return {"status": "error", "message": f"Unknown embedding backend: {data.embedding_backend}"}
+    return job_stream_response(submit_job("reembed", data))
 
-    async def event_generator():
-        try:
-            for result in youtube_transcript(data):
-                if result["status"] == "progress":
-                    progress_data = result["data"]
-                    yield f"data: {{'type': 'progress', 'chunk': {progress_data['chunk']}, 'totalChunks': {progress_data['total_chunks']}, 'percent_complete': '{progress_data['percent_complete']}', 'message': '{progress_data['message']}'}}\n\n"
-                else:
-                    yield f"data: {{'type': '{result['status']}', 'message': '{result['message']}'}}\n\n"
-                await asyncio.sleep(0.1)
-        except Exception as e:
-            yield f"data: {{'type': 'error', 'message': '{str(e)}'}}\n\n"
 
-    return StreamingResponse(event_generator(), media_type="text/event-stream")
+@app.post("/export-collection")
+async def export_collection_endpoint(data: ExportCollectionRequest, user_id: str = Depends(verify_token)):
+    if user_id is None:
+        return {"status": "error", "message": "Unauthorized"}
+    if data.dtype and data.dtype not in SNAPSHOT_DTYPES:
+        return {"status": "error", "message": f"Unknown snapshot dtype: {data.dtype}"}
+    return job_stream_response(submit_job("export", data))
+
+
+@app.post("/import-collection")
+async def import_collection_endpoint(data: ImportCollectionRequest, user_id: str = Depends(verify_token)):
+    if user_id is None:
+        return {"status": "error", "message": "Unauthorized"}
+    if not os.path.exists(data.file_path):
+        return {"status": "error", "message": f"Snapshot not found: {data.file_path}"}
+    return job_stream_response(submit_job("import", data))
+
+
+@app.get("/jobs")
+async def list_jobs(kind: Optional[str] = None, status: Optional[str] = None, user_id: str = Depends(verify_token)):
+    if user_id is None:
+        return {"status": "error", "message": "Unauthorized"}
+    return {"status": "success", "jobs": job_scheduler.list(kind, status)}
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str, user_id: str = Depends(verify_token)):
+    if user_id is None:
+        return {"status": "error", "message": "Unauthorized"}
+    job = job_scheduler.get(job_id)
+    if job is None:
+        return {"status": "error", "message": "Job not found"}
+    return {"status": "success", "job": job.to_dict()}
+
+
+@app.get("/jobs/{job_id}/stream")
+async def stream_job(job_id: str, user_id: str = Depends(verify_token)):
+    if user_id is None:
+        return {"status": "error", "message": "Unauthorized"}
+    job = job_scheduler.get(job_id)
+    if job is None:
+        return {"status": "error", "message": "Job not found"}
+    return job_stream_response(job)
+
+
+@app.post("/jobs/{job_id}/cancel")
+async def cancel_job(job_id: str, user_id: str = Depends(verify_token)):
+    if user_id is None:
+        return {"status": "error", "message": "Unauthorized"}
+    if job_scheduler.cancel(job_id):
+        return {"status": "success", "message": "Job cancelled"}
+    return {"status": "error", "message": "No such job running"}
 
 
 @app.post("/cancel-embed")
 async def cancel_embedding(user_id: str = Depends(verify_token)):
     if user_id is None:
         return {"status": "error", "message": "Unauthorized"}
-    global embedding_task, embedding_event
-    if embedding_event:
-        embedding_event.set()
+    if job_scheduler.cancel_kind("embed"):
         return {"status": "success", "message": "Embedding process cancelled"}
     return {"status": "error", "message": "No embedding process running"}
 
@@ -306,13 +364,81 @@ async def vector_query(data: VectorStoreQueryRequest, user_id: str = Depends(ver
     if user_id is None:
         return {"status": "error", "message": "Unauthorized"}
     try:
-        result = query_vectorstore(data, data.is_local)
+        # Run off the event loop so concurrent queries overlap and can be batched
+        result = await asyncio.get_event_loop().run_in_executor(
+            None, query_vectorstore, data, data.is_local)
         return result
     except Exception as e:
         print(f"Error querying vectorstore: {str(e)}")
         return {"status": "error", "message": str(e)}
 
 
+@app.post("/vector-query/batch")
+async def vector_query_batch(data: BatchVectorStoreQueryRequest, user_id: str = Depends(verify_token)):
+    if user_id is None:
+        return {"status": "error", "message": "Unauthorized"}
+    # Sync generator: Starlette iterates it in a worker thread
+    return StreamingResponse(query_vectorstore_batch(data, data.queries), media_type="application/x-ndjson")
+
+
+@app.get("/embedding-cache-stats")
+async def embedding_cache_stats(user_id: str = Depends(verify_token)):
+    if user_id is None:
+        return {"status": "error", "message": "Unauthorized"}
+    return {"status": "success", "stats": embedding_cache.stats()}
+
+
+@app.get("/query-cache-stats")
+async def query_cache_stats(user_id: str = Depends(verify_token)):
+    if user_id is None:
+        return {"status": "error", "message": "Unauthorized"}
+    return {"status": "success", "stats": query_cache.stats()}
+
+
+@app.get("/collection-settings/{collection_name}")
+async def get_collection_settings(collection_name: str, user_id: str = Depends(verify_token)):
+    if user_id is None:
+        return {"status": "error", "message": "Unauthorized"}
+    name = sanitize_collection_name(collection_name)
+    response = {"status": "success", "collection_name": name, "settings": collection_settings.get(name)}
+    try:
+        response["hnsw_active"] = active_hnsw(chroma_pool.get_client(chroma_db_path).get_collection(name))
+    except Exception:
+        response["hnsw_active"] = None
+    return response
+
+
+@app.post("/collection-settings")
+async def update_collection_settings(data: CollectionSettingsRequest, user_id: str = Depends(verify_token)):
+    if user_id is None:
+        return {"status": "error", "message": "Unauthorized"}
+    if data.embedding_backend and data.embedding_backend not in EMBEDDING_BACKENDS:
+        return {"status": "error", "message": f"Unknown embedding backend: {data.embedding_backend}"}
+    if data.vector_engine and data.vector_engine not in VECTOR_ENGINES:
+        return {"status": "error", "message": f"Unknown vector engine: {data.vector_engine}"}
+    if data.quantization and data.quantization not in QUANTIZATION_MODES:
+        return {"status": "error", "message": f"Unknown quantization mode: {data.quantization}"}
+    try:
+        hnsw = validate_hnsw(data.hnsw) if data.hnsw is not None else None
+    except ValueError as e:
+        return {"status": "error", "message": str(e)}
+    name = sanitize_collection_name(data.collection_name)
+    response = {"status": "success", "collection_name": name}
+    if hnsw is not None:
+        response["message"] = "HNSW settings apply when the collection is created or next compacted"
+    if data.quantization:
+        try:
+            # Encoding codes and measuring recall touches every vector, keep it off the loop
+            response["quantization_report"] = await asyncio.get_event_loop().run_in_executor(
+                None, apply_quantization, name, data.quantization)
+        except Exception as e:
+            return {"status": "error", "message": f"Error applying quantization: {str(e)}"}
+    response["settings"] = collection_settings.update(
+        name, embedding_backend=data.embedding_backend, vector_engine=data.vector_engine,
+        quantization=data.quantization, hnsw=hnsw)
+    return response
+
+
 @app.post("/delete-collection")
 async def delete_collection(data: DeleteCollectionRequest, user_id: str = Depends(verify_token)):
     if user_id is None:
@@ -326,6 +452,21 @@ async def api_vector(query_request: QueryRequest, user_id: str = Depends(api_key
     if user_id is None:
         return {"status": "error", "message": "Unauthorized"}
     """ check to see if the userId has API key in SQLite """
+    if not query_request.collection_name and not query_request.collection_names:
+        print("No collection name provided")
+        return {"status": "error", "message": "No collection name provided"}
+    if check_api_key(int(user_id)) == False:
+        print("Unauthorized")
+        return {"status": "error", "message": "Unauthorized"}
+    print("Authorized")
+    return await asyncio.get_event_loop().run_in_executor(
+        None, vector_call, query_request, user_id)
+
+
+@app.post("/api/vector/batch")
+async def api_vector_batch(query_request: BatchQueryRequest, user_id: str = Depends(api_key_auth)):
+    if user_id is None:
+        return {"status": "error", "message": "Unauthorized"}
     if not query_request.collection_name:
         print("No collection name provided")
         return {"status": "error", "message": "No collection name provided"}
@@ -333,7 +474,12 @@ async def api_vector(query_request: QueryRequest, user_id: str = Depends(api_key
         print("Unauthorized")
         return {"status": "error", "message": "Unauthorized"}
     print("Authorized")
-    return vector_call(query_request, user_id)
+    try:
+        lines = await asyncio.get_event_loop().run_in_executor(
+            None, vector_batch_call, query_request, user_id)
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
+    return StreamingResponse(lines, media_type="application/x-ndjson")
 
 
 @app.post("/api/llm")
@@ -359,7 +505,7 @@ async def api_rag(query_request: QueryRequest, user_id: str = Depends(api_key_au
     if not query_request.model:
         print("No model provided")
         return {"status": "error", "message": "No model provided"}
-    if not query_request.collection_name:
+    if not query_request.collection_name and not query_request.collection_names:
         print("No collection name provided")
         return {"status": "error", "message": "No collection name provided"}
     if check_api_key(int(user_id)) == False:
@@ -373,9 +519,7 @@ async def api_rag(query_request: QueryRequest, user_id: str = Depends(api_key_au
 async def cancel_crawl(user_id: str = Depends(verify_token)):
     if user_id is None:
         return {"status": "error", "message": "Unauthorized"}
-    global crawl_task, crawl_event
-    if crawl_event:
-        crawl_event.set()
+    if job_scheduler.cancel_kind("webcrawl"):
         return {"status": "success", "message": "Crawl process cancelled"}
     return {"status": "error", "message": "No crawl process running"}
 
@@ -13,7 +13,7 @@ import threading
 
 
 class WebCrawler:
-    def __init__(self, base_url, user_id, user_name, collection_id, collection_name, max_workers, cancel_event=None):
+    def __init__(self, base_url, user_id, user_name, collection_id, collection_name, max_workers, cancel_event=None, checkpoint=None):
         self.base_url = base_url
         self.output_dir = self._get_collection_path(
             user_id, user_name, collection_id, collection_name)
@@ -28,6 +28,8 @@ class WebCrawler:
         self.current_urls = 0
         self.update_callback = None
         self.cancel_event = cancel_event
+        # Optional journal checkpoint recording crawled pages and the link frontier
+        self.checkpoint = checkpoint
 
         # Setup logging
         logging.basicConfig(
@@ -187,10 +189,24 @@ class WebCrawler:
 
     def scrape(self):
         """Main scraping method using thread pool"""
-        # Initialize with start URL
-        self.url_queue.put(self.base_url)
+        # Initialize with start URL, or with the saved frontier when resuming
         self.total_urls = 1  # Initialize with 1 for the base URL
         self.current_urls = 0
+        frontier = []
+        if self.checkpoint:
+            self.visited_urls.update(self.checkpoint.items("crawled"))
+            frontier = [url for url in self.checkpoint.items("frontier")
+                        if url not in self.visited_urls]
+            self.checkpoint.add_items("frontier", [self.base_url])
+        if frontier:
+            for url in frontier:
+                self.url_queue.put(url)
+            self.current_urls = len(self.visited_urls)
+            self.total_urls = len(self.visited_urls) + len(frontier)
+            logging.info(
+                f"Resuming crawl: {len(self.visited_urls)} pages done, {len(frontier)} queued")
+        elif not self.visited_urls:
+            self.url_queue.put(self.base_url)
 
         with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
             active_tasks = set()
@@ -285,6 +301,9 @@ class WebCrawler:
 
             # Save the page
             if self.save_page(url, str(soup)):
+                if self.checkpoint:
+                    self.checkpoint.add_items("frontier", new_links)
+                    self.checkpoint.add_items("crawled", [url])
                 # Add new links to queue
                 with self.url_lock:
                     for link in new_links:
@@ -2,6 +2,8 @@ import os
 from src.endpoint.models import YoutubeTranscriptRequest
 from src.vectorstorage.vectorstore import get_vectorstore
 from src.vectorstorage.helpers.sanitizeCollectionName import sanitize_collection_name
+from src.vectorstorage.manifest import assign_chunk_ids
+from src.vectorstorage.collection_writes import record_upsert
 
 from langchain_core.documents import Document
 import yt_dlp
@@ -33,10 +35,13 @@ def _get_collection_path(user_id, user_name, collection_id, collection_name):
     )
 
 
-def youtube_transcript(request: YoutubeTranscriptRequest) -> Generator[dict, None, None]:
+def youtube_transcript(request: YoutubeTranscriptRequest, cancel_event=None) -> Generator[dict, None, None]:
     """
     Fetch video transcript and metadata using yt-dlp
     """
+    def cancelled():
+        return cancel_event is not None and cancel_event.is_set()
+
     logger.info(f"Starting transcript fetch for URL: {request.url}")
     yield {"status": "progress", "data": {"message": f"Starting transcript fetch for URL: {request.url}", "chunk": 1, "total_chunks": 4, "percent_complete": "0%"}}
 
@@ -59,6 +64,10 @@ def youtube_transcript(request: YoutubeTranscriptRequest) -> Generator[dict, Non
             logger.info(video_info)
             yield {"status": "progress", "data": {"message": video_info, "chunk": 1, "total_chunks": 4, "percent_complete": "10%"}}
 
+            if cancelled():
+                yield {"status": "cancelled", "message": "Transcript fetch cancelled"}
+                return
+
             # Get automatic captions if available
             subtitles = None
             if 'automatic_captions' in info and 'en' in info['automatic_captions']:
@@ -227,6 +236,10 @@ def youtube_transcript(request: YoutubeTranscriptRequest) -> Generator[dict, Non
                 )
                 documents.append(doc)
 
+            if cancelled():
+                yield {"status": "cancelled", "message": "Transcript fetch cancelled"}
+                return
+
             # Vectorstore initialization (35-40%)
             yield {"status": "progress", "data": {
                 "message": "Initializing vector database...",
@@ -243,14 +256,21 @@ def youtube_transcript(request: YoutubeTranscriptRequest) -> Generator[dict, Non
             if not vectordb:
                 raise Exception("Failed to initialize vector database")
 
+            # Stable IDs so re-ingesting a video replaces rather than duplicates it
+            assign_chunk_ids(collection_name, documents)
+
             # Add documents in batches with progress updates (40-95%)
             total_docs = len(documents)
             docs_processed = 0
             batch_size = 100
 
             for i in range(0, len(documents), batch_size):
+                if cancelled():
+                    yield {"status": "cancelled", "message": "Transcript embedding cancelled"}
+                    return
                 batch = documents[i:i + batch_size]
-                vectordb.add_documents(batch)
+                ids = vectordb.add_documents(batch)
+                record_upsert(collection_name, batch, ids)
 
                 docs_processed += len(batch)
                 percent = 40 + ((docs_processed / total_docs)
@@ -0,0 +1,91 @@
+from langchain_core.documents import Document
+from typing import Iterator, Optional, Tuple
+import pandas as pd
+import numpy as np
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# Target size of a row group, header included
+CSV_CHUNK_CHARS = 2000
+# Rows parsed per pandas chunk; bounds memory regardless of file size
+CSV_READ_ROWS = int(os.environ.get("NOTATE_CSV_READ_ROWS", "20000"))
+
+_NEEDS_QUOTES = r'[,"\r\n]'
+
+
+def quote_cells(values: pd.Series) -> pd.Series:
+    """CSV-quote the cells that contain separators, quotes or newlines."""
+    needs_quotes = values.str.contains(_NEEDS_QUOTES, regex=True)
+    if not needs_quotes.any():
+        return values
+    quoted = '"' + values[needs_quotes].str.replace('"', '""', regex=False) + '"'
+    return values.where(~needs_quotes, quoted)
+
+
+def format_rows(frame: pd.DataFrame) -> pd.Series:
+    """One CSV line per row, built column-wise with vectorized string ops."""
+    columns = [quote_cells(frame.iloc[:, i]) for i in range(frame.shape[1])]
+    if len(columns) == 1:
+        return columns[0]
+    return columns[0].str.cat(columns[1:], sep=",")
+
+
+def group_rows(lengths: np.ndarray, budget: int) -> np.ndarray:
+    """
+    Start offsets of row groups of about budget characters. A group starts
+    whenever the running length crosses the next multiple of the budget, so
+    rows are never split and an oversized row gets a group of its own.
+    """
+    if not len(lengths):
+        return np.empty(0, dtype=np.int64)
+    starts = np.cumsum(lengths) - lengths
+    group = starts // max(budget, 1)
+    return np.flatnonzero(np.r_[True, group[1:] != group[:-1]])
+
+
+def split_csv(file_path: str, metadata: Optional[dict] = None, chunk_chars: int = CSV_CHUNK_CHARS,
+              read_rows: int = CSV_READ_ROWS) -> Iterator[Tuple[Document, float]]:
+    """
+    Stream a CSV file as (Document, fraction read) pairs. Rows are grouped
+    into chunks of about chunk_chars characters, each starting with the
+    header line. The file is parsed read_rows at a time, and the last,
+    partial group of each batch is carried into the next one.
+    """
+    size = max(os.path.getsize(file_path), 1)
+    base_metadata = {"source": file_path, **(metadata or {})}
+    header = ""
+    carry: Optional[pd.Series] = None
+    carry_row = 0
+    row = 0
+
+    def chunk(lines: np.ndarray, first_row: int) -> Document:
+        return Document(page_content=header + "\n" + "\n".join(lines), metadata={
+            **base_metadata, "row_start": int(first_row), "rows": len(lines)})
+
+    with open(file_path, "rb") as f:
+        try:
+            for frame in pd.read_csv(f, dtype=str, keep_default_na=False, chunksize=read_rows,
+                                     encoding="utf-8", encoding_errors="replace"):
+                if not header:
+                    header = ",".join(quote_cells(pd.Series([str(c) for c in frame.columns])))
+                lines = format_rows(frame)
+                first_row = row
+                if carry is not None:
+                    lines, first_row = pd.concat([carry, lines], ignore_index=True), carry_row
+                row += len(frame)
+                if not len(lines):
+                    continue
+                values = lines.to_numpy(dtype=object)
+                starts = group_rows(lines.str.len().to_numpy() + 1, chunk_chars - len(header) - 1)
+                # The last group may still grow with the next batch's rows
+                carry, carry_row = lines.iloc[starts[-1]:], first_row + starts[-1]
+                fraction = min(f.tell() / size, 1.0)
+                for start, stop in zip(starts[:-1], starts[1:]):
+                    yield chunk(values[start:stop], first_row + start), fraction
+        except pd.errors.EmptyDataError:
+            logger.warning(f"No rows in CSV file {file_path}")
+            return
+    if carry is not None and len(carry):
+        yield chunk(carry.to_numpy(dtype=object), carry_row), 1.0
@@ -4,15 +4,20 @@ import markdown
 from bs4 import BeautifulSoup
 from pptx import Presentation
 from langchain_community.document_loaders import Docx2txtLoader
-from langchain_community.document_loaders.csv_loader import CSVLoader
-from pypdf import PdfReader
+from src.data.dataIntake.fileTypes.pdfExtraction import pdf_extractor
+from src.data.dataIntake.csvSplitting import split_csv
 from langchain_core.documents import Document
+from typing import Iterator, Optional, Tuple
 import logging
+import codecs
 import os
 import asyncio
 
+# Bytes read per step by the streaming text loader
+TEXT_BLOCK_SIZE = 1024 * 1024
 
-async def load_pdf(file_path):
+
+async def load_pdf(file_path, chunk_size=None):
     try:
         logging.info(f"Starting to load PDF: {file_path}")
 
@@ -21,18 +26,8 @@ async def load_pdf(file_path):
             raise FileNotFoundError(f"PDF file not found: {file_path}")
 
         def read_pdf():
-            reader = PdfReader(file_path)
-            pages = []
-            for i, page in enumerate(reader.pages):
-                text = page.extract_text()
-                if text.strip():  # Only include pages with content
-                    pages.append(
-                        Document(
-                            page_content=text,
-                            metadata={"source": file_path, "page": i}
-                        )
-                    )
-            return pages
+            # chunk_size is the number of pages per range handed to a worker
+            return [page for page, _ in stream_pdf(file_path, chunk_size)]
 
         # Run PDF reading in a thread pool to avoid blocking
         pages = await asyncio.get_event_loop().run_in_executor(None, read_pdf)
@@ -54,6 +49,13 @@ async def load_pdf(file_path):
         return None
 
 
+def stream_pdf(file_path, chunk_size=None) -> Iterator[Tuple[Document, float]]:
+    """Yield (page, fraction read) in page order, skipping empty pages."""
+    for i, text, total in pdf_extractor.pages(file_path, chunk_size):
+        if text.strip():  # Only include pages with content
+            yield Document(page_content=text, metadata={"source": file_path, "page": i}), (i + 1) / total
+
+
 async def load_py(file):
     try:
         with open(file, 'r', encoding='utf-8') as f:
@@ -84,6 +86,30 @@ async def load_txt(file):
         return None
 
 
+def stream_txt(file_path) -> Iterator[Tuple[str, float]]:
+    """
+    Yield (text, fraction read) in blocks of about TEXT_BLOCK_SIZE bytes.
+    Each block ends on whitespace so no word is split between two blocks.
+    """
+    size = max(os.path.getsize(file_path), 1)
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    pending = ""
+    read = 0
+    with open(file_path, 'rb') as f:
+        while True:
+            raw = f.read(TEXT_BLOCK_SIZE)
+            read += len(raw)
+            pending += decoder.decode(raw, final=not raw)
+            if not raw:
+                break
+            cut = max(pending.rfind(space) for space in " \n\t\r")
+            if cut > 0:
+                yield pending[:cut], read / size
+                pending = pending[cut + 1:]
+    if pending:
+        yield pending, 1.0
+
+
 async def load_md(file):
     try:
         with open(file, 'r', encoding='utf-8') as f:
@@ -98,6 +124,11 @@ async def load_md(file):
 
 async def load_html(file_path: str) -> str:
     """Load and process HTML file content"""
+    return read_html_text(file_path)
+
+
+def read_html_text(file_path: str) -> str:
+    """Synchronous HTML-to-text extraction, usable from worker threads"""
     try:
         with open(file_path, 'r', encoding='utf-8') as f:
             content = f.read()
@@ -130,14 +161,17 @@ async def load_html(file_path: str) -> str:
 
 async def load_csv(file):
     try:
-        loader = CSVLoader(file)
-        data = loader.load()
-        return data
+        # Row groups of about 2000 characters, each repeating the header
+        return [doc for doc, _ in stream_csv(file)]
     except Exception as e:
         print(f"Error loading CSV: {str(e)}")
         return None
 
 
+def stream_csv(file) -> Iterator[Tuple[Document, Optional[float]]]:
+    return split_csv(file)
+
+
 async def load_json(file):
     try:
         with open(file, 'r', encoding='utf-8') as f:
@@ -0,0 +1,171 @@
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from collections import deque
+from joblib.externals.loky import ProcessPoolExecutor
+from joblib.externals.loky.process_executor import ShutdownExecutorError
+from pypdf import PdfReader
+from typing import Iterator, List, Optional, Tuple
+import threading
+import logging
+import signal
+import os
+
+logger = logging.getLogger(__name__)
+
+PDF_WORKERS = int(os.environ.get("NOTATE_PDF_WORKERS", "0")) or max(1, (os.cpu_count() or 2) - 1)
+PDF_RANGE_PAGES = int(os.environ.get("NOTATE_PDF_RANGE_PAGES", "16"))
+PDF_PAGE_TIMEOUT = float(os.environ.get("NOTATE_PDF_PAGE_TIMEOUT", "30"))
+# Workers exit after this many idle seconds; the next large PDF starts them again
+PDF_IDLE_TIMEOUT = float(os.environ.get("NOTATE_PDF_IDLE_TIMEOUT", "120"))
+# Smaller documents are extracted in-process; starting workers costs more
+PARALLEL_MIN_PAGES = 32
+
+
+class PageTimeout(Exception):
+    pass
+
+
+@contextmanager
+def page_deadline(seconds: Optional[float]):
+    """
+    Raise PageTimeout when the block runs longer than seconds. Needs SIGALRM,
+    so it only applies on POSIX in a process's main thread (as in the pool's
+    workers); elsewhere the block runs unbounded.
+    """
+    if not seconds or not hasattr(signal, "setitimer") or threading.current_thread() is not threading.main_thread():
+        yield
+        return
+
+    def expire(signum, frame):
+        raise PageTimeout()
+
+    previous = signal.signal(signal.SIGALRM, expire)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def extract_range(file_path: str, start: int, stop: int, page_timeout: Optional[float]) -> List[Tuple[int, str]]:
+    """(page index, text) for pages start..stop-1; failed or timed-out pages have no text."""
+    reader = PdfReader(file_path)
+    pages = []
+    for i in range(start, min(stop, len(reader.pages))):
+        try:
+            with page_deadline(page_timeout):
+                text = reader.pages[i].extract_text() or ""
+        except PageTimeout:
+            logger.warning(f"Skipping page {i} of {file_path}: extraction took over {page_timeout}s")
+            text = ""
+        except Exception as e:
+            logger.warning(f"Skipping page {i} of {file_path}: {str(e)}")
+            text = ""
+        pages.append((i, text))
+    return pages
+
+
+class PdfExtractor:
+    """
+    Extracts PDF text in page ranges on a process pool, so large documents
+    use every core instead of one thread. Ranges are submitted a few at a
+    time and their pages are yielded in document order.
+    """
+
+    def __init__(self, workers: int = PDF_WORKERS, range_pages: int = PDF_RANGE_PAGES,
+                 page_timeout: float = PDF_PAGE_TIMEOUT, idle_timeout: float = PDF_IDLE_TIMEOUT):
+        self.workers = max(1, workers)
+        self.range_pages = max(1, range_pages)
+        self.page_timeout = page_timeout
+        self.idle_timeout = idle_timeout
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                # loky workers are fresh interpreters that import only what a
+                # task needs: the server isn't forked, and unlike multiprocessing's
+                # spawn they don't re-run main.py (torch, chromadb, the app)
+                self._pool = ProcessPoolExecutor(max_workers=self.workers, timeout=self.idle_timeout)
+            return self._pool
+
+    def _reset_pool(self, pool: Optional[ProcessPoolExecutor] = None) -> None:
+        """Kill the workers of pool (default: the current one); the next range starts a new pool."""
+        with self._lock:
+            pool = pool or self._pool
+            if pool is not None and pool is self._pool:
+                self._pool = None
+        if pool is not None:
+            pool.shutdown(wait=False, kill_workers=True)
+
+    def pages(self, file_path: str, range_pages: Optional[int] = None) -> Iterator[Tuple[int, str, int]]:
+        """Yield (page index, text, page count) for every page, in order."""
+        range_pages = max(1, range_pages or self.range_pages)
+        count = len(PdfReader(file_path).pages)
+        ranges = [(start, min(start + range_pages, count)) for start in range(0, count, range_pages)]
+        if count < PARALLEL_MIN_PAGES or self.workers == 1:
+            for start, stop in ranges:
+                for i, text in extract_range(file_path, start, stop, self.page_timeout):
+                    yield i, text, count
+            return
+
+        pool = self._get_pool()
+        waiting = iter(ranges)
+        pending: deque = deque()
+
+        def submit(start: int, stop: int) -> None:
+            pending.append((start, stop, pool.submit(extract_range, file_path, start, stop, self.page_timeout)))
+
+        def submit_next() -> None:
+            for start, stop in waiting:
+                submit(start, stop)
+                return
+
+        def resubmit() -> None:
+            # Ranges queued on a killed pool go to a new one
+            nonlocal pool
+            pool = self._get_pool()
+            queued = [(start, stop) for start, stop, _ in pending]
+            pending.clear()
+            for start, stop in queued:
+                submit(start, stop)
+
+        # Enough ranges in flight to keep every worker busy, no more
+        for _ in range(2 * self.workers):
+            submit_next()
+        try:
+            while pending:
+                start, stop, future = pending.popleft()
+                try:
+                    # Backstop for pages the in-worker deadline can't interrupt;
+                    # covers waiting behind the range ahead of it as well
+                    results = future.result(
+                        timeout=2 * (stop - start) * self.page_timeout if self.page_timeout else None)
+                except FutureTimeoutError:
+                    logger.warning(f"Skipping pages {start}-{stop - 1} of {file_path}: extraction timed out")
+                    results = [(i, "") for i in range(start, stop)]
+                    # The worker is still stuck on the page; kill it so it
+                    # doesn't hold a slot for good
+                    self._reset_pool(pool)
+                    resubmit()
+                except ShutdownExecutorError:
+                    # Another extraction killed the shared pool
+                    pending.appendleft((start, stop, future))
+                    resubmit()
+                    continue
+                except BrokenProcessPool:
+                    self._reset_pool(pool)
+                    raise
+                submit_next()
+                for i, text in results:
+                    yield i, text, count
+        finally:
+            for _, _, future in pending:
+                future.cancel()
+
+
+# Global PDF extractor instance
+pdf_extractor = PdfExtractor()
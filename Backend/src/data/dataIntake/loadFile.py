@@ -1,3 +1,7 @@
+from langchain_core.documents import Document
+from typing import Iterator, Union
+import inspect
+import asyncio
 import os
 import logging
 
@@ -14,6 +18,9 @@ from src.data.dataIntake.fileTypes.loadX import (
     load_xlsx,
     load_py,
     load_pdf,
+    stream_csv,
+    stream_pdf,
+    stream_txt,
 )
 
 file_handlers = {
@@ -29,6 +36,49 @@ file_handlers = {
     "py": load_py,
 }
 
+# Types that can be read incrementally; the rest are loaded whole
+stream_handlers = {
+    "pdf": stream_pdf,
+    "txt": stream_txt,
+    "py": stream_txt,
+    "csv": stream_csv,
+}
+
+
+class DocumentStream:
+    """
+    Iterates a file as text sections or Documents without loading it whole,
+    and tracks the fraction of the file read so far for progress estimates.
+    Must be iterated outside the event loop (e.g. via iterate_in_thread).
+    """
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self.file_type = file_path.split(".")[-1].lower()
+        if self.file_type not in stream_handlers and self.file_type not in file_handlers:
+            raise ValueError(f"Unsupported file type: {self.file_type}")
+        self.fraction = 0.0
+
+    def __iter__(self) -> Iterator[Union[str, Document]]:
+        handler = stream_handlers.get(self.file_type)
+        if handler is not None:
+            for section, fraction in handler(self.file_path):
+                if fraction is not None:
+                    self.fraction = fraction
+                yield section
+            self.fraction = 1.0
+            return
+        result = file_handlers[self.file_type](self.file_path)
+        if inspect.isawaitable(result):
+            result = asyncio.run(result)
+        if result is None:
+            raise ValueError("Failed to load document")
+        self.fraction = 1.0
+        if isinstance(result, str):
+            yield result
+        else:
+            yield from result
+
 async def load_document(file: str):
     try:
         file_type = file.split(".")[-1].lower()
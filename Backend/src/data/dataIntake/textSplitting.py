@@ -1,7 +1,23 @@
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_core.documents import Document
+from typing import Iterable, Iterator, List, Union
 import logging
 
+# Characters of text buffered before the streaming splitter cuts chunks
+STREAM_WINDOW = 64 * 1024
+# Prioritize sentence boundaries
+SEPARATORS = [". ", "? ", "! ", "\n\n", "\n", " ", ""]
+
+
+def make_text_splitter() -> RecursiveCharacterTextSplitter:
+    return RecursiveCharacterTextSplitter(
+        chunk_size=500,
+        chunk_overlap=20,
+        length_function=len,
+        is_separator_regex=False,
+        separators=SEPARATORS
+    )
+
 
 def split_text(text: str, file_path: str, metadata: dict = None) -> list:
     """Split text into chunks for embedding."""
@@ -14,14 +30,7 @@ def split_text(text: str, file_path: str, metadata: dict = None) -> list:
         # Pre-process text to remove excessive whitespace
         text = " ".join(text.split())
 
-        text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=500,
-            chunk_overlap=20,
-            length_function=len,
-            is_separator_regex=False,
-            # Prioritize sentence boundaries
-            separators=[". ", "? ", "! ", "\n\n", "\n", " ", ""]
-        )
+        text_splitter = make_text_splitter()
 
         # Directly split text and create documents in one go
         texts = text_splitter.split_text(text)
@@ -45,3 +54,79 @@ def split_text(text: str, file_path: str, metadata: dict = None) -> list:
     except Exception as e:
         logging.error(f"Error splitting text from {file_path}: {str(e)}")
         return []
+
+
+def chunk_starts(text: str, chunks: List[str]) -> List[int]:
+    """Offset of each (overlapping) chunk in text, or -1 where it can't be found."""
+    starts, start = [], -1
+    for chunk in chunks:
+        found = text.find(chunk, start + 1)
+        starts.append(found)
+        start = max(found, start)
+    return starts
+
+
+def carry_from(text: str, chunks: List[str], starts: List[int]) -> int:
+    """
+    Index of the first chunk of a window to carry into the next one. The
+    splitter cuts text into pieces at its first separator that occurs, merges
+    short pieces (repeating short ones as overlap) and splits long ones
+    further. Re-splitting from a chunk only repeats split_text when the
+    chunk starts a piece that is complete in this window (the last piece may
+    still change) and carries no overlap; otherwise earlier chunks are
+    carried too.
+    """
+    separator = next(sep for sep in SEPARATORS if not sep or sep in text)
+    last_piece = text.rfind(separator) if separator else len(text) - 1
+    for index in range(len(starts) - 1, 0, -1):
+        start, previous = starts[index], starts[index - 1]
+        if 0 <= start < last_piece and previous >= 0 and start >= previous + len(chunks[index - 1]) \
+                and text.startswith(separator, start):
+            return index
+    return 0
+
+
+def split_stream(sections: Iterable[Union[str, Document]], file_path: str, metadata: dict = None,
+                 window: int = STREAM_WINDOW) -> Iterator[Document]:
+    """
+    Split a stream of text sections into chunks without holding the whole
+    text. Sections are buffered up to window characters, and the end of
+    each window is carried into the next (see carry_from) so chunks match
+    split_text on the joined sections. Documents (PDF pages, CSV rows) pass
+    through unsplit. Sections must end on whitespace; they are joined with
+    a space.
+    """
+    text_splitter = make_text_splitter()
+    base_metadata = dict(metadata or {})
+    base_metadata["source"] = file_path
+
+    def documents(chunks):
+        for chunk in chunks:
+            chunk = chunk.strip()
+            if chunk:
+                yield Document(page_content=chunk, metadata=base_metadata.copy())
+
+    carry = ""
+    for section in sections:
+        if isinstance(section, Document):
+            if carry:
+                yield from documents(text_splitter.split_text(carry))
+                carry = ""
+            yield section
+            continue
+        text = " ".join(section.split())
+        if not text:
+            continue
+        carry = f"{carry} {text}" if carry else text
+        if len(carry) >= window:
+            chunks = text_splitter.split_text(carry)
+            starts = chunk_starts(carry, chunks)
+            index = carry_from(carry, chunks, starts)
+            if not index and len(carry) >= 4 * window:
+                # One long piece with nowhere to resume; bound the buffer
+                index = len(chunks) - 1
+            if index > 0:
+                yield from documents(chunks[:index])
+                carry = carry[starts[index]:] if starts[index] >= 0 else chunks[index]
+    if carry:
+        yield from documents(text_splitter.split_text(carry))
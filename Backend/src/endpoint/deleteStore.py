@@ -1,5 +1,9 @@
 from src.endpoint.models import DeleteCollectionRequest
-from src.vectorstorage.vectorstore import get_vectorstore
+from src.vectorstorage.vectorstore import delete_collection
+from src.vectorstorage.manifest import collection_manifest
+from src.vectorstorage.collection_settings import collection_settings
+from src.jobs.journal import ingest_journal
+from src.vectorstorage.helpers.sanitizeCollectionName import sanitize_collection_name
 import logging
 
 logger = logging.getLogger(__name__)
@@ -7,13 +11,15 @@ logger = logging.getLogger(__name__)
 
 def delete_vectorstore_collection(data: DeleteCollectionRequest):
     try:
-        logger.info(f"Deleting vectorstore collection: {data.collection_name}")
-        vectorstore = get_vectorstore(
-            data.api_key, data.collection_name, data.is_local)
-        if vectorstore:
-            vectorstore.delete_collection()
-            return True
-        return False
+        # Everything below was written under the sanitized name
+        collection_name = sanitize_collection_name(str(data.collection_name))
+        logger.info(f"Deleting vectorstore collection: {collection_name}")
+        deleted = delete_collection(collection_name)
+        collection_manifest.remove(collection_name)
+        collection_settings.remove(collection_name)
+        # A re-ingest must not resume from checkpoints of the deleted contents
+        ingest_journal.forget_collection(collection_name)
+        return deleted
     except Exception as e:
         logger.error(f"Error deleting vectorstore collection: {str(e)}")
         return False
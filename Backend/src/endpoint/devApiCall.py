@@ -1,59 +1,106 @@
 from src.data.database.getCollectionInfo import get_collection_settings
 from src.data.database.getLLMApiKey import get_llm_api_key
-from src.endpoint.models import VectorStoreQueryRequest
+from src.endpoint.models import VectorStoreQueryRequest, QueryRequest, BatchQueryRequest
 from src.endpoint.ragQuery import rag_query
-from src.endpoint.vectorQuery import query_vectorstore
+from src.endpoint.vectorQuery import query_vectorstore, query_collections, query_vectorstore_batch
 from src.llms.llmQuery import llm_query
 from src.endpoint.models import ChatCompletionRequest
 
 
-def vector_call(query_request: VectorStoreQueryRequest, user_id: str):
+def collection_query(query_request: QueryRequest, user_id: str, collection_name: str):
+    """Build a vector store query for one of the user's collections."""
+    collectionSettings = get_collection_settings(user_id, collection_name)
+    if not collectionSettings:
+        raise ValueError("Collection settings not found")
+    if collectionSettings.is_local == False:
+        api_key = get_llm_api_key(int(user_id), "openai")
+    else:
+        api_key = None
+    return VectorStoreQueryRequest(
+        query=query_request.input or "",
+        collection=collectionSettings.id,
+        collection_name=collection_name,
+        user=user_id,
+        api_key=api_key,
+        top_k=query_request.top_k,
+        is_local=collectionSettings.is_local,
+        local_embedding_model=collectionSettings.local_embedding_model,
+        mode=query_request.mode,
+        rerank=query_request.rerank,
+        rerank_model=query_request.rerank_model,
+        rerank_min_score=query_request.rerank_min_score,
+        where=query_request.where,
+        where_document=query_request.where_document,
+        min_score=query_request.min_score,
+        metadata_fields=query_request.metadata_fields,
+        diversity=query_request.diversity,
+        collection_timeout=query_request.collection_timeout
+    ), collectionSettings
+
+
+def collection_queries(query_request: QueryRequest, user_id: str):
+    """Per-collection queries for a multi-collection request; unknown collections are reported."""
+    queries, settings, errors = [], [], {}
+    for collection_name in dict.fromkeys(query_request.collection_names):
+        try:
+            query, collectionSettings = collection_query(
+                query_request, user_id, collection_name)
+        except ValueError as e:
+            errors[collection_name] = str(e)
+            continue
+        queries.append(query)
+        settings.append(collectionSettings)
+    return queries, settings, errors
+
+
+def vector_call(query_request: QueryRequest, user_id: str):
     print(f"API vector query received for user {user_id}")
     if not query_request.model:
         print(f"No model provided in request body for user {user_id}")
         """ VECTORSTORE QUERY IF NO MODEL PROVIDED IN REQUEST BODY """
-        collectionSettings = get_collection_settings(
-            user_id, query_request.collection_name)
-        if collectionSettings.is_local == False:
-            api_key = get_llm_api_key(int(user_id), "openai")
-        else:
-            api_key = None
-        if not collectionSettings:
-            raise ValueError("Collection settings not found")
-
-        vectorStoreData = VectorStoreQueryRequest(
-            query=query_request.input,
-            collection=collectionSettings.id,
-            collection_name=query_request.collection_name,
-            user=user_id,
-            api_key=api_key,
-            top_k=query_request.top_k,
-            is_local=collectionSettings.is_local,
-            local_embedding_model=collectionSettings.local_embedding_model
-        )
+        if query_request.collection_names:
+            queries, _, errors = collection_queries(query_request, user_id)
+            result = query_collections(
+                queries, query_request.top_k, query_request.collection_timeout)
+            if result["status"] == "success":
+                result["errors"].update(errors)
+            return result
+        vectorStoreData, collectionSettings = collection_query(
+            query_request, user_id, query_request.collection_name)
         return query_vectorstore(vectorStoreData, collectionSettings.is_local)
 
 
-async def rag_call(query_request: VectorStoreQueryRequest, user_id: str):
+def vector_batch_call(query_request: BatchQueryRequest, user_id: str):
+    print(f"API batch vector query of {len(query_request.inputs)} queries received for user {user_id}")
+    vectorStoreData, _ = collection_query(
+        query_request, user_id, query_request.collection_name)
+    return query_vectorstore_batch(vectorStoreData, query_request.inputs)
+
+
+async def rag_call(query_request: QueryRequest, user_id: str):
     print(f"Model provided in request body for user {user_id}")
     """ MODEL + VECTORSTORE QUERY IF MODEL AND COLLECTION NAME PROVIDED IN REQUEST BODY """
-    collectionSettings = get_collection_settings(
-        user_id, query_request.collection_name)
-    if not collectionSettings:
-        raise ValueError("Collection settings not found")
+    if query_request.collection_names:
+        queries, collectionSettings, _ = collection_queries(query_request, user_id)
+        if not queries:
+            raise ValueError("Collection settings not found")
+    else:
+        _, collectionSettings = collection_query(
+            query_request, user_id, query_request.collection_name)
+        queries = None
     if query_request.is_local == False:
         api_key = get_llm_api_key(int(user_id), query_request.provider)
     else:
         api_key = None
     ragData = VectorStoreQueryRequest(
         query=query_request.input,
-        collection=collectionSettings.id,
+        collection=None if queries else collectionSettings.id,
         collection_name=query_request.collection_name,
         user=user_id,
         api_key=api_key,
         top_k=query_request.top_k,
-        is_local=collectionSettings.is_local,
-        local_embedding_model=collectionSettings.local_embedding_model,
+        is_local=query_request.is_local if queries else collectionSettings.is_local,
+        local_embedding_model=None if queries else collectionSettings.local_embedding_model,
         temperature=query_request.temperature,
         max_completion_tokens=query_request.max_completion_tokens,
         top_p=query_request.top_p,
@@ -61,9 +108,19 @@ async def rag_call(query_request: VectorStoreQueryRequest, user_id: str):
         presence_penalty=query_request.presence_penalty,
         provider=query_request.provider,
         model=query_request.model,
-        is_ooba=query_request.is_ooba
+        is_ooba=query_request.is_ooba,
+        mode=query_request.mode,
+        rerank=query_request.rerank,
+        rerank_model=query_request.rerank_model,
+        rerank_min_score=query_request.rerank_min_score,
+        where=query_request.where,
+        where_document=query_request.where_document,
+        min_score=query_request.min_score,
+        metadata_fields=query_request.metadata_fields,
+        diversity=query_request.diversity,
+        collection_timeout=query_request.collection_timeout
     )
-    return await rag_query(ragData, collectionSettings)
+    return await rag_query(ragData, collectionSettings, queries)
 
 
 async def llm_call(query_request: ChatCompletionRequest, user_id: str):
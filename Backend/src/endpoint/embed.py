@@ -1,100 +1,119 @@
-from src.data.dataIntake.textSplitting import split_text
-from src.data.dataIntake.loadFile import load_document
+from src.data.dataIntake.textSplitting import split_stream
+from src.data.dataIntake.loadFile import DocumentStream
 from src.endpoint.models import EmbeddingRequest
+from src.jobs.scheduler import iterate_in_thread
 from src.vectorstorage.helpers.sanitizeCollectionName import sanitize_collection_name
 from src.vectorstorage.vectorstore import get_vectorstore
-from src.vectorstorage.embeddings import embed_chunk, chunk_list
+from src.vectorstorage.ingest_pipeline import IngestPipeline, prefetch
+from src.vectorstorage.manifest import (
+    FileFingerprint, stream_chunk_ids, collection_manifest, delete_chunks, existing_chunk_ids)
+from src.vectorstorage.collection_settings import collection_settings
+from src.vectorstorage.embedding_registry import EMBEDDING_BACKENDS
 
+import asyncio
 import os
-import multiprocessing
-import concurrent.futures
-import time
 from typing import AsyncGenerator
-from collections import deque
 import logging
 
 logger = logging.getLogger(__name__)
 
 
-async def embed(data: EmbeddingRequest) -> AsyncGenerator[dict, None]:
+async def embed(data: EmbeddingRequest, cancel_event=None, checkpoint=None) -> AsyncGenerator[dict, None]:
     file_name = os.path.basename(data.file_path)
+    # Jobs share the event loop: file hashing, model loads and Chroma calls
+    # run on executor threads so other jobs and requests keep going
+    loop = asyncio.get_event_loop()
     try:
         yield {"status": "info", "message": f"Starting embedding process for file: {file_name}"}
 
+        collection_name = sanitize_collection_name(str(data.collection_name))
+        fingerprint = await loop.run_in_executor(None, FileFingerprint, data.file_path)
+        if data.sync and await loop.run_in_executor(
+                None, collection_manifest.is_unchanged, collection_name, data.file_path, fingerprint):
+            yield {"status": "success", "message": f"{file_name} is unchanged, skipping"}
+            return
+        # Hash the content about to be read; the manifest records this digest
+        await loop.run_in_executor(None, fingerprint.sha256)
+
         # Get file size
-        file_size = os.path.getsize(data.file_path)
+        file_size = fingerprint.size
         if file_size > 25 * 1024 * 1024:  # If file is larger than 25MB
             yield {"status": "info", "message": f"Processing large file ({file_size / (1024*1024):.1f}MB). This may take longer."}
 
-        text_output = await load_document(data.file_path)
-
-        if text_output is None:
-            raise Exception("Failed to load document")
-
-        # Handle generator output from CSV loader
-        if hasattr(text_output, '__iter__') and not isinstance(text_output, (str, list)):
-            texts = []
-            for item in text_output:
-                if isinstance(item, dict) and "status" in item:
-                    # Forward progress updates from CSV processing
-                    yield item
-                else:
-                    texts = item
-        else:
-            yield {"status": "info", "message": "File loaded successfully"}
-
-        # Check if file is CSV or PDF
-        if file_name.lower().endswith('.csv'):
-            texts = text_output  # CSV loader already returns list of documents
-        elif file_name.lower().endswith('.pdf'):
-            # PDF loader returns list of Documents, no need to split
-            texts = text_output
-        else:
-            # Pass metadata to split_text if it exists
-            texts = split_text(text_output, data.file_path,
-                             data.metadata if hasattr(data, 'metadata') else None)
-
-        if not texts:
-            raise Exception("No text content extracted from file")
-
-        yield {"status": "info", "message": f"Split text into {len(texts)} chunks"}
-
-        collection_name = sanitize_collection_name(str(data.collection_name))
-        vectordb = get_vectorstore(
-            data.api_key, collection_name, data.is_local, data.local_embedding_model)
+        if data.embedding_backend:
+            if data.embedding_backend not in EMBEDDING_BACKENDS:
+                raise Exception(f"Unknown embedding backend: {data.embedding_backend}")
+            collection_settings.update(
+                collection_name, embedding_backend=data.embedding_backend)
+        vectordb = await loop.run_in_executor(
+            None, get_vectorstore, data.api_key, collection_name, data.is_local, data.local_embedding_model)
         if not vectordb:
             raise Exception("Failed to initialize vector database")
 
-        # Adjust chunk size based on file size
-        chunk_size = min(50, max(10, int(1000000 / file_size)))  # Dynamic chunk size
-        chunks = list(chunk_list(texts, chunk_size))
-        total_chunks = len(chunks)
-        yield {"status": "info", "message": f"Split into {total_chunks} chunks of {chunk_size} documents each"}
-
-        start_time = time.time()
-        time_history = deque(maxlen=5)
-
-        # Process chunks with reduced parallelism for large files
-        num_cores = max(1, min(multiprocessing.cpu_count() - 1, 4))  # Use fewer cores for large files
-        yield {"status": "info", "message": f"Using {num_cores} CPU cores for processing"}
-
-        with concurrent.futures.ThreadPoolExecutor(max_workers=num_cores) as executor:
-            futures = []
-            for i, chunk in enumerate(chunks):
-                chunk_arg = (vectordb, chunk, i + 1, total_chunks, start_time, time_history)
-                future = executor.submit(embed_chunk, chunk_arg)
-                futures.append(future)
-                
-                # Process results as they complete
-                for completed in concurrent.futures.as_completed(futures):
-                    try:
-                        result = completed.result()
-                        yield {"status": "progress", "data": result}
-                    except Exception as e:
-                        logger.error(f"Error processing chunk: {str(e)}")
-                        yield {"status": "error", "message": f"Error processing chunk: {str(e)}"}
-                
-                futures = [f for f in futures if not f.done()]  # Clean up completed futures
+        # The file is read, split and encoded as a stream: pages or text
+        # blocks flow through a bounded queue, so memory stays flat and the
+        # first vectors are written while the rest of the file is still unread
+        stream = DocumentStream(data.file_path)
+        chunks = split_stream(stream, data.file_path,
+                              data.metadata if hasattr(data, 'metadata') else None)
+        existing_ids = set(await loop.run_in_executor(None, existing_chunk_ids, vectordb, data.file_path))
+        stale_ids = set(existing_ids)
+        counts = {"chunks": 0, "pending": 0, "resumed": 0}
+        # Chunk positions are stable for an unchanged file, so a journaled job
+        # can skip every chunk range it already committed before a restart.
+        # Only chunks still in flight keep an entry here.
+        positions = {}
+
+        def pending_chunks():
+            # Deterministic IDs make re-ingestion an upsert of the same chunks
+            for position, doc in enumerate(stream_chunk_ids(collection_name, chunks)):
+                doc.metadata["source"] = data.file_path
+                counts["chunks"] += 1
+                stale_ids.discard(doc.id)
+                if data.sync and doc.id in existing_ids:
+                    continue
+                if checkpoint is not None:
+                    if checkpoint.ranges and checkpoint.is_committed(position):
+                        counts["resumed"] += 1
+                        continue
+                    positions[doc.id] = position
+                counts["pending"] += 1
+                yield doc
+
+        def estimated_total():
+            if not stream.fraction:
+                return None
+            return int(counts["pending"] / stream.fraction)
+
+        on_commit = None
+        if checkpoint is not None:
+            def on_commit(batch):
+                checkpoint.record_indices(positions.pop(doc.id) for doc in batch)
+
+        pipeline = IngestPipeline(
+            vectordb, collection_name, cancel_event, on_commit=on_commit)
+        yield {"status": "info", "message": "Streaming chunks through the encoder in adaptive batches"}
+
+        async for result in iterate_in_thread(pipeline.run(prefetch(pending_chunks()), total=estimated_total)):
+            yield {"status": "progress", "data": result}
+
+        if cancel_event and cancel_event.is_set():
+            yield {"status": "cancelled", "message": "Embedding process cancelled"}
+            return
+
+        if not counts["chunks"]:
+            raise Exception("No text content extracted from file")
+        yield {"status": "info", "message": f"Split text into {counts['chunks']} chunks"}
+        if data.sync:
+            yield {"status": "info", "message": f"{counts['pending']} of {counts['chunks']} chunks changed"}
+        if counts["resumed"]:
+            yield {"status": "info", "message": f"Resumed: {counts['resumed']} chunks were already committed"}
+
+        if stale_ids:
+            await loop.run_in_executor(None, delete_chunks, vectordb, list(stale_ids))
+            yield {"status": "info", "message": f"Removed {len(stale_ids)} stale chunks"}
+        await loop.run_in_executor(
+            None, collection_manifest.record, collection_name, data.file_path, counts["chunks"], fingerprint)
 
         yield {"status": "success", "message": "Embedding completed successfully"}
 
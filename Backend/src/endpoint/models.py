@@ -11,6 +11,63 @@ class EmbeddingRequest(BaseModel):
     metadata: Optional[Dict[str, Any]] = None
     is_local: Optional[bool] = False
     local_embedding_model: Optional[str] = "granite-embedding:278m"
+    sync: Optional[bool] = False  # Skip unchanged files and re-embed only changed chunks
+    priority: Optional[int] = 0  # Higher runs first when ingestion jobs are queued
+    embedding_backend: Optional[str] = None  # 'torch', 'onnx', 'onnx-int8'; saved as the collection's setting
+    bulk_load: Optional[bool] = False  # Large ingest: defer index maintenance until the job ends
+
+
+class SyncCollectionRequest(BaseModel):
+    file_paths: List[str]
+    api_key: Optional[str] = None
+    collection: int
+    collection_name: str
+    user: int
+    metadata: Optional[Dict[str, Any]] = None
+    is_local: Optional[bool] = False
+    local_embedding_model: Optional[str] = "granite-embedding:278m"
+    priority: Optional[int] = 0
+    embedding_backend: Optional[str] = None
+    bulk_load: Optional[bool] = False
+
+
+class CollectionSettingsRequest(BaseModel):
+    collection_name: str
+    embedding_backend: Optional[str] = None  # 'torch', 'onnx', 'onnx-int8'
+    vector_engine: Optional[str] = None  # 'auto', 'flat', 'hnsw'
+    quantization: Optional[str] = None  # 'none', 'int8', 'binary' (flat index only)
+    # HNSW parameters (M, construction_ef, search_ef, num_threads, batch_size,
+    # sync_threshold, resize_factor); applied when the index is next built
+    hnsw: Optional[Dict[str, Any]] = None
+
+
+class CompactCollectionRequest(BaseModel):
+    collection_name: str
+    priority: Optional[int] = 0
+
+
+class ReembedCollectionRequest(BaseModel):
+    collection_name: str
+    local_embedding_model: str
+    embedding_backend: Optional[str] = None
+    priority: Optional[int] = 0
+
+
+class ExportCollectionRequest(BaseModel):
+    collection_name: str
+    file_path: Optional[str] = None
+    dtype: Optional[str] = "float16"
+    is_local: Optional[bool] = False
+    local_embedding_model: Optional[str] = None
+    priority: Optional[int] = 0
+
+
+class ImportCollectionRequest(BaseModel):
+    collection_name: str
+    file_path: str
+    overwrite: Optional[bool] = False
+    flat_index: Optional[bool] = True
+    priority: Optional[int] = 0
 
 
 class ModelLoadRequest(BaseModel):
@@ -77,7 +134,10 @@ class ModelLoadRequest(BaseModel):
 class VectorStoreQueryRequest(BaseModel):
     query: str
     collection: Optional[int] = None
-    collection_name: str
+    collection_name: Optional[str] = None
+    # Query several collections concurrently and merge them into one top_k
+    collection_names: Optional[List[str]] = None
+    collection_timeout: Optional[float] = None  # Per-collection deadline in seconds
     user: int
     api_key: Optional[str] = None
     top_k: int = 5
@@ -94,6 +154,21 @@ class VectorStoreQueryRequest(BaseModel):
     is_ooba: Optional[bool] = False
     character: Optional[str] = None
     is_ollama: Optional[bool] = False
+    mode: Optional[str] = "vector"  # 'vector', 'hybrid' (BM25 + vector, RRF), 'lexical'
+    rerank: Optional[bool] = False  # Re-score over-fetched candidates with a cross-encoder
+    rerank_model: Optional[str] = None
+    rerank_min_score: Optional[float] = None  # Drop re-ranked chunks scoring below this
+    where: Optional[Dict[str, Any]] = None  # Chroma metadata filter, e.g. {"source": "notes.pdf"}
+    where_document: Optional[Dict[str, Any]] = None  # Chroma content filter, e.g. {"$contains": "error"}
+    min_score: Optional[float] = None  # Drop results scoring below this
+    metadata_fields: Optional[List[str]] = None  # Metadata keys to return; ["*"] returns all
+    diversity: Optional[float] = None  # 0-1; MMR trade-off between relevance and novelty
+
+
+class BatchVectorStoreQueryRequest(VectorStoreQueryRequest):
+    """Many queries against one collection; results stream back as NDJSON"""
+    query: Optional[str] = None
+    queries: List[str]
 
 
 class YoutubeTranscriptRequest(BaseModel):
@@ -105,6 +180,8 @@ class YoutubeTranscriptRequest(BaseModel):
     api_key: Optional[str] = None
     is_local: Optional[bool] = False
     local_embedding_model: Optional[str] = "granite-embedding:278m"
+    priority: Optional[int] = 0
+    bulk_load: Optional[bool] = False
 
 
 class DeleteCollectionRequest(BaseModel):
@@ -124,6 +201,8 @@ class WebCrawlRequest(BaseModel):
     api_key: Optional[str] = None
     is_local: Optional[bool] = False
     local_embedding_model: Optional[str] = "granite-embedding:278m"
+    priority: Optional[int] = 0
+    bulk_load: Optional[bool] = False
 
 
 class QueryRequest(BaseModel):
@@ -132,6 +211,8 @@ class QueryRequest(BaseModel):
     provider: Optional[str] = None
     model: Optional[str] = None
     collection_name: Optional[str] = None
+    collection_names: Optional[List[str]] = None
+    collection_timeout: Optional[float] = None
     top_k: Optional[int] = 5
     temperature: Optional[float] = 0.5
     max_completion_tokens: Optional[int] = 2048
@@ -143,6 +224,20 @@ class QueryRequest(BaseModel):
     local_embedding_model: Optional[str] = "granite-embedding:278m"
     character: Optional[str] = None
     is_ollama: Optional[bool] = False
+    mode: Optional[str] = "vector"  # 'vector', 'hybrid', 'lexical'
+    rerank: Optional[bool] = False
+    rerank_model: Optional[str] = None
+    rerank_min_score: Optional[float] = None
+    where: Optional[Dict[str, Any]] = None
+    where_document: Optional[Dict[str, Any]] = None
+    min_score: Optional[float] = None
+    metadata_fields: Optional[List[str]] = None
+    diversity: Optional[float] = None
+
+
+class BatchQueryRequest(QueryRequest):
+    input: Optional[str] = None
+    inputs: List[str]
 
 
 class Message(BaseModel):
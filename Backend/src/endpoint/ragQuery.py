@@ -1,16 +1,26 @@
 from src.endpoint.models import VectorStoreQueryRequest, ChatCompletionRequest
-from src.endpoint.vectorQuery import query_vectorstore
+from src.endpoint.vectorQuery import query_vectorstore, query_collections
 from src.llms.llmQuery import llm_query
+from typing import List, Optional
+import asyncio
 
 
-async def rag_query(data: VectorStoreQueryRequest, collectionInfo):
+async def rag_query(data: VectorStoreQueryRequest, collectionInfo, queries: Optional[List[VectorStoreQueryRequest]] = None):
+    """RAG over one collection, or over several (one query each, merged by score) when queries is given."""
     try:
-        results = query_vectorstore(data, data.is_local)
+        if queries:
+            results = await asyncio.get_event_loop().run_in_executor(
+                None, query_collections, queries, data.top_k, data.collection_timeout)
+        else:
+            results = await asyncio.get_event_loop().run_in_executor(
+                None, query_vectorstore, data, data.is_local)
+        collections = collectionInfo if isinstance(collectionInfo, list) else [collectionInfo]
         data.prompt = f"The following is the data that the user has provided via their custom data collection: " + \
-            f"\n\n{results}" + \
-            f"\n\nCollection/Store Name: {collectionInfo.name}" + \
-            f"\n\nCollection/Store Files: {collectionInfo.files}" + \
-            f"\n\nCollection/Store Description: {collectionInfo.description}"
+            f"\n\n{results}" + "".join(
+                f"\n\nCollection/Store Name: {info.name}" +
+                f"\n\nCollection/Store Files: {info.files}" +
+                f"\n\nCollection/Store Description: {info.description}"
+                for info in collections)
 
         chat_completion_request = ChatCompletionRequest(
             messages=[
@@ -0,0 +1,76 @@
+from src.endpoint.embed import embed
+from src.endpoint.models import EmbeddingRequest, SyncCollectionRequest
+from src.vectorstorage.helpers.sanitizeCollectionName import sanitize_collection_name
+from src.vectorstorage.manifest import collection_manifest, delete_source
+from src.vectorstorage.vectorstore import get_vectorstore
+
+from typing import AsyncGenerator
+import os
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+async def sync_collection(data: SyncCollectionRequest, cancel_event=None) -> AsyncGenerator[dict, None]:
+    """
+    Bring a collection in line with a list of source files: drop chunks of
+    files that are no longer listed and re-embed only files whose manifest
+    entry (size, mtime, hash) no longer matches.
+    """
+    try:
+        collection_name = sanitize_collection_name(str(data.collection_name))
+        current = set(data.file_paths)
+
+        removed = [source for source in collection_manifest.sources(collection_name)
+                   if source not in current]
+        if removed:
+            vectordb = get_vectorstore(
+                data.api_key, collection_name, data.is_local, data.local_embedding_model)
+            if not vectordb:
+                raise Exception("Failed to initialize vector database")
+            for source in removed:
+                delete_source(vectordb, source)
+                collection_manifest.remove(collection_name, source)
+            yield {"status": "info", "message": f"Removed {len(removed)} deleted files from the collection"}
+
+        changed = [path for path in data.file_paths
+                   if os.path.exists(path) and not collection_manifest.is_unchanged(collection_name, path)]
+        yield {"status": "info", "message": f"{len(changed)} of {len(data.file_paths)} files changed"}
+
+        start_time = time.time()
+        for i, file_path in enumerate(changed):
+            request = EmbeddingRequest(
+                file_path=file_path,
+                api_key=data.api_key,
+                collection=data.collection,
+                collection_name=data.collection_name,
+                user=data.user,
+                metadata=dict(data.metadata) if data.metadata else None,
+                is_local=data.is_local,
+                local_embedding_model=data.local_embedding_model,
+                sync=True,
+                embedding_backend=data.embedding_backend
+            )
+            async for result in embed(request, cancel_event):
+                if result["status"] in ("error", "cancelled"):
+                    yield result
+            if cancel_event and cancel_event.is_set():
+                return
+
+            elapsed = time.time() - start_time
+            remaining = (len(changed) - i - 1) * elapsed / (i + 1)
+            yield {"status": "progress", "data": {
+                "chunk": i + 1,
+                "total_chunks": len(changed),
+                "percent_complete": round((i + 1) / len(changed) * 100, 2),
+                "est_remaining_time": time.strftime('%H:%M:%S', time.gmtime(remaining)),
+                "message": f"Synced {os.path.basename(file_path)}"
+            }}
+
+        yield {"status": "success", "message": f"Collection synced: {len(changed)} files updated, {len(removed)} removed"}
+
+    except Exception as e:
+        error_msg = f"Error syncing collection: {str(e)}"
+        logger.error(error_msg)
+        yield {"status": "error", "message": error_msg}
@@ -1,18 +1,129 @@
 from src.endpoint.models import VectorStoreQueryRequest
 from src.vectorstorage.helpers.sanitizeCollectionName import sanitize_collection_name
-from src.vectorstorage.vectorstore import get_vectorstore
+from src.vectorstorage.vectorstore import collection_lock, get_vectorstore
+from src.vectorstorage.search import BATCH_WINDOW, similarity_search, search_collections, batch_search
+from src.vectorstorage.embedding_registry import DEFAULT_RERANK_MODEL
+from functools import partial
+from itertools import islice, takewhile
+from typing import Any, Dict, Iterator, List, Optional
+import json
+
+# Metadata that can be large (e.g. YouTube descriptions repeated on every
+# chunk) is only returned when named in metadata_fields
+LARGE_METADATA_FIELDS = ("description",)
+
+
+def project_metadata(metadata: Dict[str, Any], fields: Optional[List[str]]) -> Dict[str, Any]:
+    if fields is None:
+        return {key: value for key, value in metadata.items() if key not in LARGE_METADATA_FIELDS}
+    if "*" in fields:
+        return metadata
+    return {key: metadata[key] for key in fields if key in metadata}
+
+
+def format_result(doc, score: float, data: VectorStoreQueryRequest) -> Dict[str, Any]:
+    return {"content": doc.page_content, "metadata": project_metadata(doc.metadata, data.metadata_fields),
+            "score": score}
+
+
+def get_rerank_model(data: VectorStoreQueryRequest) -> Optional[str]:
+    return (data.rerank_model or DEFAULT_RERANK_MODEL) if data.rerank else None
+
+
+def apply_cutoffs(results, data: VectorStoreQueryRequest, rerank_model: Optional[str]):
+    if rerank_model and data.rerank_min_score is not None:
+        # Fewer, more relevant chunks keep RAG prompts short
+        results = [(doc, score) for doc, score in results if score >= data.rerank_min_score]
+    if data.min_score is not None and data.diversity:
+        # MMR order is not score order, so a low score can precede a high one
+        results = [(doc, score) for doc, score in results if score >= data.min_score]
+    elif data.min_score is not None:
+        # Results are best first, so everything after the first miss is below too
+        results = list(takewhile(lambda result: result[1] >= data.min_score, results))
+    return results
+
+
+def search_collection(data: VectorStoreQueryRequest):
+    collection_name = sanitize_collection_name(str(data.collection_name))
+    rerank_model = get_rerank_model(data)
+    # The handle and the model it embeds with must outlive a concurrent swap
+    with collection_lock(collection_name).shared():
+        vectordb = get_vectorstore(
+            data.api_key, collection_name, data.is_local, data.local_embedding_model)
+        results = similarity_search(
+            vectordb, collection_name, data.query, data.top_k, data.mode or "vector", rerank_model,
+            data.where, data.where_document, data.diversity)
+    return apply_cutoffs(results, data, rerank_model)
+
+
+def query_collections(queries: List[VectorStoreQueryRequest], top_k: int, timeout: Optional[float] = None):
+    """Query each collection concurrently and merge the results by score."""
+    try:
+        searches = {query.collection_name: partial(search_collection, query) for query in queries}
+        hits, errors = search_collections(searches, top_k, timeout)
+        requests = {query.collection_name: query for query in queries}
+        return {
+            "status": "success",
+            "results": [{**format_result(doc, score, requests[name]), "collection": name}
+                        for name, doc, score in hits],
+            "errors": errors,
+        }
+    except Exception as e:
+        print(f"Error querying vectorstores: {str(e)}")
+        return {"status": "error", "message": str(e)}
 
 
 def query_vectorstore(data: VectorStoreQueryRequest, is_local: bool):
+    if data.collection_names:
+        # Every listed collection is queried with this request's embedding settings
+        queries = [data.model_copy(update={"collection_name": name, "collection_names": None, "is_local": is_local})
+                   for name in dict.fromkeys(data.collection_names)]
+        return query_collections(queries, data.top_k, data.collection_timeout)
     try:
-        collection_name = sanitize_collection_name(str(data.collection_name))
-        vectordb = get_vectorstore(
-            data.api_key, collection_name, is_local, data.local_embedding_model)
-        results = vectordb.similarity_search(data.query, k=data.top_k)
+        results = search_collection(data.model_copy(update={"is_local": is_local}))
         return {
             "status": "success",
-            "results": [{"content": doc.page_content, "metadata": doc.metadata} for doc in results],
+            "results": [format_result(doc, score, data) for doc, score in results],
         }
     except Exception as e:
         print(f"Error querying vectorstore: {str(e)}")
         return {"status": "error", "message": str(e)}
+
+
+def query_vectorstore_batch(data: VectorStoreQueryRequest, queries: List[str]) -> Iterator[str]:
+    """NDJSON lines, one per query in input order, produced as each window of queries completes."""
+    collection_name = sanitize_collection_name(str(data.collection_name))
+    rerank_model = get_rerank_model(data)
+    queries = iter(queries)
+    index = 0
+    while True:
+        window = list(islice(queries, BATCH_WINDOW))
+        if not window:
+            return
+        # Hold the collection only while a window is searched, not while its
+        # lines wait on the client, so a pending swap (and the queries queued
+        # behind it) isn't held up by a slow reader
+        with collection_lock(collection_name).shared():
+            try:
+                vectordb = get_vectorstore(
+                    data.api_key, collection_name, data.is_local, data.local_embedding_model)
+            except Exception as e:
+                print(f"Error opening vectorstore for batch query: {str(e)}")
+                error = e
+            else:
+                error = None
+                hits = list(batch_search(vectordb, collection_name, window, data.top_k, data.mode or "vector",
+                                         window=len(window), rerank_model=rerank_model, where=data.where,
+                                         where_document=data.where_document, diversity=data.diversity))
+        if error is not None:
+            yield json.dumps({"status": "error", "message": str(error)}) + "\n"
+            return
+        for query, results in hits:
+            if isinstance(results, Exception):
+                line = {"index": index, "query": query, "status": "error", "message": str(results)}
+            else:
+                line = {"index": index, "query": query, "status": "success",
+                        "results": [format_result(doc, score, data)
+                                    for doc, score in apply_cutoffs(results, data, rerank_model)]}
+            index += 1
+            yield json.dumps(line, default=str) + "\n"
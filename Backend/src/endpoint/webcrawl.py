@@ -1,9 +1,12 @@
-from src.data.dataIntake.fileTypes.loadX import load_html
+from src.data.dataIntake.fileTypes.loadX import read_html_text
 from src.data.dataIntake.textSplitting import split_text
 from src.data.dataIntake.getHtmlFiles import get_html_files
 from src.data.dataFetch.webcrawler import WebCrawler
 from src.endpoint.models import WebCrawlRequest
 from src.vectorstorage.vectorstore import get_vectorstore
+from src.vectorstorage.helpers.sanitizeCollectionName import sanitize_collection_name
+from src.vectorstorage.manifest import assign_chunk_ids
+from src.vectorstorage.collection_writes import record_upsert
 
 from typing import Generator
 import json
@@ -12,8 +15,12 @@ from urllib.parse import urlparse
 import logging
 
 
-def webcrawl(data: WebCrawlRequest, cancel_event=None) -> Generator[dict, None, None]:
+def webcrawl(data: WebCrawlRequest, cancel_event=None, checkpoint=None) -> Generator[dict, None, None]:
     try:
+        # Chroma, the manifest and the chunk ids use the sanitized name;
+        # the crawler's output folder keeps the collection's own name
+        collection_name = sanitize_collection_name(str(data.collection_name))
+
         # Create web crawler instance with all required fields
         scraper = WebCrawler(
             data.base_url,
@@ -22,7 +29,8 @@ def webcrawl(data: WebCrawlRequest, cancel_event=None) -> Generator[dict, None,
             data.collection_id,
             data.collection_name,
             max_workers=data.max_workers,
-            cancel_event=cancel_event
+            cancel_event=cancel_event,
+            checkpoint=checkpoint
         )
 
         # Yield progress updates during scraping
@@ -35,11 +43,14 @@ def webcrawl(data: WebCrawlRequest, cancel_event=None) -> Generator[dict, None,
             data.base_url).netloc.replace(".", "_") + "_docs"
         collection_path = os.path.join(scraper.output_dir, root_url_dir)
         vector_store = get_vectorstore(
-            data.api_key, data.collection_name, data.is_local, data.local_embedding_model)
+            data.api_key, collection_name, data.is_local, data.local_embedding_model)
 
         # Get all HTML files recursively
         html_files = get_html_files(collection_path)
         print(f"Found {len(html_files)} HTML files")
+        if checkpoint:
+            embedded = checkpoint.items("embedded")
+            html_files = [f for f in html_files if f not in embedded]
 
         # Process files in batches for better performance
         batch_size = 50
@@ -49,13 +60,17 @@ def webcrawl(data: WebCrawlRequest, cancel_event=None) -> Generator[dict, None,
             batch_docs = []
 
             for file_path in batch:
-                content = load_html(file_path)
+                content = read_html_text(file_path)
                 if content:
                     split_content = split_text(content, file_path)
                     batch_docs.extend(split_content)
 
             if batch_docs:
-                vector_store.add_documents(batch_docs)
+                assign_chunk_ids(collection_name, batch_docs)
+                ids = vector_store.add_documents(batch_docs)
+                record_upsert(vector_store._collection.name, batch_docs, ids)
+            if checkpoint:
+                checkpoint.add_items("embedded", batch)
 
             current_batch = i//batch_size + 1
             progress_data = {
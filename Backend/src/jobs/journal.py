@@ -0,0 +1,207 @@
+from src.vectorstorage.vectorstore import get_app_data_dir
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+import threading
+import hashlib
+import logging
+import sqlite3
+import bisect
+import json
+import time
+import os
+
+logger = logging.getLogger(__name__)
+
+journal_db_path = os.path.join(get_app_data_dir(), "ingest_journal.sqlite")
+
+RUNNING = "running"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+# Request fields never written to disk; resumed jobs look credentials up again
+SECRET_PARAMS = ("api_key",)
+
+
+class Checkpoint:
+    """
+    Progress record for one ingestion job: committed chunk index ranges and
+    named sets of completed items (e.g. crawled URLs). Written after each
+    commit so a restarted job only redoes the remaining work.
+    """
+
+    def __init__(self, journal: "IngestJournal", job_key: str):
+        self.journal = journal
+        self.job_key = job_key
+        self._lock = threading.Lock()
+        self._ranges: List[Tuple[int, int]] = journal._load_ranges(job_key)
+
+    @property
+    def ranges(self) -> List[Tuple[int, int]]:
+        return list(self._ranges)
+
+    def committed_count(self) -> int:
+        return sum(end - start for start, end in self._ranges)
+
+    def is_committed(self, index: int) -> bool:
+        i = bisect.bisect_right(self._ranges, (index, float("inf"))) - 1
+        return i >= 0 and self._ranges[i][0] <= index < self._ranges[i][1]
+
+    def record_indices(self, indices: Iterable[int]) -> None:
+        """Mark chunk indices as committed, merging them into half-open ranges."""
+        with self._lock:
+            merged: List[List[int]] = []
+            points = sorted(set(indices))
+            spans = [(i, i + 1) for i in points] + self._ranges
+            for start, end in sorted(spans):
+                if merged and start <= merged[-1][1]:
+                    merged[-1][1] = max(merged[-1][1], end)
+                else:
+                    merged.append([start, end])
+            self._ranges = [(start, end) for start, end in merged]
+            self.journal._save_ranges(self.job_key, self._ranges)
+
+    def items(self, kind: str) -> Set[str]:
+        return self.journal._load_items(self.job_key, kind)
+
+    def add_items(self, kind: str, items: Iterable[str]) -> None:
+        self.journal._save_items(self.job_key, kind, items)
+
+    def complete(self) -> None:
+        self.journal.complete(self.job_key)
+
+    def close(self, status: str) -> None:
+        """
+        Settle a job that stopped without finishing. Its progress is dropped:
+        the collection may be deleted or changed before the job runs again.
+        """
+        self._ranges = []
+        self.journal.set_status(self.job_key, status, discard_progress=True)
+
+
+class IngestJournal:
+    """
+    Small SQLite journal next to the Chroma store. Jobs still marked running
+    at startup were interrupted (crash or /restart-server) and can be resumed
+    from their stored request parameters.
+    """
+
+    def __init__(self, db_path: str = journal_db_path):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    job_key TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    params TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    collection TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS ranges (
+                    job_key TEXT NOT NULL,
+                    start INTEGER NOT NULL,
+                    end INTEGER NOT NULL,
+                    PRIMARY KEY (job_key, start)
+                ) WITHOUT ROWID;
+                CREATE TABLE IF NOT EXISTS items (
+                    job_key TEXT NOT NULL,
+                    kind TEXT NOT NULL,
+                    item TEXT NOT NULL,
+                    PRIMARY KEY (job_key, kind, item)
+                ) WITHOUT ROWID;
+            """)
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}
+            if "collection" not in columns:
+                # Journals written before jobs recorded their collection
+                conn.execute("ALTER TABLE jobs ADD COLUMN collection TEXT")
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    @staticmethod
+    def make_key(kind: str, *parts: Any) -> str:
+        return hashlib.sha256("\0".join([kind] + [str(p) for p in parts]).encode("utf-8")).hexdigest()
+
+    def open(self, kind: str, job_key: str, params: Dict[str, Any], collection_name: Optional[str] = None) -> Checkpoint:
+        """Start or resume the journal entry for a job writing to collection_name."""
+        now = time.time()
+        params = {key: value for key, value in params.items() if key not in SECRET_PARAMS}
+        with self._lock, self._connect() as conn:
+            conn.execute("""
+                INSERT INTO jobs (job_key, kind, params, status, collection, created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(job_key) DO UPDATE SET status = excluded.status, params = excluded.params,
+                    collection = excluded.collection, updated_at = excluded.updated_at
+            """, (job_key, kind, json.dumps(params), RUNNING, collection_name, now, now))
+        checkpoint = Checkpoint(self, job_key)
+        if checkpoint.ranges:
+            logger.info(
+                f"Resuming {kind} job {job_key[:12]} with {checkpoint.committed_count()} chunks committed")
+        return checkpoint
+
+    def set_status(self, job_key: str, status: str, discard_progress: bool = False) -> None:
+        with self._lock, self._connect() as conn:
+            conn.execute("UPDATE jobs SET status = ?, updated_at = ? WHERE job_key = ?",
+                         (status, time.time(), job_key))
+            if discard_progress:
+                conn.execute("DELETE FROM ranges WHERE job_key = ?", (job_key,))
+                conn.execute("DELETE FROM items WHERE job_key = ?", (job_key,))
+
+    def forget_collection(self, collection_name: str) -> None:
+        """Drop every job record for a collection that was deleted or replaced."""
+        with self._lock, self._connect() as conn:
+            keys = [(row[0],) for row in conn.execute(
+                "SELECT job_key FROM jobs WHERE collection = ?", (collection_name,))]
+            conn.executemany("DELETE FROM ranges WHERE job_key = ?", keys)
+            conn.executemany("DELETE FROM items WHERE job_key = ?", keys)
+            conn.executemany("DELETE FROM jobs WHERE job_key = ?", keys)
+
+    def complete(self, job_key: str) -> None:
+        """Drop a finished job's records and compact the journal file."""
+        with self._lock:
+            with self._connect() as conn:
+                conn.execute("DELETE FROM ranges WHERE job_key = ?", (job_key,))
+                conn.execute("DELETE FROM items WHERE job_key = ?", (job_key,))
+                conn.execute("DELETE FROM jobs WHERE job_key = ?", (job_key,))
+            try:
+                conn = self._connect()
+                conn.execute("VACUUM")
+                conn.close()
+            except sqlite3.OperationalError as e:
+                # Another job holds the database; the next completion compacts it
+                logger.debug(f"Skipping journal vacuum: {str(e)}")
+
+    def unfinished(self) -> List[Tuple[str, Dict[str, Any]]]:
+        """(kind, params) of jobs that were running when the process stopped."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT kind, params FROM jobs WHERE status = ? ORDER BY created_at", (RUNNING,)).fetchall()
+        return [(kind, json.loads(params)) for kind, params in rows]
+
+    def _load_ranges(self, job_key: str) -> List[Tuple[int, int]]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT start, end FROM ranges WHERE job_key = ? ORDER BY start", (job_key,)).fetchall()
+        return [(start, end) for start, end in rows]
+
+    def _save_ranges(self, job_key: str, ranges: List[Tuple[int, int]]) -> None:
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM ranges WHERE job_key = ?", (job_key,))
+            conn.executemany("INSERT INTO ranges VALUES (?, ?, ?)",
+                             [(job_key, start, end) for start, end in ranges])
+
+    def _load_items(self, job_key: str, kind: str) -> Set[str]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT item FROM items WHERE job_key = ? AND kind = ?", (job_key, kind)).fetchall()
+        return {row[0] for row in rows}
+
+    def _save_items(self, job_key: str, kind: str, items: Iterable[str]) -> None:
+        with self._lock, self._connect() as conn:
+            conn.executemany("INSERT OR IGNORE INTO items VALUES (?, ?, ?)",
+                             [(job_key, kind, item) for item in items])
+
+
+# Global ingestion journal instance
+ingest_journal = IngestJournal()
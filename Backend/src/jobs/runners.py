@@ -0,0 +1,211 @@
+from src.data.dataFetch.youtube import youtube_transcript
+from src.data.database.getLLMApiKey import get_llm_api_key
+from src.endpoint.embed import embed
+from src.endpoint.models import EmbeddingRequest, SyncCollectionRequest, WebCrawlRequest, YoutubeTranscriptRequest, CompactCollectionRequest, ReembedCollectionRequest, \
+    ExportCollectionRequest, ImportCollectionRequest
+from src.endpoint.syncCollection import sync_collection
+from src.endpoint.webcrawl import webcrawl
+from src.jobs.journal import CANCELLED, FAILED, Checkpoint, ingest_journal
+from src.jobs.scheduler import Job, iterate_in_thread, job_scheduler
+from src.vectorstorage.helpers.sanitizeCollectionName import sanitize_collection_name
+from src.vectorstorage.collection_writes import bulk_load
+from src.vectorstorage.hnsw_settings import compact_collection, needs_compaction_after_bulk_load
+from src.vectorstorage.reembed import reembed_collection
+from src.vectorstorage.snapshot import export_collection, import_collection
+
+from typing import AsyncGenerator, AsyncIterator
+import asyncio
+import logging
+import json
+import os
+
+logger = logging.getLogger(__name__)
+
+
+def _params(data) -> dict:
+    return data.model_dump() if hasattr(data, "model_dump") else data.dict()
+
+
+async def journaled(checkpoint: Checkpoint, events: AsyncIterator[dict], job: Job) -> AsyncGenerator[dict, None]:
+    """Pass events through and settle the journal entry once the job ends."""
+    status = None
+    try:
+        async for event in events:
+            if event.get("status") in ("success", "error", "cancelled"):
+                status = event["status"]
+            yield event
+    finally:
+        if status == "success":
+            checkpoint.complete()
+        elif status == "error":
+            checkpoint.close(FAILED)
+        elif status == "cancelled" or job.cancel_event.is_set():
+            checkpoint.close(CANCELLED)
+        # Any other exit leaves the entry running so it resumes on restart
+
+
+async def run_embed(data: EmbeddingRequest, job: Job) -> AsyncGenerator[dict, None]:
+    stat = os.stat(data.file_path) if os.path.exists(data.file_path) else None
+    job_key = ingest_journal.make_key(
+        "embed", sanitize_collection_name(str(data.collection_name)), data.file_path,
+        stat.st_size if stat else None, stat.st_mtime if stat else None)
+    checkpoint = ingest_journal.open(
+        "embed", job_key, _params(data), sanitize_collection_name(str(data.collection_name)))
+    async for result in journaled(checkpoint, embed(data, job.cancel_event, checkpoint), job):
+        yield result
+
+
+async def run_sync(data: SyncCollectionRequest, job: Job) -> AsyncGenerator[dict, None]:
+    async for result in sync_collection(data, job.cancel_event):
+        yield result
+
+
+async def run_webcrawl(data: WebCrawlRequest, job: Job) -> AsyncGenerator[dict, None]:
+    collection_name = sanitize_collection_name(str(data.collection_name))
+    job_key = ingest_journal.make_key("webcrawl", collection_name, data.base_url)
+    checkpoint = ingest_journal.open("webcrawl", job_key, _params(data), collection_name)
+
+    async def events():
+        async for result in iterate_in_thread(webcrawl(data, job.cancel_event, checkpoint)):
+            # webcrawl yields ready-made "data: {...}" lines
+            yield json.loads(result[len("data: "):])
+
+    async for event in journaled(checkpoint, events(), job):
+        yield event
+
+
+async def run_youtube(data: YoutubeTranscriptRequest, job: Job) -> AsyncGenerator[dict, None]:
+    async for result in iterate_in_thread(youtube_transcript(data, job.cancel_event)):
+        yield result
+
+
+async def run_compact(data: CompactCollectionRequest, job: Job) -> AsyncGenerator[dict, None]:
+    collection_name = sanitize_collection_name(str(data.collection_name))
+    async for result in iterate_in_thread(compact_collection(collection_name, job.cancel_event)):
+        yield result
+
+
+async def run_reembed(data: ReembedCollectionRequest, job: Job) -> AsyncGenerator[dict, None]:
+    collection_name = sanitize_collection_name(str(data.collection_name))
+    async for result in iterate_in_thread(reembed_collection(
+            collection_name, data.local_embedding_model, data.embedding_backend, job.cancel_event)):
+        yield result
+
+
+async def run_export(data: ExportCollectionRequest, job: Job) -> AsyncGenerator[dict, None]:
+    collection_name = sanitize_collection_name(str(data.collection_name))
+    embedding_model = data.local_embedding_model if data.is_local else None
+    async for result in iterate_in_thread(export_collection(
+            collection_name, data.file_path, data.dtype or "float16", embedding_model, job.cancel_event)):
+        yield result
+
+
+async def run_import(data: ImportCollectionRequest, job: Job) -> AsyncGenerator[dict, None]:
+    collection_name = sanitize_collection_name(str(data.collection_name))
+    async for result in iterate_in_thread(import_collection(
+            data.file_path, collection_name, bool(data.overwrite), data.flat_index is not False, job.cancel_event)):
+        yield result
+
+
+async def bulk_loaded(data, collection_name: str, events: AsyncIterator[dict]) -> AsyncGenerator[dict, None]:
+    """
+    Run a job's events inside a bulk load when the request asked for one. A
+    collection the load created keeps the bulk HNSW parameters, so a
+    compaction is queued to rebuild it with the configured ones.
+    """
+    if not getattr(data, "bulk_load", False):
+        async for event in events:
+            yield event
+        return
+    with bulk_load(collection_name):
+        async for event in events:
+            yield event
+    if await asyncio.get_event_loop().run_in_executor(None, needs_compaction_after_bulk_load, collection_name):
+        job = submit_job("compact", CompactCollectionRequest(collection_name=collection_name))
+        logger.info(f"Queued compaction job {job.id} to apply HNSW settings to bulk-loaded {collection_name}")
+
+
+def format_embed_event(event: dict) -> str:
+    """Format an embed/sync progress dict as the SSE line the frontend expects"""
+    if event["status"] == "progress":
+        progress_data = event["data"]
+        return f"data: {{'type': 'progress', 'chunk': {progress_data['chunk']}, 'totalChunks': {progress_data['total_chunks']}, 'percent_complete': '{progress_data['percent_complete']}', 'est_remaining_time': '{progress_data['est_remaining_time']}'}}\n\n"
+    return f"data: {{'type': '{event['status']}', 'message': '{event['message']}'}}\n\n"
+
+
+def format_crawl_event(event: dict) -> str:
+    if event["status"] == "cancelled":
+        return "data: {'type': 'cancelled', 'message': 'Crawl process cancelled'}\n\n"
+    if "data" not in event:
+        event = {"status": event["status"], "data": {"message": event.get("message")}}
+    return f"data: {json.dumps(event)}\n\n"
+
+
+def format_youtube_event(event: dict) -> str:
+    if event["status"] == "progress":
+        progress_data = event["data"]
+        return f"data: {{'type': 'progress', 'chunk': {progress_data['chunk']}, 'totalChunks': {progress_data['total_chunks']}, 'percent_complete': '{progress_data['percent_complete']}', 'message': '{progress_data['message']}'}}\n\n"
+    return f"data: {{'type': '{event['status']}', 'message': '{event['message']}'}}\n\n"
+
+
+# kind -> (request model, runner, SSE formatter, target collection)
+job_types = {
+    "embed": (EmbeddingRequest, run_embed, format_embed_event,
+              lambda data: sanitize_collection_name(str(data.collection_name))),
+    "sync": (SyncCollectionRequest, run_sync, format_embed_event,
+             lambda data: sanitize_collection_name(str(data.collection_name))),
+    "webcrawl": (WebCrawlRequest, run_webcrawl, format_crawl_event,
+                 lambda data: sanitize_collection_name(str(data.collection_name))),
+    "youtube": (YoutubeTranscriptRequest, run_youtube, format_youtube_event,
+                lambda data: sanitize_collection_name(str(data.collection_name))),
+    "compact": (CompactCollectionRequest, run_compact, format_crawl_event,
+                lambda data: sanitize_collection_name(str(data.collection_name))),
+    "reembed": (ReembedCollectionRequest, run_reembed, format_embed_event,
+                lambda data: sanitize_collection_name(str(data.collection_name))),
+    "export": (ExportCollectionRequest, run_export, format_crawl_event,
+               lambda data: sanitize_collection_name(str(data.collection_name))),
+    "import": (ImportCollectionRequest, run_import, format_crawl_event,
+               lambda data: sanitize_collection_name(str(data.collection_name))),
+}
+
+
+def submit_job(kind: str, data) -> Job:
+    """Queue an ingestion request on the shared scheduler."""
+    _, runner, _, target = job_types[kind]
+    return job_scheduler.submit(
+        kind,
+        target(data),
+        lambda job: bulk_loaded(data, target(data), runner(data, job)),
+        priority=getattr(data, "priority", 0) or 0,
+        description=getattr(data, "file_path", None) or getattr(
+            data, "base_url", None) or getattr(data, "url", None) or getattr(data, "collection_name", None) or "",
+        params=_params(data)
+    )
+
+
+def format_job_event(job: Job, event: dict) -> str:
+    return job_types[job.kind][2](event)
+
+
+def _resume_params(params: dict) -> dict:
+    """The journal never stores API keys; read the user's key again for remote embeddings."""
+    user_id = params.get("user_id", params.get("user"))
+    if not params.get("is_local") and user_id is not None:
+        params = {**params, "api_key": get_llm_api_key(int(user_id), "openai")}
+    return params
+
+
+def resume_interrupted_jobs() -> int:
+    """Requeue journaled jobs that were still running when the server stopped."""
+    resumed = 0
+    for kind, params in ingest_journal.unfinished():
+        if kind not in job_types:
+            continue
+        try:
+            submit_job(kind, job_types[kind][0](**_resume_params(params)))
+            resumed += 1
+        except Exception as e:
+            logger.error(f"Could not resume {kind} job: {str(e)}")
+    if resumed:
+        logger.info(f"Resumed {resumed} interrupted ingestion jobs")
+    return resumed
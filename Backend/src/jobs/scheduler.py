@@ -0,0 +1,209 @@
+from collections import OrderedDict, deque
+from typing import Any, AsyncGenerator, AsyncIterator, Callable, Dict, Iterator, List, Optional
+import threading
+import asyncio
+import logging
+import time
+import uuid
+import os
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_WORKERS = int(os.environ.get("NOTATE_MAX_INGEST_JOBS", "2"))
+MAX_FINISHED_JOBS = 200
+MAX_JOB_EVENTS = 1000
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED_STATES = (COMPLETED, FAILED, CANCELLED)
+
+
+async def iterate_in_thread(iterator: Iterator) -> AsyncGenerator:
+    """Drive a blocking iterator from a worker thread so the event loop stays free."""
+    loop = asyncio.get_event_loop()
+    done = object()
+    while True:
+        item = await loop.run_in_executor(None, next, iterator, done)
+        if item is done:
+            break
+        yield item
+
+
+class Job:
+    """
+    A single ingestion job. The runner is an async generator factory that
+    receives the job (for its cancel_event) and yields progress dicts; every
+    dict is kept in a bounded event log that SSE subscribers replay and follow.
+    """
+
+    def __init__(self, kind: str, collection_name: str, runner: Callable[["Job"], AsyncIterator[dict]],
+                 priority: int = 0, description: str = "", params: Optional[Dict[str, Any]] = None):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.collection_name = collection_name
+        self.runner = runner
+        self.priority = priority
+        self.description = description
+        self.params = params or {}
+        self.status = QUEUED
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.error: Optional[str] = None
+        self.progress: Optional[dict] = None
+        self.cancel_event = threading.Event()
+        self.events: deque = deque(maxlen=MAX_JOB_EVENTS)
+        self.next_seq = 0
+        self._changed = asyncio.Condition()
+
+    @property
+    def done(self) -> bool:
+        return self.status in FINISHED_STATES
+
+    async def publish(self, event: dict) -> None:
+        async with self._changed:
+            self.events.append((self.next_seq, event))
+            self.next_seq += 1
+            if event.get("status") == "progress":
+                self.progress = event.get("data")
+            self._changed.notify_all()
+
+    async def finish(self, status: str, error: Optional[str] = None) -> None:
+        async with self._changed:
+            self.status = status
+            self.error = error
+            self.finished_at = time.time()
+            self._changed.notify_all()
+
+    async def stream(self) -> AsyncGenerator[dict, None]:
+        """Replay buffered events, then follow new ones until the job finishes."""
+        seq = 0
+        while True:
+            async with self._changed:
+                await self._changed.wait_for(lambda: self.next_seq > seq or self.done)
+                pending = [event for s, event in self.events if s >= seq]
+                seq = self.next_seq
+                finished = self.done
+            for event in pending:
+                yield event
+            if finished:
+                return
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "collection_name": self.collection_name,
+            "priority": self.priority,
+            "description": self.description,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "progress": self.progress,
+            "error": self.error,
+        }
+
+
+class JobScheduler:
+    """
+    Runs ingestion jobs on a bounded number of slots. Jobs that write to the
+    same collection run one at a time; jobs for different collections run in
+    parallel. Among runnable jobs the highest priority (then oldest) starts first.
+    """
+
+    def __init__(self, max_workers: int = DEFAULT_MAX_WORKERS):
+        self.max_workers = max(1, max_workers)
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._pending: List[Job] = []
+        self._busy_collections: set = set()
+        self._running = 0
+
+    def submit(self, kind: str, collection_name: str, runner: Callable[[Job], AsyncIterator[dict]],
+               priority: int = 0, description: str = "", params: Optional[Dict[str, Any]] = None) -> Job:
+        """Queue a job. Must be called from the event loop."""
+        job = Job(kind, collection_name, runner, priority, description, params)
+        self._jobs[job.id] = job
+        self._pending.append(job)
+        self._prune()
+        logger.info(f"Queued {kind} job {job.id} for collection {collection_name}")
+        self._dispatch()
+        return job
+
+    def _dispatch(self) -> None:
+        while self._running < self.max_workers:
+            runnable = [job for job in self._pending
+                        if job.collection_name not in self._busy_collections]
+            if not runnable:
+                return
+            job = min(runnable, key=lambda j: (-j.priority, j.created_at))
+            self._pending.remove(job)
+            self._busy_collections.add(job.collection_name)
+            self._running += 1
+            asyncio.ensure_future(self._run(job))
+
+    async def _run(self, job: Job) -> None:
+        job.status = RUNNING
+        job.started_at = time.time()
+        status, error = COMPLETED, None
+        events = job.runner(job)
+        try:
+            async for event in events:
+                await job.publish(event)
+                if event.get("status") == "error":
+                    status, error = FAILED, event.get("message") or str(event.get("data"))
+                elif event.get("status") == "cancelled":
+                    status = CANCELLED
+                    break
+                if job.cancel_event.is_set():
+                    status = CANCELLED
+                    await job.publish({"status": "cancelled", "message": f"{job.kind} job cancelled"})
+                    break
+        except Exception as e:
+            logger.error(f"Job {job.id} failed: {str(e)}")
+            status, error = FAILED, str(e)
+            await job.publish({"status": "error", "message": str(e)})
+        finally:
+            await events.aclose()
+            await job.finish(status, error)
+            self._busy_collections.discard(job.collection_name)
+            self._running -= 1
+            logger.info(f"Job {job.id} finished with status {status}")
+            self._dispatch()
+
+    def cancel(self, job_id: str) -> bool:
+        job = self._jobs.get(job_id)
+        if job is None or job.done:
+            return False
+        job.cancel_event.set()
+        if job in self._pending:
+            self._pending.remove(job)
+            asyncio.ensure_future(self._cancel_queued(job))
+        return True
+
+    async def _cancel_queued(self, job: Job) -> None:
+        await job.publish({"status": "cancelled", "message": f"{job.kind} job cancelled"})
+        await job.finish(CANCELLED)
+
+    def cancel_kind(self, kind: str) -> int:
+        """Cancel every queued or running job of one kind."""
+        return sum(self.cancel(job.id) for job in list(self._jobs.values()) if job.kind == kind)
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def list(self, kind: Optional[str] = None, status: Optional[str] = None) -> List[Dict[str, Any]]:
+        return [job.to_dict() for job in self._jobs.values()
+                if (kind is None or job.kind == kind) and (status is None or job.status == status)]
+
+    def _prune(self) -> None:
+        finished = [job_id for job_id, job in self._jobs.items() if job.done]
+        for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self._jobs[job_id]
+
+
+# Global job scheduler instance
+job_scheduler = JobScheduler()
@@ -0,0 +1,170 @@
+from langchain_chroma import Chroma
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+MAX_CACHED_HANDLES = 64
+
+
+def _create_client(path: str):
+    from chromadb.config import Settings
+    import chromadb
+
+    try:
+        return chromadb.PersistentClient(
+            path=path,
+            settings=Settings(
+                anonymized_telemetry=False,
+                allow_reset=True,
+                is_persistent=True
+            )
+        )
+    except Exception as e:
+        logger.warning(
+            f"Failed to create persistent client: {str(e)}, falling back to in-memory")
+        return chromadb.Client(
+            settings=Settings(
+                anonymized_telemetry=False,
+                allow_reset=True,
+                is_persistent=False
+            )
+        )
+
+
+class SharedLock:
+    """
+    Many holders in shared mode or one in exclusive mode. A waiting
+    exclusive holder blocks new shared ones, so a steady stream of queries
+    can't starve it.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._shared = 0
+        self._exclusive = False
+        self._waiting = 0
+
+    @contextmanager
+    def shared(self):
+        with self._cond:
+            self._cond.wait_for(lambda: not self._exclusive and not self._waiting)
+            self._shared += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._shared -= 1
+                self._cond.notify_all()
+
+    @contextmanager
+    def exclusive(self):
+        with self._cond:
+            self._waiting += 1
+            self._cond.wait_for(lambda: not self._exclusive and not self._shared)
+            self._waiting -= 1
+            self._exclusive = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._exclusive = False
+                self._cond.notify_all()
+
+
+class ChromaClientPool:
+    """
+    Keeps one long-lived Chroma client per store path and caches the
+    LangChain Chroma handles opened on it, so repeated queries reuse the
+    client's in-memory segments instead of re-reading them from disk.
+    """
+
+    def __init__(self, max_handles: int = MAX_CACHED_HANDLES):
+        self.max_handles = max_handles
+        self._clients: Dict[str, Any] = {}
+        self._handles: "OrderedDict[Tuple, Chroma]" = OrderedDict()
+        self._collection_locks: Dict[str, SharedLock] = {}
+        self._lock = threading.RLock()
+
+    def collection_lock(self, collection_name: str) -> SharedLock:
+        """
+        Queries hold a collection's lock shared while they resolve and use a
+        handle; replacing the collection under its name holds it exclusively.
+        """
+        with self._lock:
+            return self._collection_locks.setdefault(collection_name, SharedLock())
+
+    def get_client(self, path: str):
+        with self._lock:
+            client = self._clients.get(path)
+            if client is None:
+                client = _create_client(path)
+                self._clients[path] = client
+                logger.info(f"Opened Chroma client for {path}")
+            return client
+
+    def get_vectorstore(self, path: str, collection_name: str, embeddings, embeddings_key: Any,
+                        collection_metadata: Optional[Dict[str, Any]] = None) -> Chroma:
+        """
+        Return a cached Chroma handle for the collection, opening it on first use.
+        collection_metadata only applies when the collection is created.
+        """
+        key = (path, collection_name, embeddings_key)
+        with self._lock:
+            handle = self._handles.get(key)
+            if handle is not None:
+                self._handles.move_to_end(key)
+                return handle
+
+            handle = Chroma(
+                client=self.get_client(path),
+                embedding_function=embeddings,
+                collection_name=collection_name,
+                collection_metadata=collection_metadata,
+            )
+            self._handles[key] = handle
+            while len(self._handles) > self.max_handles:
+                self._handles.popitem(last=False)
+            return handle
+
+    def invalidate(self, collection_name: Optional[str] = None, path: Optional[str] = None) -> None:
+        """Forget cached handles for a collection (or every collection when no name is given)."""
+        with self._lock:
+            for key in list(self._handles):
+                if (path is None or key[0] == path) and (collection_name is None or key[1] == collection_name):
+                    del self._handles[key]
+
+    def invalidate_embeddings(self, embeddings_key: Any) -> None:
+        """Forget handles built on an embedding function, so the model can be freed."""
+        with self._lock:
+            for key in list(self._handles):
+                if key[2] == embeddings_key:
+                    del self._handles[key]
+
+    def preload(self, path: str, collection_names: Iterable[str]) -> List[str]:
+        """
+        Open the named collections and run one nearest-neighbour lookup on each
+        so their vector segments are resident before the first user query.
+        """
+        client = self.get_client(path)
+        loaded = []
+        for name in collection_names:
+            try:
+                collection = client.get_collection(name)
+                sample = collection.get(limit=1, include=["embeddings"])
+                embeddings = sample.get("embeddings")
+                if embeddings is not None and len(embeddings) > 0:
+                    collection.query(
+                        query_embeddings=[list(embeddings[0])], n_results=1, include=[])
+                loaded.append(name)
+                logger.info(f"Preloaded collection: {name}")
+            except Exception as e:
+                logger.warning(f"Could not preload collection {name}: {str(e)}")
+        return loaded
+
+
+# Global Chroma client pool instance
+chroma_pool = ChromaClientPool()
@@ -0,0 +1,65 @@
+from src.vectorstorage.vectorstore import get_app_data_dir
+from typing import Any, Dict
+import threading
+import sqlite3
+import json
+import time
+import os
+
+settings_db_path = os.path.join(get_app_data_dir(), "collection_settings.sqlite")
+
+
+class CollectionSettings:
+    """
+    Per-collection options (e.g. the embedding backend) that must stay the
+    same for ingestion and queries, stored as JSON next to the Chroma store.
+    """
+
+    def __init__(self, db_path: str = settings_db_path):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._cache: Dict[str, Dict[str, Any]] = {}
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS settings (
+                    collection TEXT PRIMARY KEY,
+                    settings TEXT NOT NULL,
+                    updated_at REAL NOT NULL
+                ) WITHOUT ROWID
+            """)
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def get(self, collection_name: str) -> Dict[str, Any]:
+        with self._lock:
+            if collection_name not in self._cache:
+                with self._connect() as conn:
+                    row = conn.execute("SELECT settings FROM settings WHERE collection = ?",
+                                       (collection_name,)).fetchone()
+                self._cache[collection_name] = json.loads(row[0]) if row else {}
+            return dict(self._cache[collection_name])
+
+    def update(self, collection_name: str, **values: Any) -> Dict[str, Any]:
+        """Merge values into a collection's settings; None keeps a key, "" clears it."""
+        settings = self.get(collection_name)
+        for name, value in values.items():
+            if value == "":
+                settings.pop(name, None)
+            elif value is not None:
+                settings[name] = value
+        with self._lock, self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO settings VALUES (?, ?, ?)",
+                         (collection_name, json.dumps(settings), time.time()))
+            self._cache[collection_name] = settings
+        return dict(settings)
+
+    def remove(self, collection_name: str) -> None:
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM settings WHERE collection = ?",
+                         (collection_name,))
+            self._cache.pop(collection_name, None)
+
+
+# Global collection settings instance
+collection_settings = CollectionSettings()
@@ -0,0 +1,137 @@
+from src.vectorstorage.chroma_pool import chroma_pool
+from src.vectorstorage.vectorstore import chroma_db_path
+from src.vectorstorage.collection_settings import collection_settings
+from src.vectorstorage.flat_index import flat_index_store
+from src.vectorstorage.lexical_index import lexical_index_store
+from src.vectorstorage.hnsw_settings import active_hnsw, keeps_bulk_load_params
+from src.vectorstorage.query_cache import query_cache
+from collections import Counter
+from typing import Any, Dict, Optional, Tuple
+import threading
+import logging
+import sqlite3
+import time
+import os
+
+logger = logging.getLogger(__name__)
+
+STATS_PAGE_SIZE = 5000
+MAX_SOURCES = 50
+# Python-side id <-> label maps Chroma keeps for each HNSW element
+HNSW_ID_MAP_BYTES = 200
+
+
+def directory_bytes(path: Optional[str]) -> int:
+    total = 0
+    for root, _, files in os.walk(path or ""):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+def vector_segment_dir(collection, db_path: str = chroma_db_path) -> Optional[str]:
+    """Directory of the collection's HNSW segment, read from Chroma's catalog."""
+    try:
+        conn = sqlite3.connect(f"file:{os.path.join(db_path, 'chroma.sqlite3')}?mode=ro", uri=True)
+        try:
+            row = conn.execute("SELECT id FROM segments WHERE collection = ? AND scope = 'VECTOR'",
+                               (str(collection.id),)).fetchone()
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        logger.warning(f"Could not read Chroma segments: {str(e)}")
+        return None
+    return os.path.join(db_path, row[0]) if row else None
+
+
+def estimate_hnsw_bytes(count: int, dimension: int, M: int = 16) -> int:
+    """
+    hnswlib keeps, per element, the float vector, 2M level-0 links, a link
+    count and a label; about 1/M of elements also carry M upper-level links.
+    """
+    level0 = 4 * dimension + 4 * 2 * M + 4 + 8
+    upper = (4 * M + 4) / max(M - 1, 1)
+    return int(count * (level0 + upper + HNSW_ID_MAP_BYTES))
+
+
+class CollectionStats:
+    """
+    Size and storage introspection for collections, computed from Chroma's
+    metadata and files without loading an embedding model. Results are
+    cached per collection and recomputed after the next write.
+    """
+
+    def __init__(self, db_path: str = chroma_db_path):
+        self.db_path = db_path
+        self._cache: Dict[str, Tuple[int, Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, collection_name: str, refresh: bool = False) -> Dict[str, Any]:
+        generation = query_cache.generation(collection_name)
+        with self._lock:
+            cached = self._cache.get(collection_name)
+        if cached and cached[0] == generation and not refresh:
+            return cached[1]
+        stats = self.compute(collection_name)
+        with self._lock:
+            self._cache[collection_name] = (generation, stats)
+        return stats
+
+    def compute(self, collection_name: str) -> Dict[str, Any]:
+        began = time.perf_counter()
+        collection = chroma_pool.get_client(self.db_path).get_collection(collection_name)
+        count = collection.count()
+        sample = collection.get(limit=1, include=["embeddings"])["embeddings"]
+        dimension = len(sample[0]) if sample is not None and len(sample) else 0
+
+        sources: Counter = Counter()
+        for offset in range(0, count, STATS_PAGE_SIZE):
+            page = collection.get(include=["metadatas"], limit=STATS_PAGE_SIZE, offset=offset)
+            if not page["ids"]:
+                break
+            sources.update(str((metadata or {}).get("source", "")) for metadata in page["metadatas"])
+
+        hnsw = active_hnsw(collection)
+        segment_dir = vector_segment_dir(collection, self.db_path)
+        sqlite_path = os.path.join(self.db_path, "chroma.sqlite3")
+        flat = flat_index_store.stats(collection_name)
+        lexical = lexical_index_store.stats(collection_name)
+        settings = collection_settings.get(collection_name)
+        return {
+            "collection_name": collection_name,
+            "chunks": count,
+            "dimension": dimension,
+            "embedding_backend": settings.get("embedding_backend"),
+            "vector_engine": settings.get("vector_engine"),
+            "quantization": settings.get("quantization"),
+            "hnsw": hnsw,
+            # True until the collection is compacted with the configured HNSW parameters
+            "hnsw_bulk_load_params": keeps_bulk_load_params(collection, collection_name),
+            "disk_bytes": {
+                # Chroma keeps every collection's documents and metadata in one SQLite file
+                "chroma_sqlite_shared": sum(os.path.getsize(sqlite_path + suffix) for suffix in ("", "-wal")
+                                            if os.path.exists(sqlite_path + suffix)),
+                "hnsw_segment": directory_bytes(segment_dir) if segment_dir else None,
+                "flat_index": flat["disk_bytes"] if flat else None,
+                "lexical_index": lexical["bytes"] if lexical else None,
+            },
+            "memory_bytes": {
+                "hnsw_estimate": estimate_hnsw_bytes(count, dimension, int(hnsw.get("M", 16))),
+                "flat_index_resident": flat["resident_bytes"] if flat else None,
+            },
+            "source_count": len(sources),
+            "sources": [{"source": source, "chunks": chunks} for source, chunks in sources.most_common(MAX_SOURCES)],
+            "computed_at": time.time(),
+            "compute_ms": round((time.perf_counter() - began) * 1000, 1),
+        }
+
+    def invalidate(self, collection_name: str) -> None:
+        with self._lock:
+            self._cache.pop(collection_name, None)
+
+
+# Global collection stats instance
+collection_stats = CollectionStats()
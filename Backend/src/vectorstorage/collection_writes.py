@@ -0,0 +1,86 @@
+from src.vectorstorage.flat_index import flat_index_store
+from src.vectorstorage.lexical_index import lexical_index_store
+from src.vectorstorage.query_cache import query_cache
+from langchain_core.documents import Document
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Collections being bulk loaded, with how many jobs are loading each
+_bulk_loads: Dict[str, int] = {}
+_bulk_lock = threading.Lock()
+
+
+def is_bulk_loading(collection_name: str) -> bool:
+    with _bulk_lock:
+        return collection_name in _bulk_loads
+
+
+@contextmanager
+def bulk_load(collection_name: str) -> Iterator[None]:
+    """
+    Defer derived-index maintenance while a large ingest writes to a
+    collection. The flat and lexical indexes are rebuilt once, in the
+    background after the next query, instead of being updated after every batch.
+    """
+    with _bulk_lock:
+        _bulk_loads[collection_name] = _bulk_loads.get(collection_name, 0) + 1
+    try:
+        yield
+    finally:
+        with _bulk_lock:
+            _bulk_loads[collection_name] -= 1
+            if not _bulk_loads[collection_name]:
+                del _bulk_loads[collection_name]
+        query_cache.bump(collection_name)
+        flat_index_store.mark_stale(collection_name)
+        lexical_index_store.drop(collection_name)
+
+
+def record_upsert(collection_name: str, documents: List[Document], ids: Sequence[str],
+                  vectors: Optional[Sequence[Sequence[float]]] = None) -> None:
+    """
+    Tell the derived indexes about chunks just written to Chroma. Without the
+    vectors (e.g. after add_documents) the flat index is rebuilt after its next query.
+    """
+    query_cache.bump(collection_name)
+    if is_bulk_loading(collection_name):
+        return
+    try:
+        if vectors is None:
+            flat_index_store.mark_stale(collection_name)
+        else:
+            flat_index_store.add(collection_name, ids, vectors)
+    except Exception as e:
+        logger.warning(f"Marking flat index for {collection_name} stale: {str(e)}")
+        flat_index_store.mark_stale(collection_name)
+    try:
+        lexical_index_store.add(collection_name, ids, [d.page_content for d in documents])
+    except Exception as e:
+        # A count mismatch makes the next lexical query queue a rebuild
+        logger.warning(f"Error updating lexical index for {collection_name}: {str(e)}")
+
+
+def record_delete(collection_name: str, ids: Sequence[str]) -> None:
+    query_cache.bump(collection_name)
+    if is_bulk_loading(collection_name):
+        return
+    try:
+        flat_index_store.delete(collection_name, ids)
+    except Exception as e:
+        logger.warning(f"Marking flat index for {collection_name} stale: {str(e)}")
+        flat_index_store.mark_stale(collection_name)
+    try:
+        lexical_index_store.delete(collection_name, ids)
+    except Exception as e:
+        logger.warning(f"Error updating lexical index for {collection_name}: {str(e)}")
+
+
+def record_drop(collection_name: str) -> None:
+    """Forget everything derived from a deleted collection."""
+    query_cache.bump(collection_name)
+    flat_index_store.drop(collection_name)
+    lexical_index_store.drop(collection_name)
@@ -0,0 +1,147 @@
+from langchain_core.embeddings import Embeddings
+from typing import Any, Dict, List, Optional
+import numpy as np
+import threading
+import hashlib
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_SIZE_MB = int(os.environ.get(
+    "NOTATE_EMBEDDING_CACHE_MB", "1024"))
+
+
+def get_model_id(embeddings) -> str:
+    """
+    Stable identifier for an embedding function: the model name, backend and
+    encode settings (e.g. normalization) that change the produced vectors.
+    The device is left out, so CPU and GPU loads of a model share entries.
+    """
+    while isinstance(embeddings, CachedEmbeddings):
+        embeddings = embeddings.embeddings
+    key = getattr(embeddings, "key", None)
+    if key is not None:
+        # Registry keys are (model name, device, encode kwargs[, backend])
+        encode_kwargs = key[2] if len(key) > 2 else ()
+        backend = key[3] if len(key) > 3 else "torch"
+        return repr((key[0], backend, encode_kwargs))
+    model = getattr(embeddings, "model", None) or getattr(
+        embeddings, "model_name", None)
+    dimensions = getattr(embeddings, "dimensions", None)
+    return f"{type(embeddings).__name__}:{model}:{dimensions}"
+
+
+class EmbeddingCache:
+    """
+    Disk-backed, content-addressed store of chunk vectors.
+    Entries are keyed by sha256(model id, text) and stored as raw float32
+    bytes in a size-capped diskcache with least-recently-used eviction.
+    """
+
+    def __init__(self, directory: str, size_limit_mb: int = DEFAULT_CACHE_SIZE_MB):
+        self.directory = directory
+        self.size_limit_bytes = size_limit_mb * 1024 * 1024
+        self._cache = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def cache(self):
+        # Opened lazily so importing the module doesn't touch the disk
+        if self._cache is None:
+            with self._lock:
+                if self._cache is None:
+                    import diskcache
+                    os.makedirs(self.directory, exist_ok=True)
+                    self._cache = diskcache.Cache(
+                        self.directory,
+                        size_limit=self.size_limit_bytes,
+                        eviction_policy="least-recently-used",
+                    )
+        return self._cache
+
+    @staticmethod
+    def make_key(model_id: str, text: str) -> str:
+        digest = hashlib.sha256()
+        digest.update(model_id.encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(text.encode("utf-8"))
+        return digest.hexdigest()
+
+    def get_many(self, model_id: str, texts: List[str]) -> List[Optional[List[float]]]:
+        found = []
+        hits = 0
+        for text in texts:
+            raw = self.cache.get(self.make_key(model_id, text))
+            if raw is None:
+                found.append(None)
+            else:
+                found.append(np.frombuffer(raw, dtype=np.float32).tolist())
+                hits += 1
+        with self._lock:
+            self.hits += hits
+            self.misses += len(texts) - hits
+        return found
+
+    def set_many(self, model_id: str, texts: List[str], vectors: List[List[float]]) -> None:
+        for text, vector in zip(texts, vectors):
+            self.cache.set(self.make_key(model_id, text),
+                           np.asarray(vector, dtype=np.float32).tobytes())
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        stats = {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0,
+            "size_limit_mb": self.size_limit_bytes // (1024 * 1024),
+        }
+        if self._cache is not None:
+            stats["entries"] = len(self._cache)
+            stats["size_mb"] = round(self._cache.volume() / (1024 * 1024), 2)
+        return stats
+
+    def clear(self) -> None:
+        self.cache.clear()
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper that only sends uncached document texts to the model."""
+
+    def __init__(self, embeddings, cache: EmbeddingCache):
+        self.embeddings = embeddings
+        self.cache = cache
+        self.model_id = get_model_id(embeddings)
+
+    @property
+    def key(self):
+        return getattr(self.embeddings, "key", None)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        try:
+            vectors = self.cache.get_many(self.model_id, texts)
+        except Exception as e:
+            logger.warning(f"Embedding cache lookup failed: {str(e)}")
+            return self.embeddings.embed_documents(texts)
+
+        missing = [i for i, v in enumerate(vectors) if v is None]
+        if missing:
+            # Encode each distinct missing text once
+            unique = list(dict.fromkeys(texts[i] for i in missing))
+            encoded = dict(zip(unique, self.embeddings.embed_documents(unique)))
+            for i in missing:
+                vectors[i] = encoded[texts[i]]
+            try:
+                self.cache.set_many(self.model_id, unique,
+                                    [encoded[t] for t in unique])
+            except Exception as e:
+                logger.warning(f"Embedding cache write failed: {str(e)}")
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embeddings.embed_query(text)
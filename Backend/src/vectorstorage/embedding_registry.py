@@ -0,0 +1,309 @@
+from src.vectorstorage.init_store import get_models_dir
+from langchain_core.embeddings import Embeddings
+from langchain_huggingface import HuggingFaceEmbeddings
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import threading
+import logging
+import gc
+import os
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LOCAL_EMBEDDING_MODEL = "HIT-TMG/KaLM-embedding-multilingual-mini-instruct-v1.5"
+DEFAULT_RAM_BUDGET_MB = int(os.environ.get(
+    "NOTATE_EMBEDDING_RAM_BUDGET_MB", "4096"))
+
+# "torch" runs sentence-transformers; the onnx backends run an exported copy on CPU
+EMBEDDING_BACKENDS = ("torch", "onnx", "onnx-int8")
+DEFAULT_EMBEDDING_BACKEND = os.environ.get(
+    "NOTATE_EMBEDDING_BACKEND", "torch")
+
+DEFAULT_RERANK_MODEL = os.environ.get(
+    "NOTATE_RERANK_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+RERANK_BATCH_SIZE = int(os.environ.get("NOTATE_RERANK_BATCH_SIZE", "128"))
+
+_device = None
+_device_lock = threading.Lock()
+
+
+def get_embedding_device() -> str:
+    """Probe CUDA/MPS once per process and remember the answer."""
+    global _device
+    with _device_lock:
+        if _device is None:
+            import torch
+            if torch.cuda.is_available():
+                _device = "cuda"
+            elif hasattr(torch.backends, 'mps') and torch.backends.mps.is_available():
+                _device = "mps"
+            else:
+                _device = "cpu"
+            logger.info(f"Using embedding device: {_device}")
+        return _device
+
+
+class SharedEmbeddings(Embeddings):
+    """
+    Thin Embeddings wrapper around a registry-owned model.
+    Encode calls on the same model are serialized so concurrent requests
+    don't interleave forward passes on one device.
+    """
+
+    def __init__(self, key: Tuple, model: Any, size_bytes: int):
+        self.key = key
+        self.model = model
+        self.size_bytes = size_bytes
+        self.lock = threading.Lock()
+
+    @property
+    def model_name(self) -> str:
+        return self.key[0]
+
+    @property
+    def backend(self) -> str:
+        return self.key[3] if len(self.key) > 3 else "torch"
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        with self.lock:
+            return self.model.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        with self.lock:
+            return self.model.embed_query(text)
+
+
+class SharedReranker:
+    """
+    Registry-owned cross-encoder. Scores (query, passage) pairs in a single
+    batched forward pass; calls are serialized like SharedEmbeddings.
+    """
+
+    def __init__(self, key: Tuple, model: Any, size_bytes: int):
+        self.key = key
+        self.model = model
+        self.size_bytes = size_bytes
+        self.lock = threading.Lock()
+
+    @property
+    def model_name(self) -> str:
+        return self.key[0]
+
+    @property
+    def backend(self) -> str:
+        return "cross-encoder"
+
+    def score(self, query: str, passages: List[str]) -> List[float]:
+        if not passages:
+            return []
+        with self.lock:
+            scores = self.model.predict([(query, passage) for passage in passages],
+                                        batch_size=min(len(passages), RERANK_BATCH_SIZE),
+                                        show_progress_bar=False)
+        return [float(score) for score in scores]
+
+
+class EmbeddingRegistry:
+    """
+    Process-wide cache of local embedding models.
+    Models are keyed by (model name, device, encode kwargs[, backend]), loaded
+    once and evicted least-recently-used when the RAM budget is exceeded.
+    Re-ranking cross-encoders share the same cache and budget.
+    """
+
+    def __init__(self, ram_budget_mb: int = DEFAULT_RAM_BUDGET_MB):
+        self.ram_budget_bytes = ram_budget_mb * 1024 * 1024
+        self._models: "OrderedDict[Tuple, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._loading: Dict[Tuple, threading.Lock] = {}
+        # Keys whose device failed to load, mapped to the CPU fallback key
+        self._fallbacks: Dict[Tuple, Tuple] = {}
+        self._evict_listeners: List[Callable[[Tuple], None]] = []
+
+    def on_evict(self, listener: Callable[[Tuple], None]) -> None:
+        """
+        Call listener(key) when a model leaves the cache, so holders of the
+        instance (e.g. cached vectorstore handles) can let it be freed.
+        """
+        self._evict_listeners.append(listener)
+
+    @staticmethod
+    def make_key(model_name: str, device: str, encode_kwargs: Dict[str, Any], backend: str = "torch") -> Tuple:
+        key = (model_name, device, tuple(sorted(encode_kwargs.items())))
+        # Torch keys keep their original three-part shape
+        return key if backend == "torch" else key + (backend,)
+
+    def get(self, model_name: Optional[str] = None, device: Optional[str] = None, encode_kwargs: Optional[Dict[str, Any]] = None,
+            backend: Optional[str] = None) -> SharedEmbeddings:
+        """Return a shared embeddings instance, loading the model on first use."""
+        model_name = model_name or DEFAULT_LOCAL_EMBEDDING_MODEL
+        backend = backend or DEFAULT_EMBEDDING_BACKEND
+        if backend not in EMBEDDING_BACKENDS:
+            raise ValueError(f"Unknown embedding backend: {backend}")
+        if backend != "torch":
+            device = "cpu"
+        device = device or get_embedding_device()
+        if encode_kwargs is None:
+            encode_kwargs = {
+                "device": device,
+                "normalize_embeddings": True,
+                "max_seq_length": 512
+            }
+        key = self.make_key(model_name, device, encode_kwargs, backend)
+        return self._get_or_load(key, lambda: self._load(key, model_name, device, encode_kwargs, backend))
+
+    def get_reranker(self, model_name: Optional[str] = None, device: Optional[str] = None) -> SharedReranker:
+        """Return a shared cross-encoder, loading it on first use."""
+        model_name = model_name or DEFAULT_RERANK_MODEL
+        device = device or get_embedding_device()
+        key = self.make_key(model_name, device, {}, "cross-encoder")
+        return self._get_or_load(key, lambda: self._load_reranker(key, model_name, device))
+
+    def _get_or_load(self, key: Tuple, load: Callable[[], Any]) -> Any:
+        with self._lock:
+            key = self._fallbacks.get(key, key)
+            if key in self._models:
+                self._models.move_to_end(key)
+                return self._models[key]
+            load_lock = self._loading.setdefault(key, threading.Lock())
+
+        # Load outside the registry lock so other models stay available
+        with load_lock:
+            with self._lock:
+                if key in self._models:
+                    self._models.move_to_end(key)
+                    return self._models[key]
+            try:
+                entry = load()
+            finally:
+                with self._lock:
+                    self._loading.pop(key, None)
+
+        with self._lock:
+            if entry.key != key:
+                self._fallbacks[key] = entry.key
+                return entry
+            self._models[key] = entry
+            self._models.move_to_end(key)
+            evicted = self._evict()
+        self._release(evicted)
+        return entry
+
+    def _load(self, key: Tuple, model_name: str, device: str, encode_kwargs: Dict[str, Any], backend: str = "torch") -> SharedEmbeddings:
+        if backend != "torch":
+            return self._load_onnx(key, model_name, encode_kwargs, backend)
+        models_dir = get_models_dir()
+        logger.info(
+            f"Loading embedding model {model_name} on {device} from {models_dir}")
+        try:
+            model = HuggingFaceEmbeddings(
+                model_name=model_name,
+                model_kwargs={"device": device},
+                encode_kwargs=encode_kwargs,
+                cache_folder=models_dir
+            )
+        except Exception as e:
+            logger.error(
+                f"Error initializing embeddings with {device}: {str(e)}")
+            if device == "cpu":
+                raise
+            logger.info("Falling back to CPU")
+            cpu_kwargs = {**encode_kwargs, "device": "cpu"}
+            return self.get(model_name, "cpu", cpu_kwargs)
+        return SharedEmbeddings(key, model, self._model_size(model))
+
+    def _load_reranker(self, key: Tuple, model_name: str, device: str) -> SharedReranker:
+        from sentence_transformers import CrossEncoder
+        logger.info(f"Loading re-ranking model {model_name} on {device}")
+        try:
+            model = CrossEncoder(model_name, device=device, max_length=512,
+                                 cache_dir=get_models_dir())
+        except Exception as e:
+            logger.error(
+                f"Error initializing re-ranker with {device}: {str(e)}")
+            if device == "cpu":
+                raise
+            logger.info("Falling back to CPU")
+            return self.get_reranker(model_name, "cpu")
+        return SharedReranker(key, model, self._model_size(model.model))
+
+    def _load_onnx(self, key: Tuple, model_name: str, encode_kwargs: Dict[str, Any], backend: str) -> SharedEmbeddings:
+        from src.vectorstorage.onnx_embeddings import OnnxEmbeddings
+        try:
+            model = OnnxEmbeddings(
+                model_name,
+                quantize=backend == "onnx-int8",
+                max_seq_length=encode_kwargs.get("max_seq_length"),
+                normalize_embeddings=encode_kwargs.get(
+                    "normalize_embeddings", True)
+            )
+        except Exception as e:
+            logger.error(
+                f"Error initializing {backend} embeddings for {model_name}: {str(e)}")
+            logger.info("Falling back to the torch backend on CPU")
+            return self.get(model_name, "cpu", {**encode_kwargs, "device": "cpu"}, "torch")
+        return SharedEmbeddings(key, model, model.size_bytes)
+
+    @staticmethod
+    def _model_size(model: Any) -> int:
+        client = getattr(model, "_client", None) or getattr(
+            model, "client", None)
+        try:
+            return sum(p.numel() * p.element_size() for p in client.parameters())
+        except Exception:
+            return 0
+
+    def _evict(self) -> List[Tuple]:
+        """Drop least-recently-used models until under budget. Caller holds the lock."""
+        total = sum(entry.size_bytes for entry in self._models.values())
+        evicted = []
+        while total > self.ram_budget_bytes and len(self._models) > 1:
+            key, entry = self._models.popitem(last=False)
+            total -= entry.size_bytes
+            logger.info(
+                f"Evicting embedding model {key[0]} ({entry.size_bytes / (1024*1024):.0f}MB)")
+            evicted.append(key)
+        return evicted
+
+    def _release(self, keys: List[Tuple]) -> None:
+        """Tell listeners about evicted models, then free their memory. Called without the lock."""
+        if not keys:
+            return
+        for key in keys:
+            for listener in self._evict_listeners:
+                try:
+                    listener(key)
+                except Exception as e:
+                    logger.warning(f"Evict listener failed for {key[0]}: {str(e)}")
+        gc.collect()
+        try:
+            import torch
+            if torch.cuda.is_available():
+                torch.cuda.empty_cache()
+        except Exception:
+            pass
+
+    def clear(self) -> None:
+        with self._lock:
+            keys = list(self._models)
+            self._models.clear()
+        self._release(keys)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "ram_budget_mb": self.ram_budget_bytes // (1024 * 1024),
+                "models": [
+                    {
+                        "model_name": key[0],
+                        "device": key[1],
+                        "backend": entry.backend,
+                        "size_mb": round(entry.size_bytes / (1024 * 1024), 1)
+                    }
+                    for key, entry in self._models.items()
+                ]
+            }
+
+
+# Global embedding registry instance
+embedding_registry = EmbeddingRegistry()
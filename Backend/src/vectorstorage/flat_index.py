@@ -0,0 +1,498 @@
+from src.vectorstorage.vectorstore import get_app_data_dir
+from src.vectorstorage.quantization import approximate_scores, candidate_count, codes_nbytes, encode, recall_at_k
+from src.vectorstorage.index_rebuilds import RebuildQueue
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+import threading
+import logging
+import shutil
+import json
+import time
+import os
+
+logger = logging.getLogger(__name__)
+
+flat_index_dir = os.path.join(get_app_data_dir(), "flat_index")
+
+# Above this many vectors a collection is searched through Chroma's HNSW index
+DEFAULT_MAX_VECTORS = int(os.environ.get("NOTATE_FLAT_INDEX_MAX_VECTORS", "100000"))
+DEFAULT_DTYPE = os.environ.get("NOTATE_FLAT_INDEX_DTYPE", "float32")
+SEARCH_BLOCK_ROWS = 16384
+REBUILD_PAGE_SIZE = 5000
+MANIFEST_FILE = "manifest.json"
+
+
+def normalize(vectors) -> np.ndarray:
+    matrix = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    return matrix / np.clip(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12, None)
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores, best first, using argpartition."""
+    if k <= 0 or len(scores) == 0:
+        return np.empty(0, dtype=np.int64)
+    if k < len(scores):
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(len(scores))
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+class FlatIndex:
+    """
+    Exact cosine search over one collection's normalized vectors.
+    Vectors live in append-only memory-mapped .npy segments; upserts append a
+    segment and hide the ids' older rows, deletes only hide rows. Small
+    trailing segments are merged as they accumulate and the whole index is
+    compacted when too many rows are dead. With quantization on, compact
+    codes are kept in RAM and the float rows are only read to rescore.
+    """
+
+    def __init__(self, directory: str, dtype: str = DEFAULT_DTYPE, quantization: str = "none"):
+        self.directory = directory
+        self.dtype = np.dtype(dtype)
+        self.quantization = quantization
+        self.dimension: Optional[int] = None
+        self.stale = True
+        # Bumped by every write, so a rebuild can tell it copied a moving collection
+        self.writes = 0
+        self._lock = threading.RLock()
+        self._segments: List[str] = []
+        self._next_segment = 0
+        self._matrices: List[np.ndarray] = []
+        self._ids: List[np.ndarray] = []
+        self._alive: List[np.ndarray] = []
+        self._codes: List[Optional[Dict[str, np.ndarray]]] = []
+        self._location: Dict[str, Tuple[int, int]] = {}
+        # Deleted ids whose rows still sit in a segment file
+        self._deleted: set = set()
+        self._load()
+
+    @property
+    def count(self) -> int:
+        return len(self._location)
+
+    @property
+    def rows(self) -> int:
+        return sum(len(ids) for ids in self._ids)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(matrix.nbytes for matrix in self._matrices)
+
+    @property
+    def codes_nbytes(self) -> int:
+        return sum(codes_nbytes(codes) for codes in self._codes)
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _load(self) -> None:
+        manifest_path = self._path(MANIFEST_FILE)
+        if not os.path.exists(manifest_path):
+            return
+        try:
+            with open(manifest_path) as f:
+                manifest = json.load(f)
+            self.dtype = np.dtype(manifest["dtype"])
+            self.dimension = manifest["dimension"]
+            self._next_segment = manifest["next_segment"]
+            for name in manifest["segments"]:
+                self._open_segment(name)
+            self._deleted = set(manifest.get("deleted", []))
+            for doc_id in self._deleted:
+                self._hide(doc_id)
+            self.stale = manifest.get("stale", False)
+            self._remove_orphans()
+        except Exception as e:
+            logger.warning(f"Discarding unreadable flat index {self.directory}: {str(e)}")
+            self._reset_state()
+
+    def _reset_state(self) -> None:
+        self._segments, self._matrices, self._ids, self._alive, self._codes = [], [], [], [], []
+        self._location = {}
+        self._deleted = set()
+        self.stale = True
+
+    def _open_segment(self, name: str) -> None:
+        matrix = np.load(self._path(f"{name}.npy"), mmap_mode="r")
+        with open(self._path(f"{name}.ids.json")) as f:
+            ids = np.array(json.load(f), dtype=object)
+        segment = len(self._segments)
+        self._segments.append(name)
+        self._matrices.append(matrix)
+        self._ids.append(ids)
+        self._alive.append(np.ones(len(ids), dtype=bool))
+        self._codes.append(self._load_codes(name, matrix))
+        for row, doc_id in enumerate(ids):
+            self._hide(doc_id)
+            self._deleted.discard(doc_id)
+            self._location[doc_id] = (segment, row)
+
+    def _load_codes(self, name: str, matrix: np.ndarray) -> Optional[Dict[str, np.ndarray]]:
+        """Compact codes for a segment, encoded once and kept next to it."""
+        if self.quantization == "none":
+            return None
+        path = self._path(f"{name}.{self.quantization}.npz")
+        if os.path.exists(path):
+            with np.load(path) as stored:
+                return {key: stored[key] for key in stored.files}
+        codes = encode(matrix, self.quantization)
+        tmp_path = self._path(f"{name}.{self.quantization}.tmp.npz")
+        np.savez(tmp_path, **codes)
+        os.replace(tmp_path, path)
+        return codes
+
+    def set_quantization(self, mode: str) -> None:
+        with self._lock:
+            if mode == self.quantization:
+                return
+            self.quantization = mode
+            self._codes = [self._load_codes(name, matrix)
+                           for name, matrix in zip(self._segments, self._matrices)]
+            self._remove_orphans()
+
+    def _hide(self, doc_id: str) -> bool:
+        location = self._location.pop(doc_id, None)
+        if location is None:
+            return False
+        segment, row = location
+        self._alive[segment][row] = False
+        return True
+
+    def _write_segment(self, ids: Sequence[str], matrix: np.ndarray) -> str:
+        name = f"seg-{self._next_segment:06d}"
+        self._next_segment += 1
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = self._path(f"{name}.tmp.npy")
+        np.save(tmp_path, matrix.astype(self.dtype, copy=False))
+        os.replace(tmp_path, self._path(f"{name}.npy"))
+        with open(self._path(f"{name}.ids.json"), "w") as f:
+            json.dump(list(ids), f)
+        return name
+
+    def _save_manifest(self) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = self._path(MANIFEST_FILE + ".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump({
+                "dtype": self.dtype.name,
+                "dimension": self.dimension,
+                "next_segment": self._next_segment,
+                "segments": self._segments,
+                "deleted": sorted(self._deleted),
+                "stale": self.stale,
+            }, f)
+        os.replace(tmp_path, self._path(MANIFEST_FILE))
+
+    def _remove_orphans(self) -> None:
+        if not os.path.isdir(self.directory):
+            # Nothing written yet (e.g. an empty collection's index)
+            return
+        keep = set()
+        for name in self._segments:
+            keep.update({f"{name}.npy", f"{name}.ids.json", f"{name}.{self.quantization}.npz"})
+        for name in os.listdir(self.directory):
+            if name.startswith("seg-") and name not in keep:
+                try:
+                    os.remove(self._path(name))
+                except OSError:
+                    # Still memory-mapped on Windows; removed on a later load
+                    pass
+
+    def reset(self, ids: Sequence[str], matrix: np.ndarray) -> None:
+        """Replace the whole index with the given vectors."""
+        with self._lock:
+            self._reset_state()
+            self.dimension = int(matrix.shape[1]) if len(ids) else self.dimension
+            if len(ids):
+                self._open_segment(self._write_segment(ids, normalize(matrix)))
+            self.stale = False
+            self._save_manifest()
+            self._remove_orphans()
+
+    def add(self, ids: Sequence[str], vectors) -> None:
+        if not len(ids):
+            return
+        matrix = normalize(vectors)
+        with self._lock:
+            self.writes += 1
+            if self.dimension is not None and matrix.shape[1] != self.dimension:
+                # A different embedding model wrote this batch; rebuild from Chroma
+                self.mark_stale()
+                return
+            self.dimension = int(matrix.shape[1])
+            self._open_segment(self._write_segment(ids, matrix))
+            self._maintain()
+            self._save_manifest()
+
+    def delete(self, ids: Sequence[str]) -> None:
+        with self._lock:
+            self.writes += 1
+            hidden = [doc_id for doc_id in ids if self._hide(doc_id)]
+            if hidden:
+                self._deleted.update(hidden)
+                self._maintain()
+                self._save_manifest()
+
+    def mark_stale(self) -> None:
+        with self._lock:
+            self.writes += 1
+            if not self.stale:
+                self.stale = True
+                self._save_manifest()
+
+    def _maintain(self) -> None:
+        """Merge small trailing segments (geometric sizes) and compact dead rows."""
+        if self.rows and self.count < 0.75 * self.rows:
+            self._merge(0)
+            return
+        while len(self._segments) > 1 and len(self._ids[-2]) <= 2 * len(self._ids[-1]):
+            self._merge(len(self._segments) - 2)
+
+    def _merge(self, first: int) -> None:
+        """Rewrite segments[first:] as one segment holding only their live rows."""
+        ids = np.concatenate([ids[alive] for ids, alive in
+                              zip(self._ids[first:], self._alive[first:])])
+        matrix = np.concatenate([np.asarray(matrix[alive]) for matrix, alive in
+                                 zip(self._matrices[first:], self._alive[first:])]) \
+            if len(ids) else np.empty((0, self.dimension or 0), dtype=self.dtype)
+        name = self._write_segment(list(ids), matrix) if len(ids) else None
+        if first == 0:
+            self._deleted = set()
+        for doc_id in list(self._location):
+            if self._location[doc_id][0] >= first:
+                del self._location[doc_id]
+        del self._segments[first:], self._matrices[first:], self._ids[first:], self._alive[first:], \
+            self._codes[first:]
+        if name:
+            self._open_segment(name)
+        self._save_manifest()
+        self._remove_orphans()
+
+    def search(self, query_vector, k: int, exact: bool = False,
+               allowed: Optional[Sequence[str]] = None) -> List[Tuple[str, float]]:
+        """
+        Top-k (id, cosine similarity) pairs, best first. Quantized indexes
+        rank by their codes first and rescore the candidates exactly.
+        allowed restricts the search to those ids (e.g. a metadata filter).
+        """
+        query = normalize(query_vector)[0]
+        with self._lock:
+            mode = "none" if exact else self.quantization
+            segments = [(matrix, ids, alive.copy(), codes) for matrix, ids, alive, codes in
+                        zip(self._matrices, self._ids, self._alive, self._codes)]
+            if allowed is not None:
+                masks = [np.zeros(len(ids), dtype=bool) for _, ids, _, _ in segments]
+                for doc_id in allowed:
+                    location = self._location.get(doc_id)
+                    if location is not None:
+                        masks[location[0]][location[1]] = True
+                for (_, _, alive, _), mask in zip(segments, masks):
+                    alive &= mask
+        best_scores, best_ids = [], []
+        for matrix, ids, alive, codes in segments:
+            live = int(alive.sum())
+            if not live:
+                continue
+            if mode == "none":
+                scores = np.empty(len(ids), dtype=np.float32)
+                for start in range(0, len(ids), SEARCH_BLOCK_ROWS):
+                    block = np.asarray(matrix[start:start + SEARCH_BLOCK_ROWS], dtype=np.float32)
+                    scores[start:start + len(block)] = block @ query
+                scores[~alive] = -np.inf
+                picked = top_k(scores, min(k, live))
+                best_scores.append(scores[picked])
+                best_ids.append(ids[picked])
+            else:
+                approx = approximate_scores(codes, query, mode)
+                approx[~alive] = -np.inf
+                # Sorted row order keeps the memmap reads sequential
+                candidates = np.sort(top_k(approx, min(candidate_count(k, mode), live)))
+                best_scores.append(np.asarray(matrix[candidates], dtype=np.float32) @ query)
+                best_ids.append(ids[candidates])
+        if not best_scores:
+            return []
+        scores, ids = np.concatenate(best_scores), np.concatenate(best_ids)
+        return [(ids[i], float(scores[i])) for i in top_k(scores, k)]
+
+    def evaluate(self, k: int = 10, samples: int = 200, seed: int = 0) -> Dict[str, Any]:
+        """
+        Measure the current quantization against exact float search: recall@k
+        over sampled stored vectors used as queries, memory and latency.
+        """
+        with self._lock:
+            locations = list(self._location.values())
+        rng = np.random.default_rng(seed)
+        picked = rng.choice(len(locations), size=min(samples, len(locations)), replace=False) \
+            if locations else []
+        truth, found = [], []
+        exact_seconds = quantized_seconds = 0.0
+        for i in picked:
+            segment, row = locations[i]
+            query = np.asarray(self._matrices[segment][row], dtype=np.float32)
+            began = time.perf_counter()
+            truth.append([doc_id for doc_id, _ in self.search(query, k, exact=True)])
+            exact_seconds += time.perf_counter() - began
+            began = time.perf_counter()
+            found.append([doc_id for doc_id, _ in self.search(query, k)])
+            quantized_seconds += time.perf_counter() - began
+        queries = max(len(picked), 1)
+        compact_bytes = self.codes_nbytes if self.quantization != "none" else self.nbytes
+        return {
+            "quantization": self.quantization,
+            "vectors": self.count,
+            "k": k,
+            "queries": len(picked),
+            "recall_at_k": round(recall_at_k(truth, found), 4),
+            "float_bytes": self.nbytes,
+            "resident_bytes": compact_bytes,
+            "memory_reduction": round(self.nbytes / compact_bytes, 2) if compact_bytes else None,
+            "float_query_ms": round(exact_seconds / queries * 1000, 3),
+            "query_ms": round(quantized_seconds / queries * 1000, 3),
+        }
+
+
+class FlatIndexStore:
+    """
+    Flat indexes for every collection, opened on first query. They follow
+    Chroma writes through add/delete and are rebuilt from Chroma in the
+    background when they were marked stale or their size no longer matches
+    the collection; until then the collection is searched through HNSW.
+    """
+
+    def __init__(self, directory: str = flat_index_dir, max_vectors: int = DEFAULT_MAX_VECTORS,
+                 dtype: str = DEFAULT_DTYPE):
+        self.directory = directory
+        self.max_vectors = max_vectors
+        self.dtype = dtype
+        self._indexes: Dict[str, FlatIndex] = {}
+        self._lock = threading.Lock()
+        self.rebuilds = RebuildQueue("flat-index-rebuild")
+
+    def _index_dir(self, collection_name: str) -> str:
+        return os.path.join(self.directory, collection_name)
+
+    def get(self, collection_name: str, create: bool = True, quantization: str = "none") -> Optional[FlatIndex]:
+        with self._lock:
+            index = self._indexes.get(collection_name)
+            if index is None:
+                path = self._index_dir(collection_name)
+                if not create and not os.path.exists(path):
+                    return None
+                index = FlatIndex(path, self.dtype, quantization)
+                self._indexes[collection_name] = index
+            return index
+
+    def search(self, collection, query_vector, k: int, max_vectors: Optional[int] = -1,
+               quantization: str = "none", allowed: Optional[Sequence[str]] = None) -> Optional[List[Tuple[str, float]]]:
+        """
+        Top-k for a Chroma collection, or None when it is larger than
+        max_vectors (default: the store's threshold; None means no limit)
+        or its index is being rebuilt.
+        """
+        limit = self.max_vectors if max_vectors == -1 else max_vectors
+        count = collection.count()
+        if limit is not None and count > limit:
+            return None
+        index = self.current(collection, quantization, count)
+        return None if index is None else index.search(query_vector, k, allowed=allowed)
+
+    def current(self, collection, quantization: str = "none", count: Optional[int] = None) -> Optional[FlatIndex]:
+        """The collection's index if it matches Chroma; otherwise a rebuild is queued and None returned."""
+        count = collection.count() if count is None else count
+        index = self.get(collection.name, quantization=quantization)
+        with index._lock:
+            index.set_quantization(quantization)
+            if not index.stale and index.count == count:
+                return index
+        self.schedule_rebuild(collection)
+        return None
+
+    def synced(self, collection, quantization: str = "none") -> FlatIndex:
+        """The collection's index, waiting for a rebuild if it drifted from Chroma."""
+        index = self.current(collection, quantization)
+        if index is None:
+            self.schedule_rebuild(collection).result()
+            index = self.get(collection.name, quantization=quantization)
+        return index
+
+    def schedule_rebuild(self, collection) -> Future:
+        index = self.get(collection.name)
+        return self.rebuilds.submit(collection.name, lambda: self.rebuild(index, collection))
+
+    def rebuild(self, index: FlatIndex, collection, count: Optional[int] = None) -> None:
+        """
+        Copy every vector out of Chroma page by page into a fresh index. The
+        copy runs without the index lock; writes that land meanwhile leave
+        the new index stale, so it is rebuilt again.
+        """
+        writes = index.writes
+        count = collection.count() if count is None else count
+        logger.info(f"Building flat index for {collection.name} ({count} vectors)")
+        ids: List[str] = []
+        matrix: Optional[np.ndarray] = None
+        for offset in range(0, count, REBUILD_PAGE_SIZE):
+            page = collection.get(include=["embeddings"], limit=REBUILD_PAGE_SIZE, offset=offset)
+            vectors = page.get("embeddings")
+            if vectors is None or len(vectors) == 0:
+                break
+            vectors = np.asarray(vectors, dtype=np.float32)
+            if matrix is None:
+                matrix = np.empty((count, vectors.shape[1]), dtype=np.float32)
+            rows = min(len(vectors), count - len(ids))
+            matrix[len(ids):len(ids) + rows] = vectors[:rows]
+            ids.extend(page["ids"][:rows])
+        if matrix is None:
+            matrix = np.empty((0, index.dimension or 0), dtype=np.float32)
+        with self._lock:
+            if self._indexes.get(collection.name) is not index:
+                # Dropped while copying
+                return
+        with index._lock:
+            index.reset(ids, matrix[:len(ids)])
+            if index.writes != writes:
+                index.mark_stale()
+
+    def add(self, collection_name: str, ids: Sequence[str], vectors) -> None:
+        # Collections without an index get one built after their first query
+        index = self.get(collection_name, create=False)
+        if index is not None:
+            index.add(ids, vectors)
+
+    def delete(self, collection_name: str, ids: Sequence[str]) -> None:
+        index = self.get(collection_name, create=False)
+        if index is not None:
+            index.delete(ids)
+
+    def mark_stale(self, collection_name: str) -> None:
+        index = self.get(collection_name, create=False)
+        if index is not None:
+            index.mark_stale()
+
+    def drop(self, collection_name: str) -> None:
+        with self._lock:
+            self._indexes.pop(collection_name, None)
+        shutil.rmtree(self._index_dir(collection_name), ignore_errors=True)
+
+    def stats(self, collection_name: str) -> Optional[Dict]:
+        index = self.get(collection_name, create=False)
+        if index is None:
+            return None
+        return {
+            "vectors": index.count,
+            "rows": index.rows,
+            "segments": len(index._segments),
+            "dtype": index.dtype.name,
+            "dimension": index.dimension,
+            "bytes": index.nbytes,
+            "quantization": index.quantization,
+            "resident_bytes": index.codes_nbytes if index.quantization != "none" else index.nbytes,
+            "disk_bytes": sum(entry.stat().st_size for entry in os.scandir(index.directory) if entry.is_file()),
+            "stale": index.stale,
+        }
+
+
+# Global flat index store instance
+flat_index_store = FlatIndexStore()
@@ -0,0 +1,164 @@
+from src.vectorstorage.collection_settings import collection_settings
+from src.vectorstorage.collection_writes import is_bulk_loading
+from src.vectorstorage.chroma_pool import chroma_pool
+from src.vectorstorage.vectorstore import chroma_db_path, collection_lock, invalidate_vectorstore
+from src.vectorstorage.query_cache import query_cache
+from typing import Any, Callable, Dict, Iterator, Optional
+import threading
+import logging
+import time
+import uuid
+import os
+
+logger = logging.getLogger(__name__)
+
+# Chroma HNSW parameters that can be set per collection. Chroma fixes them
+# when a collection is created, so changes apply on the next compaction.
+HNSW_PARAMS = {
+    "M": int,
+    "construction_ef": int,
+    "search_ef": int,
+    "num_threads": int,
+    "batch_size": int,
+    "sync_threshold": int,
+    "resize_factor": float,
+}
+
+# Collections created by a bulk load buffer this many vectors before
+# inserting them into the graph, and persist the index far less often
+BULK_LOAD_PARAMS = {
+    "batch_size": int(os.environ.get("NOTATE_BULK_LOAD_BATCH_SIZE", "10000")),
+    "sync_threshold": int(os.environ.get("NOTATE_BULK_LOAD_SYNC_THRESHOLD", "100000")),
+}
+COMPACT_PAGE_SIZE = 5000
+
+
+def validate_hnsw(params: Dict[str, Any]) -> Dict[str, Any]:
+    """Checked, typed copy of user-supplied HNSW parameters."""
+    validated = {}
+    for name, value in params.items():
+        if name not in HNSW_PARAMS:
+            raise ValueError(f"Unknown HNSW parameter: {name}")
+        kind = HNSW_PARAMS[name]
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or (kind is int and value != int(value)):
+            raise ValueError(f"Invalid value for HNSW parameter {name}: {value}")
+        value = kind(value)
+        if value <= 0 or (name in ("batch_size", "sync_threshold") and value <= 2):
+            raise ValueError(f"Invalid value for HNSW parameter {name}: {value}")
+        validated[name] = value
+    return validated
+
+
+def get_hnsw_settings(collection_name: str) -> Dict[str, Any]:
+    return dict(collection_settings.get(collection_name).get("hnsw") or {})
+
+
+def collection_metadata(collection_name: str) -> Optional[Dict[str, Any]]:
+    """Chroma metadata to create the collection with, or None for Chroma's defaults."""
+    params = get_hnsw_settings(collection_name)
+    if is_bulk_loading(collection_name):
+        params = {**BULK_LOAD_PARAMS, **params}
+    return {f"hnsw:{name}": value for name, value in params.items()} or None
+
+
+def active_hnsw(collection) -> Dict[str, Any]:
+    """HNSW parameters the collection was actually created with."""
+    return {key[len("hnsw:"):]: value for key, value in (collection.metadata or {}).items()
+            if key.startswith("hnsw:")}
+
+
+def keeps_bulk_load_params(collection, collection_name: str) -> bool:
+    """
+    Whether the collection was created during a bulk load and still runs with
+    its batch_size / sync_threshold; compaction applies the configured ones.
+    """
+    active = active_hnsw(collection)
+    configured = get_hnsw_settings(collection_name)
+    return any(active.get(name) == value and configured.get(name) != value
+               for name, value in BULK_LOAD_PARAMS.items())
+
+
+def needs_compaction_after_bulk_load(collection_name: str) -> bool:
+    client = chroma_pool.get_client(chroma_db_path)
+    if collection_name not in [str(name) for name in client.list_collections()]:
+        return False
+    return keeps_bulk_load_params(client.get_collection(collection_name), collection_name)
+
+
+def staging_metadata(source, collection_name: str) -> Optional[Dict[str, Any]]:
+    """Metadata for a rebuilt copy of source: current HNSW settings, same distance function."""
+    metadata = {key: value for key, value in (source.metadata or {}).items() if not key.startswith("hnsw:")}
+    metadata.update(collection_metadata(collection_name) or {})
+    # The distance function is part of the stored data, never change it
+    if "hnsw:space" in (source.metadata or {}):
+        metadata["hnsw:space"] = source.metadata["hnsw:space"]
+    return metadata or None
+
+
+def swap_collection(client, source, target, collection_name: str,
+                    on_swap: Optional[Callable[[], None]] = None) -> None:
+    """
+    Move target under collection_name and delete the source it replaces, if
+    any. Runs under the collection's exclusive lock, with on_swap recording
+    settings that go with the new contents (e.g. its embedding model), so a
+    query sees either the old collection and settings or the new ones.
+    """
+    retired_name = f"retired-{uuid.uuid4().hex[:16]}"
+    with collection_lock(collection_name).exclusive():
+        if source is not None:
+            source.modify(name=retired_name)
+        try:
+            target.modify(name=collection_name)
+        except Exception:
+            if source is not None:
+                source.modify(name=collection_name)
+            raise
+        try:
+            if on_swap is not None:
+                on_swap()
+        finally:
+            invalidate_vectorstore(collection_name)
+        if source is not None:
+            client.delete_collection(retired_name)
+
+
+def compact_collection(collection_name: str, cancel_event: Optional[threading.Event] = None) -> Iterator[dict]:
+    """
+    Rebuild a collection's HNSW index from its stored vectors: copy every
+    chunk into a fresh collection created with the current settings, then
+    swap it in under the original name. Drops the tombstones left by
+    deletes and applies changed HNSW parameters. Nothing is re-embedded.
+    """
+    client = chroma_pool.get_client(chroma_db_path)
+    source = client.get_collection(collection_name)
+    count = source.count()
+    staging_name = f"compact-{uuid.uuid4().hex[:16]}"
+    target = client.create_collection(staging_name, metadata=staging_metadata(source, collection_name))
+    began = time.time()
+    copied = 0
+    try:
+        for offset in range(0, count, COMPACT_PAGE_SIZE):
+            if cancel_event is not None and cancel_event.is_set():
+                client.delete_collection(staging_name)
+                yield {"status": "cancelled", "message": "Compaction cancelled"}
+                return
+            page = source.get(include=["embeddings", "documents", "metadatas"],
+                              limit=COMPACT_PAGE_SIZE, offset=offset)
+            if not page["ids"]:
+                break
+            target.add(ids=page["ids"], embeddings=page["embeddings"], documents=page["documents"],
+                       metadatas=[item or None for item in page["metadatas"]])
+            copied += len(page["ids"])
+            yield {"status": "progress", "data": {
+                "message": f"Copied {copied}/{count} chunks",
+                "chunk": copied,
+                "total_chunks": count,
+                "percent_complete": f"{copied / max(count, 1) * 100:.1f}%"
+            }}
+    except Exception:
+        client.delete_collection(staging_name)
+        raise
+
+    swap_collection(client, source, target, collection_name, lambda: query_cache.bump(collection_name))
+    logger.info(f"Compacted {collection_name}: {copied} chunks in {time.time() - began:.1f}s")
+    yield {"status": "success", "message": f"Compacted {copied} chunks", "hnsw": active_hnsw(target)}
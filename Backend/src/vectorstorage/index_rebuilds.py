@@ -0,0 +1,57 @@
+from src.vectorstorage.query_cache import query_cache
+from concurrent.futures import Future
+from typing import Callable, Dict, Tuple
+import threading
+import logging
+import queue
+
+logger = logging.getLogger(__name__)
+
+
+class RebuildQueue:
+    """
+    Rebuilds derived indexes (flat, lexical) off the query path. A worker
+    thread runs one rebuild at a time and a collection is queued at most
+    once; queries serve their fallback until the rebuild finishes, then the
+    collection's cached results, which came from that fallback, are dropped.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._queue: "queue.Queue[Tuple[str, Callable[[], None], Future]]" = queue.Queue()
+        self._pending: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._worker = threading.Thread(target=self._run, name=name, daemon=True)
+        self._worker.start()
+
+    def submit(self, collection_name: str, rebuild: Callable[[], None]) -> Future:
+        """Queue rebuild unless one is already pending for the collection; wait on the future to block."""
+        with self._lock:
+            future = self._pending.get(collection_name)
+            if future is None:
+                future = Future()
+                self._pending[collection_name] = future
+                self._queue.put((collection_name, rebuild, future))
+            return future
+
+    def is_pending(self, collection_name: str) -> bool:
+        with self._lock:
+            return collection_name in self._pending
+
+    def _run(self) -> None:
+        while True:
+            collection_name, rebuild, future = self._queue.get()
+            try:
+                rebuild()
+            except Exception as e:
+                logger.warning(f"{self.name} for {collection_name} failed: {str(e)}")
+                error = e
+            else:
+                error = None
+            with self._lock:
+                self._pending.pop(collection_name, None)
+            query_cache.bump(collection_name)
+            if error is None:
+                future.set_result(None)
+            else:
+                future.set_exception(error)
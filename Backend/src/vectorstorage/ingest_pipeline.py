@@ -0,0 +1,247 @@
+from src.vectorstorage.collection_writes import record_upsert
+from langchain_core.documents import Document
+from typing import Any, Callable, Dict, Generator, Iterable, Iterator, List, Optional, Union
+import threading
+import logging
+import queue
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+
+# Chunks a background loader may prepare ahead of the encoder
+PREFETCH_CHUNKS = 1024
+
+
+def prefetch(items: Iterable, maxsize: int = PREFETCH_CHUNKS) -> Iterator:
+    """
+    Produce items on a background thread into a bounded queue, so loading
+    and splitting overlap with encoding without ever reading far ahead.
+    The producer's errors are raised in the consumer.
+    """
+    buffer: "queue.Queue" = queue.Queue(maxsize=maxsize)
+    stop = threading.Event()
+
+    def put(entry) -> bool:
+        while not stop.is_set():
+            try:
+                buffer.put(entry, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def produce():
+        try:
+            for item in items:
+                if not put((None, item)):
+                    return
+            put((_DONE, None))
+        except BaseException as e:
+            put((e, None))
+
+    threading.Thread(target=produce, daemon=True).start()
+    try:
+        while True:
+            error, item = buffer.get()
+            if error is _DONE:
+                return
+            if error is not None:
+                raise error
+            yield item
+    finally:
+        stop.set()
+
+
+class AdaptiveBatchSize:
+    """
+    Grows the encode batch while measured throughput keeps improving and
+    backs off when it drops, instead of guessing a size from the file size.
+    """
+
+    def __init__(self, initial: int = 32, minimum: int = 8, maximum: int = 512):
+        self.size = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self._best = 0.0
+
+    def update(self, docs: int, seconds: float) -> int:
+        if docs < self.size or seconds <= 0:
+            # Partial batch at the end of a window says nothing about throughput
+            return self.size
+        throughput = docs / seconds
+        if throughput > self._best * 1.05:
+            self._best = throughput
+            self.size = min(self.maximum, self.size * 2)
+        elif throughput < self._best * 0.8:
+            self.size = max(self.minimum, self.size // 2)
+            self._best = throughput
+        return self.size
+
+
+class IngestPipeline:
+    """
+    Two-stage ingestion: an encoder thread embeds length-bucketed batches and a
+    single writer thread bulk-upserts the precomputed vectors into Chroma.
+    The stages are joined by a bounded queue so encoding never runs far ahead
+    of the writes, and progress is reported through a second queue.
+    """
+
+    def __init__(self, vectordb, collection_name: str, cancel_event=None, queue_size: int = 4,
+                 batch_size: Optional[AdaptiveBatchSize] = None, bucket_window: int = 4,
+                 on_commit: Optional[Callable[[List[Document]], None]] = None):
+        self.vectordb = vectordb
+        self.collection = vectordb._collection
+        self.embeddings = vectordb.embeddings
+        self.collection_name = collection_name
+        self.cancel_event = cancel_event
+        self.batch_size = batch_size or AdaptiveBatchSize()
+        self.bucket_window = bucket_window
+        # Called from the writer thread after each batch is durably upserted
+        self.on_commit = on_commit
+        self._write_queue: "queue.Queue" = queue.Queue(maxsize=queue_size)
+        self._events: "queue.Queue" = queue.Queue()
+        self._error: Optional[BaseException] = None
+        self.written = 0
+        self.encoded = 0
+        self.max_write_batch = self._max_write_batch()
+
+    def _max_write_batch(self) -> int:
+        try:
+            return int(self.vectordb._client.get_max_batch_size())
+        except Exception:
+            return 5000
+
+    def _cancelled(self) -> bool:
+        return bool(self.cancel_event and self.cancel_event.is_set()) or self._error is not None
+
+    def _windows(self, documents: Iterable[Document]) -> Generator[List[Document], None, None]:
+        """Group the incoming stream into windows of a few batches each."""
+        window: List[Document] = []
+        for doc in documents:
+            window.append(doc)
+            if len(window) >= self.batch_size.size * self.bucket_window:
+                yield window
+                window = []
+        if window:
+            yield window
+
+    def _encode(self, documents: Iterable[Document]):
+        try:
+            for window in self._windows(documents):
+                # Sort by length so each batch pads to a similar sequence length
+                window.sort(key=lambda d: len(d.page_content))
+                start = 0
+                while start < len(window):
+                    if self._cancelled():
+                        return
+                    size = self.batch_size.size
+                    batch = window[start:start + size]
+                    start += size
+                    began = time.time()
+                    vectors = self.embeddings.embed_documents(
+                        [d.page_content for d in batch])
+                    self.batch_size.update(len(batch), time.time() - began)
+                    self.encoded += len(batch)
+                    self._write_queue.put((batch, vectors))
+        except BaseException as e:
+            logger.error(f"Error encoding batch: {str(e)}")
+            self._error = e
+        finally:
+            # Stop a streaming source (e.g. prefetch) that was left unfinished
+            close = getattr(documents, "close", None)
+            if close is not None:
+                close()
+            self._write_queue.put(_DONE)
+
+    def write(self, batch: List[Document], vectors: List[List[float]], ids: Optional[List[str]] = None) -> None:
+        """Bulk-upsert precomputed vectors, split to Chroma's maximum batch size."""
+        if ids is None:
+            ids = [d.id or str(uuid.uuid4()) for d in batch]
+        for i in range(0, len(batch), self.max_write_batch):
+            part = batch[i:i + self.max_write_batch]
+            self.collection.upsert(
+                ids=ids[i:i + self.max_write_batch],
+                embeddings=vectors[i:i + self.max_write_batch],
+                documents=[d.page_content for d in part],
+                metadatas=[d.metadata or None for d in part],
+            )
+            record_upsert(self.collection_name, part, ids[i:i + self.max_write_batch],
+                          vectors[i:i + self.max_write_batch])
+
+    def _write(self):
+        try:
+            while True:
+                item = self._write_queue.get()
+                if item is _DONE:
+                    break
+                if self._error is not None:
+                    continue
+                batch, vectors = item
+                self.write(batch, vectors)
+                if self.on_commit is not None:
+                    self.on_commit(batch)
+                self.written += len(batch)
+                self._events.put(("written", len(batch)))
+        except BaseException as e:
+            logger.error(f"Error writing batch: {str(e)}")
+            self._error = e
+            # Drain so the encoder never blocks on a full queue
+            while self._write_queue.get() is not _DONE:
+                pass
+        finally:
+            self._events.put((_DONE, None))
+
+    def run(self, documents: Iterable[Document], total: Union[int, Callable[[], Optional[int]], None] = None
+            ) -> Generator[Dict[str, Any], None, None]:
+        """
+        Run both stages and yield progress dicts as batches are committed.
+        For a stream of unknown length, total can be a callable returning the
+        current estimate. Raises the first encoder or writer error once the
+        stages have stopped.
+        """
+        encoder = threading.Thread(
+            target=self._encode, args=(documents,), daemon=True)
+        writer = threading.Thread(target=self._write, daemon=True)
+        start_time = time.time()
+        encoder.start()
+        writer.start()
+
+        batches = 0
+        while True:
+            kind, _ = self._events.get()
+            if kind is _DONE:
+                break
+            batches += 1
+            yield self._progress(batches, total, start_time)
+
+        encoder.join()
+        writer.join()
+        if self._error is not None:
+            raise self._error
+
+    def _progress(self, batch_num: int, total, start_time: float) -> Dict[str, Any]:
+        elapsed = time.time() - start_time
+        if callable(total):
+            total = total()
+        total = max(total or 0, self.written)
+        percent = round(self.written / total * 100, 2) if total else 0
+        result = {
+            "chunk": self.written,
+            "total_chunks": total,
+            "batch": batch_num,
+            "batch_size": self.batch_size.size,
+            "percent_complete": percent,
+            "elapsed_time": elapsed,
+            "docs_per_second": round(self.written / elapsed, 2) if elapsed > 0 else 0,
+        }
+        if self.written and total and elapsed > 0:
+            est_remaining_time = (total - self.written) * \
+                elapsed / self.written
+            result["est_remaining_time"] = time.strftime(
+                '%H:%M:%S', time.gmtime(est_remaining_time))
+        else:
+            result["est_remaining_time"] = "calculating..."
+        return result
@@ -0,0 +1,294 @@
+from src.vectorstorage.vectorstore import get_app_data_dir
+from src.vectorstorage.flat_index import top_k
+from src.vectorstorage.index_rebuilds import RebuildQueue
+from concurrent.futures import Future
+from collections import Counter
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+import threading
+import logging
+import sqlite3
+import array
+import math
+import re
+import os
+
+logger = logging.getLogger(__name__)
+
+lexical_index_dir = os.path.join(get_app_data_dir(), "lexical_index")
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+MAX_TOKEN_LENGTH = 64
+REBUILD_PAGE_SIZE = 2000
+
+_TOKEN = re.compile(r"\w+(?:[.\-:/]\w+)*")
+_SEPARATORS = re.compile(r"[.\-:/_]+")
+_CAMEL = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|\d+")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lowercased terms for BM25. Identifiers are kept whole (get_vectorstore,
+    ERR_CONNECTION_REFUSED, os.path.join) and also split into their parts,
+    including camelCase words, so partial lookups still match.
+    """
+    terms = []
+    for match in _TOKEN.finditer(text):
+        token = match.group()
+        if len(token) > MAX_TOKEN_LENGTH:
+            continue
+        terms.append(token.lower())
+        parts = [part for piece in _SEPARATORS.split(token) if piece
+                 for part in (_CAMEL.findall(piece) or [piece])]
+        if len(parts) > 1:
+            terms.extend(part.lower() for part in parts)
+    return terms
+
+
+class LexicalIndex:
+    """
+    Persistent BM25 inverted index for one collection in a single SQLite file.
+    Terms and chunks get integer ids, postings are (term, doc, tf) rows in a
+    WITHOUT ROWID table, and each doc keeps its packed term ids so upserts
+    and deletes can update document frequencies incrementally.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.RLock()
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self._conn.executescript("""
+            PRAGMA journal_mode = WAL;
+            CREATE TABLE IF NOT EXISTS terms (
+                id INTEGER PRIMARY KEY,
+                term TEXT UNIQUE NOT NULL,
+                df INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS docs (
+                id INTEGER PRIMARY KEY,
+                chunk_id TEXT UNIQUE NOT NULL,
+                length INTEGER NOT NULL,
+                terms BLOB NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS postings (
+                term INTEGER NOT NULL,
+                doc INTEGER NOT NULL,
+                tf INTEGER NOT NULL,
+                PRIMARY KEY (term, doc)
+            ) WITHOUT ROWID;
+        """)
+        self._lengths: Optional[np.ndarray] = None
+        self._doc_count = 0
+        self._total_length = 0
+        self._load_stats()
+
+    def _load_stats(self) -> None:
+        rows = self._conn.execute("SELECT id, length FROM docs").fetchall()
+        ids = np.array([row[0] for row in rows], dtype=np.int64)
+        lengths = np.zeros(int(ids.max()) + 1 if len(ids) else 0, dtype=np.int32)
+        lengths[ids] = [row[1] for row in rows]
+        self._lengths = lengths
+        self._doc_count = len(rows)
+        self._total_length = int(lengths.sum())
+
+    @property
+    def count(self) -> int:
+        return self._doc_count
+
+    def _term_ids(self, terms: Sequence[str], create: bool) -> Dict[str, int]:
+        found: Dict[str, int] = {}
+        unique = list(dict.fromkeys(terms))
+        for start in range(0, len(unique), 500):
+            part = unique[start:start + 500]
+            rows = self._conn.execute(
+                f"SELECT term, id FROM terms WHERE term IN ({','.join('?' * len(part))})", part).fetchall()
+            found.update(rows)
+        if create:
+            missing = [term for term in unique if term not in found]
+            self._conn.executemany("INSERT INTO terms (term, df) VALUES (?, 0)", [(t,) for t in missing])
+            for start in range(0, len(missing), 500):
+                part = missing[start:start + 500]
+                found.update(self._conn.execute(
+                    f"SELECT term, id FROM terms WHERE term IN ({','.join('?' * len(part))})", part).fetchall())
+        return found
+
+    def _remove(self, chunk_ids: Sequence[str]) -> None:
+        for chunk_id in chunk_ids:
+            row = self._conn.execute(
+                "SELECT id, length, terms FROM docs WHERE chunk_id = ?", (chunk_id,)).fetchone()
+            if row is None:
+                continue
+            doc, length, packed = row
+            term_ids = array.array("I")
+            term_ids.frombytes(packed)
+            self._conn.executemany("UPDATE terms SET df = df - 1 WHERE id = ?", [(t,) for t in term_ids])
+            self._conn.executemany("DELETE FROM postings WHERE term = ? AND doc = ?",
+                                   [(t, doc) for t in term_ids])
+            self._conn.execute("DELETE FROM docs WHERE id = ?", (doc,))
+            self._lengths[doc] = 0
+            self._doc_count -= 1
+            self._total_length -= length
+
+    def add(self, chunk_ids: Sequence[str], texts: Sequence[str]) -> None:
+        """Index (or re-index) chunks; existing chunk ids are replaced."""
+        if not chunk_ids:
+            return
+        latest = dict(zip(chunk_ids, texts))
+        with self._lock, self._conn:
+            self._remove(list(latest))
+            counts = [Counter(tokenize(text or "")) for text in latest.values()]
+            term_ids = self._term_ids([t for c in counts for t in c], create=True)
+            df_delta: Counter = Counter()
+            for chunk_id, tf in zip(latest, counts):
+                ids = array.array("I", sorted(term_ids[t] for t in tf))
+                length = sum(tf.values())
+                doc = self._conn.execute("INSERT INTO docs (chunk_id, length, terms) VALUES (?, ?, ?)",
+                                         (chunk_id, length, ids.tobytes())).lastrowid
+                self._conn.executemany("INSERT INTO postings VALUES (?, ?, ?)",
+                                       [(term_ids[t], doc, n) for t, n in tf.items()])
+                df_delta.update(ids)
+                if doc >= len(self._lengths):
+                    grown = np.zeros(max(doc + 1, 2 * len(self._lengths)), dtype=np.int32)
+                    grown[:len(self._lengths)] = self._lengths
+                    self._lengths = grown
+                self._lengths[doc] = length
+                self._doc_count += 1
+                self._total_length += length
+            self._conn.executemany("UPDATE terms SET df = df + ? WHERE id = ?",
+                                   [(n, term_id) for term_id, n in df_delta.items()])
+
+    def delete(self, chunk_ids: Sequence[str]) -> None:
+        with self._lock, self._conn:
+            self._remove(chunk_ids)
+
+    def reset(self) -> None:
+        with self._lock, self._conn:
+            self._conn.executescript("DELETE FROM postings; DELETE FROM docs; DELETE FROM terms;")
+            self._lengths = np.zeros(0, dtype=np.int32)
+            self._doc_count = self._total_length = 0
+
+    def search(self, query: str, k: int) -> List[Tuple[str, float]]:
+        """Top-k (chunk id, BM25 score) pairs, best first."""
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms or k <= 0:
+            return []
+        with self._lock:
+            if not self._doc_count:
+                return []
+            average_length = self._total_length / self._doc_count
+            rows = self._conn.execute(
+                f"SELECT id, df FROM terms WHERE term IN ({','.join('?' * len(terms))}) AND df > 0",
+                terms).fetchall()
+            docs_parts, score_parts = [], []
+            for term_id, df in rows:
+                postings = np.array(self._conn.execute(
+                    "SELECT doc, tf FROM postings WHERE term = ?", (term_id,)).fetchall(), dtype=np.int64)
+                if not len(postings):
+                    continue
+                docs, tf = postings[:, 0], postings[:, 1].astype(np.float32)
+                idf = math.log(1 + (self._doc_count - df + 0.5) / (df + 0.5))
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self._lengths[docs] / average_length)
+                docs_parts.append(docs)
+                score_parts.append(idf * tf * (BM25_K1 + 1) / (tf + norm))
+            if not docs_parts:
+                return []
+            docs, inverse = np.unique(np.concatenate(docs_parts), return_inverse=True)
+            scores = np.bincount(inverse, weights=np.concatenate(score_parts)).astype(np.float32)
+            best = top_k(scores, k)
+            ids = [int(doc) for doc in docs[best]]
+            chunk_ids = dict(self._conn.execute(
+                f"SELECT id, chunk_id FROM docs WHERE id IN ({','.join('?' * len(ids))})", ids).fetchall())
+        return [(chunk_ids[doc], float(scores[i])) for doc, i in zip(ids, best) if doc in chunk_ids]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class LexicalIndexStore:
+    """
+    BM25 indexes for every collection, created and kept current by ingestion.
+    An index whose size doesn't match its collection is rebuilt from Chroma's
+    documents in the background; until then its queries get no lexical hits.
+    """
+
+    def __init__(self, directory: str = lexical_index_dir):
+        self.directory = directory
+        self._indexes: Dict[str, LexicalIndex] = {}
+        self._lock = threading.Lock()
+        self.rebuilds = RebuildQueue("lexical-index-rebuild")
+
+    def _path(self, collection_name: str) -> str:
+        return os.path.join(self.directory, f"{collection_name}.sqlite")
+
+    def get(self, collection_name: str, create: bool = True) -> Optional[LexicalIndex]:
+        with self._lock:
+            index = self._indexes.get(collection_name)
+            if index is None:
+                if not create and not os.path.exists(self._path(collection_name)):
+                    return None
+                index = LexicalIndex(self._path(collection_name))
+                self._indexes[collection_name] = index
+            return index
+
+    def search(self, collection, query: str, k: int) -> Optional[List[Tuple[str, float]]]:
+        """Top-k (chunk id, BM25 score) pairs, or None while the index is being rebuilt."""
+        index = self.get(collection.name)
+        if index.count != collection.count():
+            self.schedule_rebuild(collection)
+            return None
+        return index.search(query, k)
+
+    def schedule_rebuild(self, collection) -> Future:
+        index = self.get(collection.name)
+        return self.rebuilds.submit(collection.name, lambda: self.rebuild(index, collection))
+
+    def rebuild(self, index: LexicalIndex, collection, count: Optional[int] = None) -> None:
+        count = collection.count() if count is None else count
+        logger.info(f"Building lexical index for {collection.name} ({count} chunks)")
+        index.reset()
+        for offset in range(0, count, REBUILD_PAGE_SIZE):
+            page = collection.get(include=["documents"], limit=REBUILD_PAGE_SIZE, offset=offset)
+            if not page["ids"]:
+                break
+            index.add(page["ids"], page["documents"])
+
+    def add(self, collection_name: str, chunk_ids: Sequence[str], texts: Sequence[str]) -> None:
+        # Indexed at ingest time so queries never build an index themselves
+        self.get(collection_name).add(chunk_ids, texts)
+
+    def delete(self, collection_name: str, chunk_ids: Sequence[str]) -> None:
+        index = self.get(collection_name, create=False)
+        if index is not None:
+            index.delete(chunk_ids)
+
+    def stats(self, collection_name: str) -> Optional[Dict]:
+        index = self.get(collection_name, create=False)
+        if index is None:
+            return None
+        with index._lock:
+            terms = index._conn.execute("SELECT COUNT(*) FROM terms WHERE df > 0").fetchone()[0]
+        path = self._path(collection_name)
+        return {
+            "chunks": index.count,
+            "terms": terms,
+            "bytes": sum(os.path.getsize(path + suffix) for suffix in ("", "-wal")
+                         if os.path.exists(path + suffix)),
+        }
+
+    def drop(self, collection_name: str) -> None:
+        with self._lock:
+            index = self._indexes.pop(collection_name, None)
+        if index is not None:
+            index.close()
+        for suffix in ("", "-wal", "-shm"):
+            try:
+                os.remove(self._path(collection_name) + suffix)
+            except OSError:
+                pass
+
+
+# Global lexical index store instance
+lexical_index_store = LexicalIndexStore()
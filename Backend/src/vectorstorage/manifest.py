@@ -0,0 +1,178 @@
+from src.vectorstorage.vectorstore import get_app_data_dir
+from src.vectorstorage.collection_writes import record_delete
+from langchain_core.documents import Document
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional
+import threading
+import hashlib
+import sqlite3
+import time
+import os
+
+manifest_db_path = os.path.join(get_app_data_dir(), "manifests.sqlite")
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def stream_chunk_ids(collection_name: str, documents: Iterable[Document]) -> Iterator[Document]:
+    """
+    Give each chunk a deterministic ID derived from the collection, its source
+    and its content hash. Repeated identical chunks within one source are told
+    apart by their occurrence number, so unchanged chunks keep their IDs when
+    text elsewhere in the file moves around. Chunks are yielded as they get
+    their IDs, so a stream is never materialized.
+    """
+    seen: Dict[tuple, int] = {}
+    for doc in documents:
+        source = str((doc.metadata or {}).get("source", ""))
+        digest = content_hash(doc.page_content)
+        occurrence = seen.get((source, digest), 0)
+        seen[(source, digest)] = occurrence + 1
+        doc.id = hashlib.sha256(
+            f"{collection_name}\0{source}\0{digest}\0{occurrence}".encode("utf-8")).hexdigest()
+        yield doc
+
+
+def assign_chunk_ids(collection_name: str, documents: List[Document]) -> List[Document]:
+    for _ in stream_chunk_ids(collection_name, documents):
+        pass
+    return documents
+
+
+def file_sha256(file_path: str) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class FileFingerprint:
+    """
+    Size and mtime of a file taken once, with its content hash computed on
+    first use and kept, so a job checks and records a file with one read.
+    """
+
+    def __init__(self, file_path: str):
+        stat = os.stat(file_path)
+        self.file_path = file_path
+        self.size = stat.st_size
+        self.mtime = stat.st_mtime
+        self._sha256: Optional[str] = None
+
+    def sha256(self) -> str:
+        if self._sha256 is None:
+            self._sha256 = file_sha256(self.file_path)
+        return self._sha256
+
+
+@dataclass
+class ManifestEntry:
+    source: str
+    size: int
+    mtime: float
+    sha256: str
+    chunks: int
+    updated_at: float
+
+
+class CollectionManifest:
+    """
+    Per-collection record of ingested source files (size, mtime, hash, chunk
+    count), kept in one SQLite file next to the Chroma store.
+    """
+
+    def __init__(self, db_path: str = manifest_db_path):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS files (
+                    collection TEXT NOT NULL,
+                    source TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    mtime REAL NOT NULL,
+                    sha256 TEXT NOT NULL,
+                    chunks INTEGER NOT NULL,
+                    updated_at REAL NOT NULL,
+                    PRIMARY KEY (collection, source)
+                ) WITHOUT ROWID
+            """)
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def get(self, collection_name: str, source: str) -> Optional[ManifestEntry]:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT source, size, mtime, sha256, chunks, updated_at FROM files WHERE collection = ? AND source = ?",
+                (collection_name, source)).fetchone()
+        return ManifestEntry(*row) if row else None
+
+    def sources(self, collection_name: str) -> List[str]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT source FROM files WHERE collection = ?", (collection_name,)).fetchall()
+        return [row[0] for row in rows]
+
+    def is_unchanged(self, collection_name: str, file_path: str,
+                     fingerprint: Optional[FileFingerprint] = None) -> bool:
+        """
+        Cheap change check: size and mtime first, content hash only when those
+        differ (a touched but identical file just gets its mtime refreshed).
+        """
+        entry = self.get(collection_name, file_path)
+        if entry is None or not os.path.exists(file_path):
+            return False
+        fingerprint = fingerprint or FileFingerprint(file_path)
+        if fingerprint.size == entry.size and fingerprint.mtime == entry.mtime:
+            return True
+        if fingerprint.size != entry.size or fingerprint.sha256() != entry.sha256:
+            return False
+        with self._lock, self._connect() as conn:
+            conn.execute("UPDATE files SET mtime = ? WHERE collection = ? AND source = ?",
+                         (fingerprint.mtime, collection_name, file_path))
+        return True
+
+    def record(self, collection_name: str, file_path: str, chunks: int,
+               fingerprint: Optional[FileFingerprint] = None) -> None:
+        """Record file_path as ingested; pass the fingerprint taken before reading it."""
+        fingerprint = fingerprint or FileFingerprint(file_path)
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (collection_name, file_path, fingerprint.size, fingerprint.mtime,
+                 fingerprint.sha256(), chunks, time.time()))
+
+    def remove(self, collection_name: str, source: Optional[str] = None) -> None:
+        with self._lock, self._connect() as conn:
+            if source is None:
+                conn.execute(
+                    "DELETE FROM files WHERE collection = ?", (collection_name,))
+            else:
+                conn.execute("DELETE FROM files WHERE collection = ? AND source = ?",
+                             (collection_name, source))
+
+
+def existing_chunk_ids(vectordb, source: str) -> List[str]:
+    """IDs already stored for a source, read without fetching documents or vectors."""
+    result = vectordb._collection.get(where={"source": source}, include=[])
+    return list(result.get("ids") or [])
+
+
+def delete_source(vectordb, source: str) -> int:
+    ids = existing_chunk_ids(vectordb, source)
+    delete_chunks(vectordb, ids)
+    return len(ids)
+
+
+def delete_chunks(vectordb, ids: List[str]) -> None:
+    if ids:
+        vectordb._collection.delete(ids=ids)
+        record_delete(vectordb._collection.name, ids)
+
+
+# Global manifest instance
+collection_manifest = CollectionManifest()
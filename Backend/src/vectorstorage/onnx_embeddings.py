@@ -0,0 +1,199 @@
+from src.vectorstorage.init_store import get_models_dir
+from langchain_core.embeddings import Embeddings
+from typing import Any, Dict, List, Optional
+import numpy as np
+import threading
+import logging
+import shutil
+import json
+import os
+
+logger = logging.getLogger(__name__)
+
+ONNX_OPSET = 17
+ENCODE_BATCH_SIZE = 32
+META_FILE = "notate_onnx.json"
+
+_export_lock = threading.Lock()
+
+
+def get_onnx_dir(model_name: str) -> str:
+    return os.path.join(get_models_dir(), "onnx", model_name.replace("/", "--"))
+
+
+def get_onnx_threads() -> int:
+    """Intra-op threads: NOTATE_ONNX_THREADS, else the number of physical cores."""
+    configured = os.environ.get("NOTATE_ONNX_THREADS")
+    if configured:
+        return max(1, int(configured))
+    try:
+        import psutil
+        cores = psutil.cpu_count(logical=False)
+    except Exception:
+        cores = None
+    return max(1, cores or os.cpu_count() or 1)
+
+
+def pool(hidden: np.ndarray, attention_mask: np.ndarray, mode: str) -> np.ndarray:
+    """Reduce token states (batch, seq, dim) to sentence vectors like sentence-transformers' Pooling."""
+    mask = attention_mask.astype(hidden.dtype)[:, :, None]
+    if mode == "cls":
+        return hidden[:, 0]
+    if mode == "lasttoken":
+        # Last attended position, whichever side the tokenizer pads on
+        last = attention_mask.shape[1] - 1 - \
+            np.argmax(attention_mask[:, ::-1], axis=1)
+        return hidden[np.arange(hidden.shape[0]), last]
+    if mode == "max":
+        return np.where(mask > 0, hidden, -np.inf).max(axis=1)
+    return (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+
+
+def export_onnx_model(model_name: str, quantize: bool = False) -> str:
+    """
+    Export a sentence-transformers model to ONNX once and cache it under the
+    models dir, optionally with an int8 dynamically quantized copy.
+    Returns the path of the requested .onnx file.
+    """
+    export_dir = get_onnx_dir(model_name)
+    fp32_path = os.path.join(export_dir, "model.onnx")
+    int8_path = os.path.join(export_dir, "model-int8.onnx")
+
+    with _export_lock:
+        if not os.path.exists(os.path.join(export_dir, META_FILE)):
+            _export(model_name, export_dir)
+        if quantize and not os.path.exists(int8_path):
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+            with open(os.path.join(export_dir, META_FILE)) as f:
+                external_data = json.load(f).get("external_data", False)
+            logger.info(f"Quantizing ONNX model {model_name} to int8")
+            quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8,
+                             use_external_data_format=external_data)
+    return int8_path if quantize else fp32_path
+
+
+def _export(model_name: str, export_dir: str) -> None:
+    from sentence_transformers import SentenceTransformer
+    import torch
+
+    logger.info(f"Exporting embedding model {model_name} to ONNX")
+    st_model = SentenceTransformer(
+        model_name, device="cpu", cache_folder=get_models_dir())
+    transformer = st_model[0]
+    pooling_mode = st_model[1].get_pooling_mode_str() if len(
+        st_model) > 1 and hasattr(st_model[1], "get_pooling_mode_str") else "mean"
+    tokenizer = transformer.tokenizer
+    auto_model = transformer.auto_model.eval()
+
+    sample = tokenizer(["Notate ONNX export"], return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids")
+                   if name in sample]
+
+    class HiddenStates(torch.nn.Module):
+        def __init__(self, model):
+            super().__init__()
+            self.model = model
+
+        def forward(self, *inputs):
+            return self.model(**dict(zip(input_names, inputs))).last_hidden_state
+
+    # Write into a scratch dir and swap it in, so a crash never leaves a half export
+    tmp_dir = export_dir + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+    with torch.no_grad():
+        torch.onnx.export(
+            HiddenStates(auto_model),
+            tuple(sample[name] for name in input_names),
+            os.path.join(tmp_dir, "model.onnx"),
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=ONNX_OPSET,
+        )
+    tokenizer.save_pretrained(tmp_dir)
+    parameters = sum(p.numel() for p in auto_model.parameters())
+    with open(os.path.join(tmp_dir, META_FILE), "w") as f:
+        json.dump({
+            "model_name": model_name,
+            "pooling": pooling_mode,
+            "max_seq_length": transformer.max_seq_length,
+            "dimension": st_model.get_sentence_embedding_dimension(),
+            "input_names": input_names,
+            "external_data": parameters * 4 >= 2 ** 31,
+        }, f)
+    shutil.rmtree(export_dir, ignore_errors=True)
+    os.replace(tmp_dir, export_dir)
+    logger.info(f"Exported {model_name} to {export_dir}")
+
+
+class OnnxEmbeddings(Embeddings):
+    """
+    CPU embedding backend that runs an exported sentence-transformers model
+    through ONNX Runtime. Pooling and normalization match the torch backend.
+    """
+
+    def __init__(self, model_name: str, quantize: bool = False, max_seq_length: Optional[int] = None,
+                 normalize_embeddings: bool = True, batch_size: int = ENCODE_BATCH_SIZE,
+                 intra_op_threads: Optional[int] = None):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        self.model_name = model_name
+        self.quantize = quantize
+        self.normalize_embeddings = normalize_embeddings
+        self.batch_size = batch_size
+
+        model_path = export_onnx_model(model_name, quantize)
+        export_dir = os.path.dirname(model_path)
+        with open(os.path.join(export_dir, META_FILE)) as f:
+            self.meta: Dict[str, Any] = json.load(f)
+        self.max_seq_length = max_seq_length or self.meta.get(
+            "max_seq_length") or 512
+        self.tokenizer = AutoTokenizer.from_pretrained(export_dir)
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = intra_op_threads or get_onnx_threads()
+        options.inter_op_num_threads = 1
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(
+            model_path, sess_options=options, providers=["CPUExecutionProvider"])
+        self.input_names = [i.name for i in self.session.get_inputs()]
+        self.size_bytes = sum(
+            os.path.getsize(os.path.join(export_dir, name)) for name in os.listdir(export_dir)
+            if name.startswith("model-int8") == quantize)
+        logger.info(
+            f"Loaded ONNX embeddings {model_name} ({'int8' if quantize else 'fp32'}, "
+            f"{options.intra_op_num_threads} threads)")
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        # Length-sorted batches keep padding (and wasted compute) low
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        vectors: Optional[np.ndarray] = None
+        for start in range(0, len(order), self.batch_size):
+            batch = order[start:start + self.batch_size]
+            encoded = self.tokenizer([texts[i] for i in batch], padding=True, truncation=True,
+                                     max_length=self.max_seq_length, return_tensors="np")
+            feeds = {name: encoded[name].astype(np.int64)
+                     for name in self.input_names}
+            hidden = self.session.run(None, feeds)[0]
+            pooled = pool(hidden, encoded["attention_mask"],
+                          self.meta.get("pooling", "mean"))
+            if vectors is None:
+                vectors = np.empty((len(texts), pooled.shape[1]), dtype=np.float32)
+            vectors[batch] = pooled
+        if self.normalize_embeddings:
+            vectors /= np.clip(np.linalg.norm(vectors,
+                               axis=1, keepdims=True), 1e-12, None)
+        return vectors
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        return self._encode(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._encode([text])[0].tolist()
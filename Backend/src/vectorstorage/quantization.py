@@ -0,0 +1,71 @@
+from typing import Dict, Optional, Sequence
+import numpy as np
+import os
+
+# "none" searches float vectors directly; "int8" and "binary" search compact
+# codes and rescore the over-fetched candidates with the float vectors
+QUANTIZATION_MODES = ("none", "int8", "binary")
+DEFAULT_OVERSAMPLE = {
+    "int8": int(os.environ.get("NOTATE_INT8_OVERSAMPLE", "4")),
+    "binary": int(os.environ.get("NOTATE_BINARY_OVERSAMPLE", "10")),
+}
+MIN_CANDIDATES = 50
+ENCODE_BLOCK_ROWS = 16384
+
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def popcount(bits: np.ndarray) -> np.ndarray:
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(bits)
+    return _POPCOUNT[bits]
+
+
+def encode(matrix: np.ndarray, mode: str) -> Dict[str, np.ndarray]:
+    """Compact codes for a (rows, dim) float matrix, encoded block by block."""
+    parts = [_encode_block(np.asarray(matrix[start:start + ENCODE_BLOCK_ROWS], dtype=np.float32), mode)
+             for start in range(0, len(matrix), ENCODE_BLOCK_ROWS)]
+    if not parts:
+        parts = [_encode_block(np.empty((0, matrix.shape[1]), dtype=np.float32), mode)]
+    return {name: np.concatenate([part[name] for part in parts]) for name in parts[0]}
+
+
+def _encode_block(block: np.ndarray, mode: str) -> Dict[str, np.ndarray]:
+    if mode == "int8":
+        # Symmetric per-vector scale keeps the sign and the largest component exact
+        scales = np.clip(np.abs(block).max(axis=1), 1e-12, None) / 127.0
+        codes = np.round(block / scales[:, None]).astype(np.int8)
+        return {"codes": codes, "scales": scales.astype(np.float32)}
+    if mode == "binary":
+        return {"bits": np.packbits(block > 0, axis=1)}
+    raise ValueError(f"Unknown quantization mode: {mode}")
+
+
+def approximate_scores(codes: Dict[str, np.ndarray], query: np.ndarray, mode: str) -> np.ndarray:
+    """Cheap scores for ranking candidates; higher is more similar."""
+    if mode == "int8":
+        scores = np.empty(len(codes["codes"]), dtype=np.float32)
+        for start in range(0, len(scores), ENCODE_BLOCK_ROWS):
+            block = codes["codes"][start:start + ENCODE_BLOCK_ROWS].astype(np.float32)
+            scores[start:start + len(block)] = block @ query
+        return scores * codes["scales"]
+    if mode == "binary":
+        query_bits = np.packbits(query > 0)
+        distances = popcount(np.bitwise_xor(codes["bits"], query_bits)).sum(axis=1, dtype=np.int32)
+        return -distances.astype(np.float32)
+    raise ValueError(f"Unknown quantization mode: {mode}")
+
+
+def candidate_count(k: int, mode: str, oversample: Optional[int] = None) -> int:
+    return max(k * (oversample or DEFAULT_OVERSAMPLE.get(mode, 1)), MIN_CANDIDATES)
+
+
+def codes_nbytes(codes: Optional[Dict[str, np.ndarray]]) -> int:
+    return sum(array.nbytes for array in (codes or {}).values())
+
+
+def recall_at_k(truth: Sequence[Sequence[str]], found: Sequence[Sequence[str]]) -> float:
+    """Mean fraction of each true top-k list that was also returned."""
+    if not truth:
+        return 1.0
+    return float(np.mean([len(set(t) & set(f)) / max(len(t), 1) for t, f in zip(truth, found)]))
@@ -0,0 +1,115 @@
+from concurrent.futures import Future
+from typing import Any, Dict, List, Tuple
+import threading
+import logging
+import queue
+import time
+import os
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BATCH = int(os.environ.get("NOTATE_QUERY_BATCH_SIZE", "32"))
+DEFAULT_MAX_WAIT_MS = float(os.environ.get("NOTATE_QUERY_BATCH_WAIT_MS", "3"))
+
+
+class QueryBatcher:
+    """
+    Micro-batches concurrent query embeddings for one embedding model.
+    A worker thread takes the first waiting query, gathers whatever else
+    arrives within max_wait_ms (up to max_batch), encodes them in one
+    embed_documents call and resolves each caller's future. While there is
+    no concurrency it skips the wait, so a lone query is not delayed.
+    """
+
+    def __init__(self, max_batch: int = DEFAULT_MAX_BATCH, max_wait_ms: float = DEFAULT_MAX_WAIT_MS):
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max_wait_ms / 1000
+        # Items carry their embeddings so the batcher never pins an evicted model
+        self._queue: "queue.Queue[Tuple[Any, str, Future]]" = queue.Queue()
+        self._last_batch = 1
+        self.batches = 0
+        self.queries = 0
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    def submit(self, embeddings, text: str) -> Future:
+        future: Future = Future()
+        self._queue.put((embeddings, text, future))
+        return future
+
+    def embed_query(self, embeddings, text: str) -> List[float]:
+        return self.submit(embeddings, text).result()
+
+    def _collect(self) -> List[Tuple[Any, str, Future]]:
+        batch = [self._queue.get()]
+        # Only linger for company when the previous round had some
+        deadline = time.monotonic() + (self.max_wait if self._last_batch > 1 else 0)
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0
+                             else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect()
+            self._last_batch = len(batch)
+            # Identical texts in one batch are encoded once
+            unique = list(dict.fromkeys(text for _, text, _ in batch))
+            embeddings = batch[0][0]
+            try:
+                vectors = dict(zip(unique, embeddings.embed_documents(unique)))
+                for _, text, future in batch:
+                    future.set_result(vectors[text])
+            except BaseException as e:
+                logger.error(f"Error embedding query batch: {str(e)}")
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+            self.batches += 1
+            self.queries += len(batch)
+            del batch, embeddings
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "batches": self.batches,
+            "queries": self.queries,
+            "mean_batch_size": round(self.queries / self.batches, 2) if self.batches else 0.0,
+            "max_batch": self.max_batch,
+            "max_wait_ms": self.max_wait * 1000,
+        }
+
+
+class QueryBatchers:
+    """
+    One batcher per local (registry-owned) embedding model, created on first
+    use. Remote embedding clients carry per-user API keys and are called
+    directly instead.
+    """
+
+    def __init__(self):
+        self._batchers: Dict[Any, QueryBatcher] = {}
+        self._lock = threading.Lock()
+
+    def embed_query(self, embeddings, text: str) -> List[float]:
+        key = getattr(embeddings, "key", None)
+        if key is None:
+            return embeddings.embed_query(text)
+        with self._lock:
+            batcher = self._batchers.get(key)
+            if batcher is None:
+                batcher = QueryBatcher()
+                self._batchers[key] = batcher
+        # Bypass the document disk cache wrapper; queries are cached in memory
+        return batcher.embed_query(getattr(embeddings, "embeddings", embeddings), text)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {str(key[0]): batcher.stats() for key, batcher in self._batchers.items()}
+
+
+# Global query batchers instance
+query_batchers = QueryBatchers()
@@ -0,0 +1,151 @@
+from src.vectorstorage.embedding_cache import get_model_id
+from src.vectorstorage.query_batcher import query_batchers
+from collections import OrderedDict, deque
+from typing import Any, Callable, Dict, Hashable, List, Optional
+import threading
+import json
+import os
+
+DEFAULT_QUERY_EMBEDDINGS = int(os.environ.get("NOTATE_QUERY_EMBEDDING_CACHE_SIZE", "4096"))
+DEFAULT_QUERY_RESULTS = int(os.environ.get("NOTATE_QUERY_RESULT_CACHE_SIZE", "1024"))
+LATENCY_WINDOW = 1000
+
+
+class LRUCache:
+    """Thread-safe LRU mapping with hit/miss counters."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            return None
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def discard(self, predicate: Callable[[Hashable], bool]) -> None:
+        with self._lock:
+            for key in [key for key in self._entries if predicate(key)]:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+class LatencyStats:
+    """Rolling window of query latencies, split by cache hit and miss."""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self._samples = {"hit": deque(maxlen=window), "miss": deque(maxlen=window)}
+        self._lock = threading.Lock()
+
+    def record(self, hit: bool, seconds: float) -> None:
+        with self._lock:
+            self._samples["hit" if hit else "miss"].append(seconds * 1000)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            result = {}
+            for kind, samples in self._samples.items():
+                ordered = sorted(samples)
+                result[kind] = {
+                    "count": len(ordered),
+                    "mean_ms": round(sum(ordered) / len(ordered), 3) if ordered else None,
+                    "p95_ms": round(ordered[int(0.95 * (len(ordered) - 1))], 3) if ordered else None,
+                }
+            return result
+
+
+class QueryCache:
+    """
+    In-memory caches for the query path: query embeddings keyed by
+    (model, text), and search results keyed by collection, generation, query
+    and search options. Any write to a collection bumps its generation, so
+    earlier results for it can no longer be returned.
+    """
+
+    def __init__(self, max_embeddings: int = DEFAULT_QUERY_EMBEDDINGS, max_results: int = DEFAULT_QUERY_RESULTS):
+        self.embeddings = LRUCache(max_embeddings)
+        self.results = LRUCache(max_results)
+        self.latency = LatencyStats()
+        self._generations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def generation(self, collection_name: str) -> int:
+        with self._lock:
+            return self._generations.get(collection_name, 0)
+
+    def bump(self, collection_name: str) -> int:
+        with self._lock:
+            generation = self._generations.get(collection_name, 0) + 1
+            self._generations[collection_name] = generation
+        # Old generations can never hit again; free their memory now
+        self.results.discard(lambda key: key[0] == collection_name and key[1] < generation)
+        return generation
+
+    def embed_query(self, embeddings, text: str) -> List[float]:
+        key = (get_model_id(embeddings), text)
+        vector = self.embeddings.get(key)
+        if vector is None:
+            vector = query_batchers.embed_query(embeddings, text)
+            self.embeddings.set(key, vector)
+        return vector
+
+    def embed_queries(self, embeddings, texts: List[str]) -> List[List[float]]:
+        """Embed many queries at once; uncached texts share one encoder call."""
+        model = get_model_id(embeddings)
+        vectors = {text: self.embeddings.get((model, text)) for text in dict.fromkeys(texts)}
+        missing = [text for text, vector in vectors.items() if vector is None]
+        if missing:
+            encoder = getattr(embeddings, "embeddings", embeddings)
+            for text, vector in zip(missing, encoder.embed_documents(missing)):
+                vectors[text] = vector
+                self.embeddings.set((model, text), vector)
+        return [vectors[text] for text in texts]
+
+    def result_key(self, collection_name: str, query: str, top_k: int, **options: Any) -> tuple:
+        return (collection_name, self.generation(collection_name), query, top_k,
+                json.dumps(options, sort_keys=True, default=str))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "query_embeddings": self.embeddings.stats(),
+            "results": self.results.stats(),
+            "latency": self.latency.stats(),
+            "query_batching": query_batchers.stats(),
+        }
+
+    def clear(self) -> None:
+        self.embeddings.clear()
+        self.results.clear()
+
+
+# Global query cache instance
+query_cache = QueryCache()
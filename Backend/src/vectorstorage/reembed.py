@@ -0,0 +1,86 @@
+from src.vectorstorage.collection_settings import collection_settings
+from src.vectorstorage.chroma_pool import chroma_pool
+from src.vectorstorage.embedding_cache import CachedEmbeddings
+from src.vectorstorage.embedding_registry import embedding_registry
+from src.vectorstorage.flat_index import flat_index_store
+from src.vectorstorage.hnsw_settings import staging_metadata, swap_collection
+from src.vectorstorage.vectorstore import chroma_db_path, embedding_cache
+from src.vectorstorage.query_cache import query_cache
+from typing import Iterator, Optional
+import threading
+import logging
+import time
+import uuid
+import os
+
+logger = logging.getLogger(__name__)
+
+REEMBED_BATCH_SIZE = int(os.environ.get("NOTATE_REEMBED_BATCH_SIZE", "64"))
+# Fraction of wall time the re-embed may spend encoding; the rest is left
+# idle so queries against the live collection keep their latency
+REEMBED_DUTY_CYCLE = float(os.environ.get("NOTATE_REEMBED_DUTY_CYCLE", "0.5"))
+
+
+def reembed_collection(collection_name: str, model_name: str, embedding_backend: Optional[str] = None,
+                       cancel_event: Optional[threading.Event] = None,
+                       batch_size: int = REEMBED_BATCH_SIZE,
+                       duty_cycle: float = REEMBED_DUTY_CYCLE) -> Iterator[dict]:
+    """
+    Re-embed every chunk of a collection with a local model into a staging
+    collection while the original keeps serving queries, then swap it in
+    under the original name and record the new model in the collection's
+    settings in the same step. Texts, ids and metadata are copied unchanged.
+    """
+    embeddings = CachedEmbeddings(embedding_registry.get(model_name, backend=embedding_backend), embedding_cache)
+    client = chroma_pool.get_client(chroma_db_path)
+    source = client.get_collection(collection_name)
+    count = source.count()
+    staging_name = f"reembed-{uuid.uuid4().hex[:16]}"
+    target = client.create_collection(staging_name, metadata=staging_metadata(source, collection_name))
+    duty_cycle = min(max(duty_cycle, 0.05), 1.0)
+    began = time.time()
+    done = 0
+    try:
+        for offset in range(0, count, batch_size):
+            if cancel_event is not None and cancel_event.is_set():
+                client.delete_collection(staging_name)
+                yield {"status": "cancelled", "message": "Re-embedding cancelled"}
+                return
+            busy = time.time()
+            page = source.get(include=["documents", "metadatas"], limit=batch_size, offset=offset)
+            if not page["ids"]:
+                break
+            vectors = embeddings.embed_documents([text or "" for text in page["documents"]])
+            target.add(ids=page["ids"], embeddings=vectors, documents=page["documents"],
+                       metadatas=[item or None for item in page["metadatas"]])
+            done += len(page["ids"])
+            elapsed = time.time() - began
+            yield {"status": "progress", "data": {
+                "message": f"Re-embedded {done}/{count} chunks",
+                "chunk": done,
+                "total_chunks": count,
+                "percent_complete": f"{done / max(count, 1) * 100:.1f}%",
+                "est_remaining_time": time.strftime('%H:%M:%S', time.gmtime((count - done) * elapsed / done))
+            }}
+            pause = (time.time() - busy) * (1 - duty_cycle) / duty_cycle
+            if pause > 0:
+                if cancel_event is not None:
+                    cancel_event.wait(pause)
+                else:
+                    time.sleep(pause)
+    except Exception:
+        client.delete_collection(staging_name)
+        raise
+
+    def record_model():
+        collection_settings.update(collection_name, embedding_model=model_name,
+                                   embedding_backend=embedding_backend or "")
+        # Vectors changed (possibly their dimension); the lexical index still matches
+        flat_index_store.drop(collection_name)
+        query_cache.bump(collection_name)
+
+    # Queries resolve the model and the collection together, so none embeds
+    # with the old model against the new vectors
+    swap_collection(client, source, target, collection_name, record_model)
+    logger.info(f"Re-embedded {collection_name} with {model_name}: {done} chunks in {time.time() - began:.1f}s")
+    yield {"status": "success", "message": f"Re-embedded {done} chunks with {model_name}"}
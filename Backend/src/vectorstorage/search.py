@@ -0,0 +1,336 @@
+from src.vectorstorage.collection_settings import collection_settings
+from src.vectorstorage.flat_index import flat_index_store, normalize
+from src.vectorstorage.lexical_index import lexical_index_store
+from src.vectorstorage.chroma_pool import chroma_pool
+from src.vectorstorage.vectorstore import chroma_db_path
+from src.vectorstorage.embedding_cache import get_model_id
+from src.vectorstorage.query_cache import query_cache
+from src.vectorstorage.embedding_registry import embedding_registry
+from langchain_core.documents import Document
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+import numpy as np
+import logging
+import heapq
+import time
+import os
+
+logger = logging.getLogger(__name__)
+
+# "auto": exact flat search below the size threshold, HNSW above it;
+# "flat": always exact; "hnsw": always Chroma's index
+VECTOR_ENGINES = ("auto", "flat", "hnsw")
+DEFAULT_VECTOR_ENGINE = os.environ.get("NOTATE_VECTOR_ENGINE", "auto")
+
+# "hybrid" fuses BM25 and vector rankings with reciprocal-rank fusion
+SEARCH_MODES = ("vector", "hybrid", "lexical")
+RRF_K = 60
+HYBRID_OVERFETCH = 4
+LEXICAL_FILTER_OVERFETCH = 10
+
+# Multi-collection queries: each collection must answer within the deadline
+COLLECTION_TIMEOUT = float(os.environ.get("NOTATE_COLLECTION_TIMEOUT", "10"))
+collection_pool = ThreadPoolExecutor(
+    max_workers=int(os.environ.get("NOTATE_COLLECTION_THREADS", "8")), thread_name_prefix="collection-query")
+
+# Batch queries: texts encoded per window, then searched on the worker pool
+BATCH_WINDOW = int(os.environ.get("NOTATE_BATCH_QUERY_WINDOW", "256"))
+batch_pool = ThreadPoolExecutor(
+    max_workers=int(os.environ.get("NOTATE_BATCH_QUERY_THREADS", "4")), thread_name_prefix="batch-query")
+
+# Candidates fetched per requested result when a cross-encoder re-ranks them
+RERANK_OVERFETCH = int(os.environ.get("NOTATE_RERANK_OVERFETCH", "4"))
+RERANK_MIN_CANDIDATES = 20
+RERANK_MAX_CANDIDATES = 100
+
+# Candidates fetched per requested result when MMR diversifies them
+MMR_OVERFETCH = int(os.environ.get("NOTATE_MMR_OVERFETCH", "4"))
+MMR_MIN_CANDIDATES = 20
+
+# Runs the vector half of a hybrid query alongside the lexical half
+retrieval_pool = ThreadPoolExecutor(
+    max_workers=int(os.environ.get("NOTATE_RETRIEVAL_THREADS", "8")), thread_name_prefix="retrieval")
+
+
+def get_vector_engine(collection_name: str) -> str:
+    return collection_settings.get(collection_name).get("vector_engine") or DEFAULT_VECTOR_ENGINE
+
+
+def get_quantization(collection_name: str) -> str:
+    return collection_settings.get(collection_name).get("quantization") or "none"
+
+
+def apply_quantization(collection_name: str, mode: str, k: int = 10) -> Dict[str, Any]:
+    """
+    Switch a collection's flat index to a quantization mode and report the
+    memory reduction and recall@k measured against exact float search.
+    """
+    collection = chroma_pool.get_client(chroma_db_path).get_collection(collection_name)
+    index = flat_index_store.synced(collection, mode)
+    return index.evaluate(k)
+
+
+def fetch_documents(collection, hits: Sequence[Tuple[str, float]], where: Optional[Dict] = None,
+                    where_document: Optional[Dict] = None) -> List[Tuple[Document, float]]:
+    """
+    Load documents for (id, score) hits from Chroma, keeping the hit order.
+    Hits that don't match the where / where_document filters are dropped.
+    """
+    if not hits:
+        return []
+    result = collection.get(ids=[doc_id for doc_id, _ in hits], where=where or None,
+                            where_document=where_document or None, include=["documents", "metadatas"])
+    found = {doc_id: (text, metadata) for doc_id, text, metadata in
+             zip(result["ids"], result["documents"], result["metadatas"])}
+    return [(Document(id=doc_id, page_content=found[doc_id][0] or "", metadata=found[doc_id][1] or {}), score)
+            for doc_id, score in hits if doc_id in found]
+
+
+def matching_ids(collection, where: Optional[Dict] = None, where_document: Optional[Dict] = None) -> List[str]:
+    """Ids of the chunks matching the filters, evaluated by Chroma's metadata index."""
+    return collection.get(where=where or None, where_document=where_document or None, include=[])["ids"]
+
+
+def similarity_search_by_vector(vectordb, collection_name: str, query_vector: List[float], k: int,
+                                where: Optional[Dict] = None, where_document: Optional[Dict] = None) -> List[Tuple[Document, float]]:
+    """
+    Top-k (document, cosine similarity) through the collection's vector engine.
+    Filters go to Chroma: HNSW queries take them directly, flat search is
+    restricted to the ids Chroma matches.
+    """
+    engine = get_vector_engine(collection_name)
+    if engine != "hnsw":
+        try:
+            allowed = matching_ids(vectordb._collection, where, where_document) if where or where_document else None
+            hits = flat_index_store.search(
+                vectordb._collection, query_vector, k, max_vectors=None if engine == "flat" else -1,
+                quantization=get_quantization(collection_name), allowed=allowed)
+            if hits is not None:
+                return fetch_documents(vectordb._collection, hits)
+        except Exception as e:
+            logger.warning(f"Flat search failed for {collection_name}, using HNSW: {str(e)}")
+    return hnsw_search(vectordb._collection, query_vector, k, where, where_document)
+
+
+def distance_to_similarity(distance: float, space: str) -> float:
+    """Convert a Chroma distance to cosine similarity (vectors are normalized)."""
+    if space == "l2":
+        # Chroma reports squared L2: |a - b|^2 = 2 - 2cos for unit vectors
+        return 1.0 - distance / 2.0
+    return 1.0 - distance
+
+
+def hnsw_search(collection, query_vector: List[float], k: int, where: Optional[Dict] = None,
+                where_document: Optional[Dict] = None) -> List[Tuple[Document, float]]:
+    result = collection.query(query_embeddings=[list(query_vector)], n_results=k,
+                              where=where or None, where_document=where_document or None,
+                              include=["documents", "metadatas", "distances"])
+    space = (collection.metadata or {}).get("hnsw:space", "l2")
+    return [(Document(id=doc_id, page_content=text or "", metadata=metadata or {}),
+             distance_to_similarity(distance, space))
+            for doc_id, text, metadata, distance in
+            zip(result["ids"][0], result["documents"][0], result["metadatas"][0], result["distances"][0])]
+
+
+def lexical_search(collection, query: str, k: int, where: Optional[Dict] = None,
+                   where_document: Optional[Dict] = None) -> Optional[List[Tuple[Document, float]]]:
+    """
+    Top-k (document, BM25 score) from the collection's inverted index, or
+    None while that index is being rebuilt in the background.
+    """
+    if not where and not where_document:
+        hits = lexical_index_store.search(collection, query, k)
+        return None if hits is None else fetch_documents(collection, hits)
+    # BM25 has no metadata; over-fetch and let Chroma drop non-matching chunks
+    hits = lexical_index_store.search(collection, query, max(k * LEXICAL_FILTER_OVERFETCH, 100))
+    return None if hits is None else fetch_documents(collection, hits, where, where_document)[:k]
+
+
+def reciprocal_rank_fusion(rankings: Sequence[List[Tuple[Document, float]]], k: int,
+                           rrf_k: int = RRF_K) -> List[Tuple[Document, float]]:
+    """Merge ranked lists by summing 1 / (rrf_k + rank); the fused score is returned."""
+    scores: Dict[str, float] = {}
+    documents: Dict[str, Document] = {}
+    for ranking in rankings:
+        for rank, (doc, _) in enumerate(ranking, start=1):
+            scores[doc.id] = scores.get(doc.id, 0.0) + 1.0 / (rrf_k + rank)
+            documents.setdefault(doc.id, doc)
+    best = sorted(scores, key=scores.get, reverse=True)[:k]
+    return [(documents[doc_id], scores[doc_id]) for doc_id in best]
+
+
+def hybrid_search(vectordb, collection_name: str, query: str, k: int, where: Optional[Dict] = None,
+                  where_document: Optional[Dict] = None) -> List[Tuple[Document, float]]:
+    """Run vector and BM25 retrieval in parallel and fuse their rankings."""
+    candidates = max(k * HYBRID_OVERFETCH, 20)
+    vector = retrieval_pool.submit(
+        lambda: similarity_search_by_vector(
+            vectordb, collection_name, query_cache.embed_query(vectordb.embeddings, query), candidates,
+            where, where_document))
+    try:
+        # Vector-only while the lexical index is rebuilt
+        lexical = lexical_search(vectordb._collection, query, candidates, where, where_document) or []
+    except Exception as e:
+        logger.warning(f"Lexical search failed for {collection_name}: {str(e)}")
+        lexical = []
+    return reciprocal_rank_fusion([vector.result(), lexical], k)
+
+
+def rerank_candidates(k: int) -> int:
+    return min(max(k * RERANK_OVERFETCH, RERANK_MIN_CANDIDATES), max(k, RERANK_MAX_CANDIDATES))
+
+
+def rerank(query: str, results: List[Tuple[Document, float]], k: int,
+           model_name: Optional[str] = None) -> List[Tuple[Document, float]]:
+    """Re-order candidates by cross-encoder relevance; the model's score is returned."""
+    reranker = embedding_registry.get_reranker(model_name)
+    scores = reranker.score(query, [doc.page_content for doc, _ in results])
+    order = sorted(range(len(results)), key=lambda i: scores[i], reverse=True)[:k]
+    return [(results[i][0], scores[i]) for i in order]
+
+
+def maximal_marginal_relevance(relevance: np.ndarray, vectors: np.ndarray, k: int, diversity: float) -> List[int]:
+    """
+    Indices of k candidates picked greedily by MMR: (1 - diversity) *
+    relevance - diversity * max similarity to the already picked ones.
+    One similarity matrix is computed up front and the running max is
+    updated with a single row per pick.
+    """
+    k = min(k, len(relevance))
+    if k <= 0:
+        return []
+    unit = normalize(vectors)
+    similarity = unit @ unit.T
+    gains = (1.0 - diversity) * np.asarray(relevance, dtype=np.float32)
+    picked = [int(np.argmax(gains))]
+    redundancy = similarity[picked[0]].copy()
+    available = np.ones(len(gains), dtype=bool)
+    available[picked[0]] = False
+    for _ in range(k - 1):
+        scores = np.where(available, gains - diversity * redundancy, -np.inf)
+        pick = int(np.argmax(scores))
+        picked.append(pick)
+        available[pick] = False
+        np.maximum(redundancy, similarity[pick], out=redundancy)
+    return picked
+
+
+def diversify(collection, results: List[Tuple[Document, float]], k: int,
+              diversity: float) -> List[Tuple[Document, float]]:
+    """Re-order ranked results with MMR; scores are min-max scaled for relevance."""
+    if len(results) <= 1:
+        return results[:k]
+    found = collection.get(ids=[doc.id for doc, _ in results], include=["embeddings"])
+    vectors = dict(zip(found["ids"], found["embeddings"]))
+    results = [(doc, score) for doc, score in results if doc.id in vectors]
+    scores = np.array([score for _, score in results], dtype=np.float32)
+    spread = float(scores.max() - scores.min()) if len(scores) else 0.0
+    relevance = (scores - scores.min()) / spread if spread > 0 else np.ones_like(scores)
+    matrix = np.array([vectors[doc.id] for doc, _ in results], dtype=np.float32)
+    return [results[i] for i in maximal_marginal_relevance(relevance, matrix, k, diversity)]
+
+
+def retrieve(vectordb, collection_name: str, query: str, k: int, mode: str, where: Optional[Dict] = None,
+             where_document: Optional[Dict] = None) -> List[Tuple[Document, float]]:
+    if mode == "hybrid":
+        return hybrid_search(vectordb, collection_name, query, k, where, where_document)
+    if mode == "lexical":
+        results = lexical_search(vectordb._collection, query, k, where, where_document)
+        if results is not None:
+            return results
+        # The lexical index is being rebuilt; answer from the vector index meanwhile
+    query_vector = query_cache.embed_query(vectordb.embeddings, query)
+    return similarity_search_by_vector(vectordb, collection_name, query_vector, k, where, where_document)
+
+
+def similarity_search(vectordb, collection_name: str, query: str, k: int, mode: str = "vector",
+                      rerank_model: Optional[str] = None, where: Optional[Dict] = None,
+                      where_document: Optional[Dict] = None, diversity: Optional[float] = None) -> List[Tuple[Document, float]]:
+    """
+    Cached text search: repeated queries skip both the encoder and the index.
+    With a rerank_model, over-fetched candidates are re-scored by that
+    cross-encoder and the scores returned are its relevance scores.
+    where / where_document are Chroma filters applied before ranking.
+    diversity (0-1) re-orders over-fetched candidates with MMR.
+    """
+    if mode not in SEARCH_MODES:
+        raise ValueError(f"Unknown search mode: {mode}")
+    if diversity is not None and not 0.0 <= diversity <= 1.0:
+        raise ValueError("diversity must be between 0 and 1")
+    began = time.perf_counter()
+    key = query_cache.result_key(
+        collection_name, query, k, mode=mode, rerank=rerank_model,
+        where=where or None, where_document=where_document or None, diversity=diversity or None,
+        model=get_model_id(vectordb.embeddings),
+        engine=get_vector_engine(collection_name),
+        quantization=get_quantization(collection_name))
+    results = query_cache.results.get(key)
+    hit = results is not None
+    if not hit:
+        fetch = k
+        if rerank_model:
+            fetch = rerank_candidates(k)
+        if diversity:
+            fetch = max(fetch, k * MMR_OVERFETCH, MMR_MIN_CANDIDATES)
+        results = retrieve(vectordb, collection_name, query, fetch, mode, where, where_document)
+        if rerank_model:
+            results = rerank(query, results, len(results) if diversity else k, rerank_model)
+        if diversity:
+            results = diversify(vectordb._collection, results, k, diversity)
+        query_cache.results.set(key, results)
+    query_cache.latency.record(hit, time.perf_counter() - began)
+    return list(results)
+
+
+def search_collections(searches: Dict[str, Callable[[], List[Tuple[Document, float]]]], k: int,
+                       timeout: Optional[float] = None) -> Tuple[List[Tuple[str, Document, float]], Dict[str, str]]:
+    """
+    Run one search per collection concurrently and merge the hits into a
+    global top-k of (collection, document, score). Collections that fail or
+    miss the deadline are returned in the error map instead of stalling the
+    response.
+    """
+    futures = {name: collection_pool.submit(search) for name, search in searches.items()}
+    done, _ = wait(futures.values(), timeout=timeout or COLLECTION_TIMEOUT)
+    hits: List[Tuple[str, Document, float]] = []
+    errors: Dict[str, str] = {}
+    for name, future in futures.items():
+        if future not in done:
+            # Queued searches are dropped; running ones finish and warm the cache
+            future.cancel()
+            errors[name] = "timeout"
+            continue
+        try:
+            hits.extend((name, doc, score) for doc, score in future.result())
+        except Exception as e:
+            logger.warning(f"Search failed for {name}: {str(e)}")
+            errors[name] = str(e)
+    return heapq.nlargest(k, hits, key=lambda hit: hit[2]), errors
+
+
+def batch_search(vectordb, collection_name: str, queries: Iterable[str], k: int, mode: str = "vector",
+                 window: int = BATCH_WINDOW, **options: Any) -> Iterator[Tuple[str, Any]]:
+    """
+    Search many queries and yield (query, results or exception) in input
+    order. Queries are taken one window at a time: the window's texts are
+    encoded in a single batch, then searched on the batch pool, so memory
+    stays bounded by the window rather than the whole batch.
+    """
+    def search(query: str) -> Any:
+        try:
+            return similarity_search(vectordb, collection_name, query, k, mode, **options)
+        except Exception as e:
+            return e
+
+    queries = iter(queries)
+    while True:
+        texts = [query for _, query in zip(range(window), queries)]
+        if not texts:
+            return
+        if mode != "lexical":
+            try:
+                query_cache.embed_queries(vectordb.embeddings, texts)
+            except Exception as e:
+                # Fall back to per-query encoding so one bad text doesn't fail the window
+                logger.warning(f"Batch query encoding failed: {str(e)}")
+        yield from zip(texts, batch_pool.map(search, texts))
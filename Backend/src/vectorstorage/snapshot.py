@@ -0,0 +1,295 @@
+from src.jobs.journal import ingest_journal
+from src.vectorstorage.collection_settings import collection_settings
+from src.vectorstorage.chroma_pool import chroma_pool
+from src.vectorstorage.flat_index import flat_index_store
+from src.vectorstorage.hnsw_settings import BULK_LOAD_PARAMS, active_hnsw, swap_collection
+from src.vectorstorage.lexical_index import lexical_index_store
+from src.vectorstorage.manifest import collection_manifest
+from src.vectorstorage.vectorstore import chroma_db_path, get_app_data_dir
+from src.vectorstorage.query_cache import query_cache
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import numpy as np
+import threading
+import tempfile
+import logging
+import shutil
+import struct
+import json
+import time
+import uuid
+import os
+
+logger = logging.getLogger(__name__)
+
+snapshot_dir = os.path.join(get_app_data_dir(), "snapshots")
+
+# File layout: magic, little-endian u64 header length, JSON header, then
+# 64-byte aligned columns. "vectors" is a (count, dimension) matrix; each
+# text column is a UTF-8 blob plus a u64 offsets array of count + 1 entries
+SNAPSHOT_MAGIC = b"NOTSNAP1"
+SNAPSHOT_VERSION = 1
+SNAPSHOT_DTYPES = ("float16", "float32")
+SNAPSHOT_ALIGN = 64
+TEXT_COLUMNS = ("ids", "documents", "metadatas")
+EXPORT_PAGE_SIZE = 5000
+IMPORT_PAGE_SIZE = 5000
+
+
+def _aligned(offset: int) -> int:
+    return -(-offset // SNAPSHOT_ALIGN) * SNAPSHOT_ALIGN
+
+
+class SnapshotWriter:
+    """
+    Streams pages of a collection into one spill file per column, then
+    lays the columns out after the header in a single file. Memory use is
+    one page plus the offsets arrays.
+    """
+
+    def __init__(self, path: str, dtype: str = "float16"):
+        if dtype not in SNAPSHOT_DTYPES:
+            raise ValueError(f"Unknown snapshot dtype: {dtype}")
+        self.path = path
+        self.dtype = np.dtype(dtype)
+        self.count = 0
+        self.dimension: Optional[int] = None
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._spill_dir = tempfile.mkdtemp(prefix=".snapshot-", dir=os.path.dirname(path) or ".")
+        self._files = {name: open(os.path.join(self._spill_dir, name), "wb")
+                       for name in ("vectors",) + TEXT_COLUMNS}
+        self._offsets: Dict[str, List[np.ndarray]] = {name: [np.zeros(1, dtype=np.uint64)] for name in TEXT_COLUMNS}
+
+    def add(self, ids: List[str], vectors, documents: List[Optional[str]],
+            metadatas: List[Optional[Dict[str, Any]]]) -> None:
+        if not len(ids):
+            return
+        matrix = np.asarray(vectors, dtype=np.float32)
+        if self.dimension is None:
+            self.dimension = int(matrix.shape[1])
+        elif matrix.shape[1] != self.dimension:
+            raise ValueError(f"Vector dimension changed from {self.dimension} to {matrix.shape[1]}")
+        matrix.astype(self.dtype).tofile(self._files["vectors"])
+        columns = {
+            "ids": list(ids),
+            "documents": [text or "" for text in documents],
+            # An empty entry stands for no metadata
+            "metadatas": [json.dumps(item) if item else "" for item in metadatas],
+        }
+        for name, values in columns.items():
+            encoded = [value.encode("utf-8") for value in values]
+            self._files[name].write(b"".join(encoded))
+            lengths = np.fromiter((len(value) for value in encoded), dtype=np.uint64, count=len(encoded))
+            self._offsets[name].append(self._offsets[name][-1][-1] + np.cumsum(lengths, dtype=np.uint64))
+        self.count += len(ids)
+
+    def finish(self, header: Dict[str, Any]) -> str:
+        """Write the snapshot file and return its path."""
+        for f in self._files.values():
+            f.close()
+        sources: List[Tuple[str, Any]] = [("vectors", os.path.join(self._spill_dir, "vectors"))]
+        columns = {"vectors": {"dtype": self.dtype.name, "shape": [self.count, self.dimension or 0]}}
+        for name in TEXT_COLUMNS:
+            offsets = np.concatenate(self._offsets[name])
+            sources.append((f"{name}.offsets", offsets))
+            columns[f"{name}.offsets"] = {"dtype": "uint64", "shape": [len(offsets)]}
+            sources.append((name, os.path.join(self._spill_dir, name)))
+            columns[name] = {"dtype": "uint8", "shape": [int(offsets[-1])]}
+        position = 0
+        for name, _ in sources:
+            spec = columns[name]
+            spec["offset"] = position
+            position = _aligned(position + int(np.prod(spec["shape"])) * np.dtype(spec["dtype"]).itemsize)
+        header = {**header, "version": SNAPSHOT_VERSION, "count": self.count,
+                  "dimension": self.dimension, "columns": columns}
+        encoded_header = json.dumps(header).encode("utf-8")
+
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "wb") as out:
+            out.write(SNAPSHOT_MAGIC + struct.pack("<Q", len(encoded_header)) + encoded_header)
+            data_start = _aligned(out.tell())
+            for name, source in sources:
+                out.seek(data_start + columns[name]["offset"])
+                if isinstance(source, np.ndarray):
+                    source.tofile(out)
+                else:
+                    with open(source, "rb") as f:
+                        shutil.copyfileobj(f, out, 16 * 1024 * 1024)
+            out.truncate(data_start + position)
+        os.replace(tmp_path, self.path)
+        shutil.rmtree(self._spill_dir, ignore_errors=True)
+        return self.path
+
+    def abort(self) -> None:
+        for f in self._files.values():
+            f.close()
+        shutil.rmtree(self._spill_dir, ignore_errors=True)
+
+
+class Snapshot:
+    """Read-only view of a snapshot file; every column is memory-mapped."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            if f.read(len(SNAPSHOT_MAGIC)) != SNAPSHOT_MAGIC:
+                raise ValueError(f"Not a collection snapshot: {path}")
+            (length,) = struct.unpack("<Q", f.read(8))
+            self.header: Dict[str, Any] = json.loads(f.read(length))
+        if self.header.get("version") != SNAPSHOT_VERSION:
+            raise ValueError(f"Unsupported snapshot version: {self.header.get('version')}")
+        self._data_start = _aligned(len(SNAPSHOT_MAGIC) + 8 + length)
+        self.count: int = self.header["count"]
+        self.dimension: Optional[int] = self.header["dimension"]
+        self.vectors = self._column("vectors")
+        self._text = {name: (self._column(f"{name}.offsets"), self._column(name)) for name in TEXT_COLUMNS}
+
+    def _column(self, name: str) -> np.ndarray:
+        spec = self.header["columns"][name]
+        shape = tuple(spec["shape"])
+        if not int(np.prod(shape)):
+            return np.empty(shape, dtype=spec["dtype"])
+        return np.memmap(self.path, dtype=spec["dtype"], mode="r",
+                         offset=self._data_start + spec["offset"], shape=shape)
+
+    def text(self, name: str, start: int, stop: int) -> List[str]:
+        offsets, blob = self._text[name]
+        bounds = offsets[start:stop + 1].astype(np.int64)
+        if not len(bounds):
+            return []
+        data = blob[bounds[0]:bounds[-1]].tobytes()
+        bounds -= bounds[0]
+        return [data[a:b].decode("utf-8") for a, b in zip(bounds[:-1], bounds[1:])]
+
+    def page(self, start: int, stop: int) -> Dict[str, Any]:
+        stop = min(stop, self.count)
+        return {
+            "ids": self.text("ids", start, stop),
+            "embeddings": np.asarray(self.vectors[start:stop], dtype=np.float32),
+            "documents": self.text("documents", start, stop),
+            "metadatas": [json.loads(item) if item else None for item in self.text("metadatas", start, stop)],
+        }
+
+
+def default_snapshot_path(collection_name: str) -> str:
+    return os.path.join(snapshot_dir, f"{collection_name}-{time.strftime('%Y%m%d-%H%M%S')}.notate-snapshot")
+
+
+def export_collection(collection_name: str, file_path: Optional[str] = None, dtype: str = "float16",
+                      embedding_model: Optional[str] = None,
+                      cancel_event: Optional[threading.Event] = None) -> Iterator[dict]:
+    """
+    Write a collection's ids, texts, metadata and stored vectors to one
+    snapshot file, together with its Chroma metadata and backend settings.
+    """
+    file_path = file_path or default_snapshot_path(collection_name)
+    client = chroma_pool.get_client(chroma_db_path)
+    collection = client.get_collection(collection_name)
+    count = collection.count()
+    settings = collection_settings.get(collection_name)
+    writer = SnapshotWriter(file_path, dtype)
+    began = time.time()
+    try:
+        for offset in range(0, count, EXPORT_PAGE_SIZE):
+            if cancel_event is not None and cancel_event.is_set():
+                writer.abort()
+                yield {"status": "cancelled", "message": "Export cancelled"}
+                return
+            page = collection.get(include=["embeddings", "documents", "metadatas"],
+                                  limit=EXPORT_PAGE_SIZE, offset=offset)
+            if not page["ids"]:
+                break
+            writer.add(page["ids"], page["embeddings"], page["documents"], page["metadatas"])
+            yield {"status": "progress", "data": {
+                "message": f"Exported {writer.count}/{count} chunks",
+                "chunk": writer.count,
+                "total_chunks": count,
+                "percent_complete": f"{writer.count / max(count, 1) * 100:.1f}%"
+            }}
+        writer.finish({
+            "collection": collection_name,
+            "metadata": collection.metadata or {},
+            "settings": settings,
+            "embedding_model": settings.get("embedding_model") or embedding_model,
+            "created_at": time.time(),
+        })
+    except Exception:
+        writer.abort()
+        raise
+    size = os.path.getsize(file_path)
+    logger.info(f"Exported {collection_name}: {writer.count} chunks, {size} bytes in {time.time() - began:.1f}s")
+    yield {"status": "success", "message": f"Exported {writer.count} chunks",
+           "data": {"message": f"Exported {writer.count} chunks", "file_path": file_path, "bytes": size}}
+
+
+def import_collection(file_path: str, collection_name: str, overwrite: bool = False, flat_index: bool = True,
+                      cancel_event: Optional[threading.Event] = None) -> Iterator[dict]:
+    """
+    Load a snapshot into a collection without embedding anything: vectors
+    are bulk-added to a staging collection that then takes the target's
+    name. With flat_index, the flat index is seeded from the snapshot too
+    so the first query doesn't rebuild it from Chroma.
+
+    The collection is created with the bulk-load batch_size and
+    sync_threshold, and Chroma keeps them for its lifetime; compacting it
+    applies the configured HNSW parameters. The result reports the active
+    ones.
+    """
+    snapshot = Snapshot(file_path)
+    client = chroma_pool.get_client(chroma_db_path)
+    existing = None
+    if collection_name in [str(name) for name in client.list_collections()]:
+        if not overwrite:
+            raise ValueError(f"Collection {collection_name} already exists")
+        existing = client.get_collection(collection_name)
+
+    settings = dict(snapshot.header.get("settings") or {})
+    if snapshot.header.get("embedding_model"):
+        settings["embedding_model"] = snapshot.header["embedding_model"]
+    source_metadata = snapshot.header.get("metadata") or {}
+    metadata = {key: value for key, value in source_metadata.items() if not key.startswith("hnsw:")}
+    metadata.update({f"hnsw:{name}": value for name, value in
+                     {**BULK_LOAD_PARAMS, **(settings.get("hnsw") or {})}.items()})
+    if "hnsw:space" in source_metadata:
+        metadata["hnsw:space"] = source_metadata["hnsw:space"]
+    staging_name = f"import-{uuid.uuid4().hex[:16]}"
+    target = client.create_collection(staging_name, metadata=metadata)
+    page_size = min(IMPORT_PAGE_SIZE, client.get_max_batch_size())
+    began = time.time()
+    try:
+        for start in range(0, snapshot.count, page_size):
+            if cancel_event is not None and cancel_event.is_set():
+                client.delete_collection(staging_name)
+                yield {"status": "cancelled", "message": "Import cancelled"}
+                return
+            page = snapshot.page(start, start + page_size)
+            target.add(**page)
+            done = start + len(page["ids"])
+            yield {"status": "progress", "data": {
+                "message": f"Imported {done}/{snapshot.count} chunks",
+                "chunk": done,
+                "total_chunks": snapshot.count,
+                "percent_complete": f"{done / max(snapshot.count, 1) * 100:.1f}%"
+            }}
+    except Exception:
+        client.delete_collection(staging_name)
+        raise
+
+    def record_settings():
+        collection_settings.remove(collection_name)
+        # Sync and resumed jobs must not trust records of the replaced contents
+        collection_manifest.remove(collection_name)
+        ingest_journal.forget_collection(collection_name)
+        if settings:
+            collection_settings.update(collection_name, **settings)
+        query_cache.bump(collection_name)
+        lexical_index_store.drop(collection_name)
+        flat_index_store.drop(collection_name)
+
+    swap_collection(client, existing, target, collection_name, record_settings)
+    if flat_index and snapshot.count and snapshot.count <= flat_index_store.max_vectors:
+        flat_index_store.get(collection_name, quantization=settings.get("quantization") or "none").reset(
+            snapshot.text("ids", 0, snapshot.count), snapshot.vectors)
+    logger.info(f"Imported {snapshot.count} chunks into {collection_name} in {time.time() - began:.1f}s")
+    yield {"status": "success", "message": f"Imported {snapshot.count} chunks",
+           "data": {"message": f"Imported {snapshot.count} chunks", "collection_name": collection_name,
+                    "embedding_model": settings.get("embedding_model"), "hnsw": active_hnsw(target)}}
@@ -1,8 +1,9 @@
-from src.vectorstorage.init_store import get_models_dir
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_chroma import Chroma
+from src.vectorstorage.embedding_registry import embedding_registry
+from src.vectorstorage.chroma_pool import chroma_pool
+from src.vectorstorage.embedding_cache import EmbeddingCache, CachedEmbeddings
 from langchain_openai import OpenAIEmbeddings
-import torch
+from typing import List, Optional
+import hashlib
 import os
 import logging
 import platform
@@ -24,109 +25,88 @@ def get_app_data_dir():
 chroma_db_path = os.path.join(get_app_data_dir(), "chroma_db")
 logger.info(f"Using Chroma DB path: {chroma_db_path}")
 
-def get_vectorstore(api_key: str, collection_name: str, use_local_embeddings: bool = False, local_embedding_model: str = "HIT-TMG/KaLM-embedding-multilingual-mini-instruct-v1.5"):
+embedding_cache = EmbeddingCache(
+    os.path.join(get_app_data_dir(), "embedding_cache"))
+
+# Cached handles hold their embedding model; drop them when the registry evicts it
+embedding_registry.on_evict(chroma_pool.invalidate_embeddings)
+
+def get_embeddings_key(embeddings, api_key: Optional[str] = None):
+    """Identify an embedding function for handle caching without holding the raw API key."""
+    key = getattr(embeddings, "key", None)
+    if key is not None:
+        return key
+    return (type(embeddings).__name__, hashlib.sha256((api_key or "").encode()).hexdigest())
+
+
+def get_embedding_backend(collection_name: str, embedding_backend: Optional[str] = None) -> Optional[str]:
+    """An explicit backend wins, otherwise the one saved in the collection's settings."""
+    if embedding_backend:
+        return embedding_backend
+    # Imported here because collection_settings needs get_app_data_dir from this module
+    from src.vectorstorage.collection_settings import collection_settings
+    return collection_settings.get(collection_name).get("embedding_backend")
+
+
+def get_embedding_model(collection_name: str) -> Optional[str]:
+    """Local model a collection was re-embedded into; it overrides the caller's model."""
+    from src.vectorstorage.collection_settings import collection_settings
+    return collection_settings.get(collection_name).get("embedding_model")
+
+
+def get_vectorstore(api_key: str, collection_name: str, use_local_embeddings: bool = False, local_embedding_model: str = "HIT-TMG/KaLM-embedding-multilingual-mini-instruct-v1.5",
+                    embedding_backend: Optional[str] = None):
     try:
         # Get embeddings
+        reembedded_model = get_embedding_model(collection_name)
+        if reembedded_model:
+            use_local_embeddings, local_embedding_model = True, reembedded_model
         if use_local_embeddings or api_key is None:
-            logger.info(f"Using local embedding model: {local_embedding_model}")
-            
-            # Determine the appropriate device
-            if torch.cuda.is_available():
-                device = "cuda"
-            elif hasattr(torch.backends, 'mps') and torch.backends.mps.is_available():
-                device = "mps"
-            else:
-                device = "cpu"
-                
-            logger.info(f"Using device: {device}")
-            models_dir = get_models_dir()
-            logger.info(f"Using models directory: {models_dir}")
-
-            model_kwargs = {"device": device}
-            encode_kwargs = {
-                "device": device,
-                "normalize_embeddings": True,
-                "max_seq_length": 512
-            }
-
-            try:
-                embeddings = HuggingFaceEmbeddings(
-                    model_name=local_embedding_model,
-                    model_kwargs=model_kwargs,
-                    encode_kwargs=encode_kwargs,
-                    cache_folder=models_dir
-                )
-            except Exception as e:
-                logger.error(f"Error initializing embeddings with {device}: {str(e)}")
-                if device != "cpu":
-                    logger.info("Falling back to CPU")
-                    model_kwargs["device"] = "cpu"
-                    encode_kwargs["device"] = "cpu"
-                    embeddings = HuggingFaceEmbeddings(
-                        model_name=local_embedding_model,
-                        model_kwargs=model_kwargs,
-                        encode_kwargs=encode_kwargs,
-                        cache_folder=models_dir
-                    )
-                else:
-                    raise
+            backend = get_embedding_backend(collection_name, embedding_backend)
+            logger.info(f"Using local embedding model: {local_embedding_model} ({backend or 'default'} backend)")
+            embeddings = embedding_registry.get(local_embedding_model, backend=backend)
         else:
             logger.info("Using OpenAI embedding model")
             embeddings = OpenAIEmbeddings(api_key=api_key)
 
-        # Try to create vectorstore with specific settings
-        try:
-            from chromadb.config import Settings
-            import chromadb
-
-            # Use in-memory store if persistent store fails
-            try:
-                chroma_client = chromadb.PersistentClient(
-                    path=chroma_db_path,
-                    settings=Settings(
-                        anonymized_telemetry=False,
-                        allow_reset=True,
-                        is_persistent=True
-                    )
-                )
-            except Exception as e:
-                logger.warning(f"Failed to create persistent client: {str(e)}, falling back to in-memory")
-                chroma_client = chromadb.Client(
-                    settings=Settings(
-                        anonymized_telemetry=False,
-                        allow_reset=True,
-                        is_persistent=False
-                    )
-                )
-
-            vectorstore = Chroma(
-                client=chroma_client,
-                embedding_function=embeddings,
-                collection_name=collection_name,
-            )
-            logger.info(f"Successfully initialized vectorstore for collection: {collection_name}")
-            return vectorstore
-        except Exception as e:
-            logger.error(f"Error creating Chroma instance: {str(e)}")
-            # Try one more time with in-memory store
-            try:
-                chroma_client = chromadb.Client(
-                    settings=Settings(
-                        anonymized_telemetry=False,
-                        allow_reset=True,
-                        is_persistent=False
-                    )
-                )
-                vectorstore = Chroma(
-                    client=chroma_client,
-                    embedding_function=embeddings,
-                    collection_name=collection_name,
-                )
-                return vectorstore
-            except Exception as e2:
-                logger.error(f"Error creating in-memory Chroma instance: {str(e2)}")
-                return None
+        embeddings_key = get_embeddings_key(embeddings, api_key)
+        # Imported here because hnsw_settings needs chroma_db_path from this module
+        from src.vectorstorage.hnsw_settings import collection_metadata
+        vectorstore = chroma_pool.get_vectorstore(
+            chroma_db_path, collection_name, CachedEmbeddings(embeddings, embedding_cache), embeddings_key,
+            collection_metadata(collection_name))
+        logger.info(f"Successfully initialized vectorstore for collection: {collection_name}")
+        return vectorstore
 
     except Exception as e:
         logger.error(f"Error getting vectorstore: {str(e)}")
         return None
+
+
+def delete_collection(collection_name: str) -> bool:
+    """Delete a collection through the shared client without loading an embedding model."""
+    client = chroma_pool.get_client(chroma_db_path)
+    try:
+        if collection_name in [str(name) for name in client.list_collections()]:
+            client.delete_collection(collection_name)
+        return True
+    finally:
+        invalidate_vectorstore(collection_name)
+        # Imported here because the derived indexes import this module
+        from src.vectorstorage.collection_writes import record_drop
+        record_drop(collection_name)
+
+
+def collection_lock(collection_name: str):
+    """Held shared by queries and exclusively while a collection is swapped out."""
+    return chroma_pool.collection_lock(collection_name)
+
+
+def invalidate_vectorstore(collection_name: str):
+    """Drop cached handles after a collection is deleted or replaced."""
+    chroma_pool.invalidate(collection_name, chroma_db_path)
+
+
+def preload_collections(collection_names: List[str]):
+    """Warm the shared client with the given collections' indexes."""
+    return chroma_pool.preload(chroma_db_path, collection_names)
@@ -20,7 +20,7 @@ def test_embed_endpoint():
     assert "text/event-stream" in response.headers["content-type"]
 
 def test_concurrent_embedding():
-    # Test that only one embedding process can run at a time
+    # Test that several embedding jobs can be queued at once
     data = EmbeddingRequest(
         file_path="test_file.txt",
         api_key="test_api_key",
@@ -29,16 +29,18 @@ def test_concurrent_embedding():
         user=1,
         metadata={"title": "Test Document"}
     )
-    # Start first embedding
     response1 = client.post("/embed", json=data.dict())
     assert response1.status_code == 200
-    
-    # Try to start second embedding
+    assert "text/event-stream" in response1.headers["content-type"]
+
     response2 = client.post("/embed", json=data.dict())
     assert response2.status_code == 200
-    response_data = response2.json()
-    assert response_data["status"] == "error"
-    assert response_data["message"] == "An embedding process is already running"
+    assert "text/event-stream" in response2.headers["content-type"]
+    assert response1.headers["x-job-id"] != response2.headers["x-job-id"]
+
+    job = client.get(f"/jobs/{response2.headers['x-job-id']}").json()
+    assert job["status"] == "success"
+    assert job["job"]["kind"] == "embed"
 
 def test_youtube_ingest():
     data = YoutubeTranscriptRequest(
@@ -0,0 +1,27 @@
+import types
+import chromadb
+import src.vectorstorage.collection_stats as stats_module
+from src.vectorstorage.collection_stats import CollectionStats, estimate_hnsw_bytes
+from src.vectorstorage.query_cache import query_cache
+
+
+def test_stats_are_computed_from_chroma_and_cached(tmp_path, monkeypatch):
+    client = chromadb.PersistentClient(path=str(tmp_path))
+    monkeypatch.setattr(stats_module, "chroma_pool", types.SimpleNamespace(get_client=lambda path: client))
+    collection = client.get_or_create_collection("stats-test", metadata={"hnsw:M": 8})
+    collection.add(ids=[f"id{i}" for i in range(5)], embeddings=[[float(i), 1.0, 0.0] for i in range(5)],
+                   metadatas=[{"source": "a.pdf" if i < 3 else "b.pdf"} for i in range(5)])
+
+    stats = CollectionStats(str(tmp_path))
+    first = stats.get("stats-test")
+    assert first["chunks"] == 5 and first["dimension"] == 3
+    assert first["hnsw"] == {"M": 8}
+    assert first["sources"] == [{"source": "a.pdf", "chunks": 3}, {"source": "b.pdf", "chunks": 2}]
+    assert first["disk_bytes"]["chroma_sqlite_shared"] > 0
+    assert first["disk_bytes"]["hnsw_segment"] is not None
+    assert first["memory_bytes"]["hnsw_estimate"] == estimate_hnsw_bytes(5, 3, 8)
+
+    assert stats.get("stats-test") is first
+    collection.add(ids=["id5"], embeddings=[[9.0, 1.0, 0.0]], metadatas=[{"source": "b.pdf"}])
+    query_cache.bump("stats-test")
+    assert stats.get("stats-test")["chunks"] == 6
@@ -0,0 +1,50 @@
+import csv
+import io
+import numpy as np
+from src.data.dataIntake.csvSplitting import group_rows, split_csv
+
+
+def write_csv(path, rows, header=("id", "name", "notes")):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
+    return str(path)
+
+
+def test_row_groups_repeat_header_and_keep_every_row(tmp_path):
+    rows = [(i, f"name {i}", "x" * (i % 50)) for i in range(1000)]
+    path = write_csv(tmp_path / "data.csv", rows)
+
+    chunks = list(split_csv(path, chunk_chars=2000, read_rows=37))
+    docs = [doc for doc, _ in chunks]
+    assert 10 < len(docs) < 50
+    assert all(doc.page_content.startswith("id,name,notes\n") for doc in docs)
+    assert all(len(doc.page_content) <= 2000 + 60 for doc in docs)
+    # Row groups span pandas batches without losing or reordering rows
+    parsed = [line for doc in docs for line in list(csv.reader(io.StringIO(doc.page_content)))[1:]]
+    assert parsed == [[str(i), name, notes] for i, name, notes in rows]
+    assert [doc.metadata["row_start"] for doc in docs] == list(np.cumsum([0] + [d.metadata["rows"] for d in docs[:-1]]))
+    assert docs[0].metadata["source"] == path
+    fractions = [fraction for _, fraction in chunks]
+    assert fractions == sorted(fractions) and fractions[-1] == 1.0
+
+
+def test_cells_with_separators_are_quoted(tmp_path):
+    path = write_csv(tmp_path / "data.csv", [(1, 'Smith, "Jo"', "line one\nline two"), (2, "", "plain")])
+    (doc, _), = split_csv(path)
+    assert list(csv.reader(io.StringIO(doc.page_content))) == [
+        ["id", "name", "notes"], ["1", 'Smith, "Jo"', "line one\nline two"], ["2", "", "plain"]]
+
+
+def test_empty_and_header_only_files(tmp_path):
+    empty = tmp_path / "empty.csv"
+    empty.write_text("")
+    assert list(split_csv(str(empty))) == []
+    assert list(split_csv(write_csv(tmp_path / "header.csv", []))) == []
+
+
+def test_group_rows_never_splits_rows():
+    assert list(group_rows(np.array([10, 10, 10, 10, 10]), 25)) == [0, 3]
+    assert list(group_rows(np.array([100, 5, 5]), 20)) == [0, 1]
+    assert list(group_rows(np.array([], dtype=np.int64), 20)) == []
@@ -0,0 +1,55 @@
+from src.vectorstorage.embedding_cache import EmbeddingCache, CachedEmbeddings, get_model_id
+
+
+class CountingEmbeddings:
+    key = ("model-a", "cpu", (("normalize_embeddings", True),))
+
+    def __init__(self):
+        self.encoded = []
+
+    def embed_documents(self, texts):
+        self.encoded.extend(texts)
+        return [[float(len(t)), 0.5] for t in texts]
+
+    def embed_query(self, text):
+        return [float(len(text)), 0.5]
+
+
+def test_second_pass_is_served_from_cache(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "cache"))
+    inner = CountingEmbeddings()
+    embeddings = CachedEmbeddings(inner, cache)
+
+    first = embeddings.embed_documents(["alpha", "beta", "alpha"])
+    second = embeddings.embed_documents(["alpha", "beta"])
+
+    assert inner.encoded == ["alpha", "beta"]
+    assert first == [[5.0, 0.5], [4.0, 0.5], [5.0, 0.5]]
+    assert second == [[5.0, 0.5], [4.0, 0.5]]
+    assert cache.stats()["hits"] == 2
+    assert cache.stats()["misses"] == 3
+
+
+def test_model_id_is_part_of_the_key(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "cache"))
+    other = CountingEmbeddings()
+    other.key = ("model-b", "cpu", ())
+    CachedEmbeddings(CountingEmbeddings(), cache).embed_documents(["alpha"])
+    CachedEmbeddings(other, cache).embed_documents(["alpha"])
+    assert other.encoded == ["alpha"]
+
+
+def test_model_id_ignores_device_and_cache_wrapper(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "cache"))
+    cpu, gpu, onnx = CountingEmbeddings(), CountingEmbeddings(), CountingEmbeddings()
+    gpu.key = ("model-a", "cuda", (("normalize_embeddings", True),))
+    onnx.key = ("model-a", "cpu", (("normalize_embeddings", True),), "onnx")
+
+    wrapped = CachedEmbeddings(cpu, cache)
+    assert get_model_id(wrapped) == get_model_id(cpu) == get_model_id(gpu)
+    assert "CachedEmbeddings" not in get_model_id(wrapped)
+    assert get_model_id(onnx) != get_model_id(cpu)
+
+    wrapped.embed_documents(["alpha"])
+    CachedEmbeddings(gpu, cache).embed_documents(["alpha"])
+    assert gpu.encoded == []
@@ -0,0 +1,105 @@
+import threading
+import src.vectorstorage.embedding_registry as registry_module
+from src.vectorstorage.embedding_registry import EmbeddingRegistry
+
+
+class FakeEmbeddings:
+    loads = 0
+
+    def __init__(self, model_name, model_kwargs, encode_kwargs, cache_folder):
+        FakeEmbeddings.loads += 1
+        self.model_name = model_name
+
+    def embed_documents(self, texts):
+        return [[float(len(t))] for t in texts]
+
+    def embed_query(self, text):
+        return [float(len(text))]
+
+
+def _registry(monkeypatch, budget_mb=4096, size_bytes=0):
+    FakeEmbeddings.loads = 0
+    monkeypatch.setattr(registry_module, "HuggingFaceEmbeddings", FakeEmbeddings)
+    monkeypatch.setattr(EmbeddingRegistry, "_model_size",
+                        staticmethod(lambda model: size_bytes))
+    return EmbeddingRegistry(ram_budget_mb=budget_mb)
+
+
+def test_model_loaded_once(monkeypatch):
+    registry = _registry(monkeypatch)
+    first = registry.get("model-a", "cpu")
+    second = registry.get("model-a", "cpu")
+    assert first is second
+    assert FakeEmbeddings.loads == 1
+    assert first.embed_query("abc") == [3.0]
+
+
+def test_concurrent_get_loads_once(monkeypatch):
+    registry = _registry(monkeypatch)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(registry.get("model-a", "cpu")))
+               for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert FakeEmbeddings.loads == 1
+    assert all(r is results[0] for r in results)
+
+
+def test_lru_eviction_under_budget(monkeypatch):
+    registry = _registry(monkeypatch, budget_mb=1, size_bytes=600 * 1024)
+    registry.get("model-a", "cpu")
+    registry.get("model-b", "cpu")
+    names = [m["model_name"] for m in registry.stats()["models"]]
+    assert names == ["model-b"]
+
+
+class FakeCrossEncoder:
+    def __init__(self, model_name, device, max_length, cache_dir):
+        self.model = None
+        self.calls = 0
+
+    def predict(self, pairs, batch_size, show_progress_bar):
+        self.calls += 1
+        # Relevance = shared words between query and passage
+        return [len(set(q.split()) & set(p.split())) for q, p in pairs]
+
+
+def test_reranker_scores_in_one_batch(monkeypatch):
+    import sys
+    import types
+    from langchain_core.documents import Document
+    import src.vectorstorage.search as search
+    registry = _registry(monkeypatch)
+    monkeypatch.setitem(sys.modules, "sentence_transformers",
+                        types.SimpleNamespace(CrossEncoder=FakeCrossEncoder))
+    monkeypatch.setattr(search, "embedding_registry", registry)
+    monkeypatch.setattr(registry_module, "_device", "cpu")
+
+    candidates = [(Document(page_content=text, id=str(i)), 0.5)
+                  for i, text in enumerate(["red fox", "quick brown fox", "lazy dog"])]
+    results = search.rerank("quick brown fox", candidates, 2, "ce-model")
+    assert [doc.id for doc, _ in results] == ["1", "0"]
+    assert [score for _, score in results] == [3.0, 1.0]
+
+    reranker = registry.get_reranker("ce-model")
+    assert reranker.model.calls == 1
+    assert registry.stats()["models"][0]["backend"] == "cross-encoder"
+
+
+def test_evict_listeners_hear_about_evicted_models(monkeypatch):
+    from src.vectorstorage.chroma_pool import ChromaClientPool
+    registry = _registry(monkeypatch, budget_mb=1, size_bytes=600 * 1024)
+    pool = ChromaClientPool()
+    evicted = []
+    registry.on_evict(evicted.append)
+    registry.on_evict(pool.invalidate_embeddings)
+
+    model_a = registry.get("model-a", "cpu")
+    pool._handles[("db", "notes", model_a.key)] = object()
+    pool._handles[("db", "notes", ("openai", "hash"))] = object()
+    registry.get("model-b", "cpu")
+    assert evicted == [model_a.key]
+    # The handle no longer pins the evicted model
+    assert list(pool._handles) == [("db", "notes", ("openai", "hash"))]
@@ -0,0 +1,98 @@
+import numpy as np
+from src.vectorstorage.flat_index import FlatIndex, FlatIndexStore
+
+
+def _vectors(n, dim=8, seed=0):
+    return np.random.default_rng(seed).normal(size=(n, dim)).astype(np.float32)
+
+
+class FakeCollection:
+    def __init__(self, name, ids, vectors):
+        self.name = name
+        self.ids = list(ids)
+        self.vectors = np.asarray(vectors)
+        self.gets = 0
+
+    def count(self):
+        return len(self.ids)
+
+    def get(self, include, limit, offset):
+        self.gets += 1
+        return {"ids": self.ids[offset:offset + limit],
+                "embeddings": self.vectors[offset:offset + limit]}
+
+
+def test_search_matches_brute_force(tmp_path):
+    vectors = _vectors(200)
+    ids = [f"id{i}" for i in range(200)]
+    index = FlatIndex(str(tmp_path / "c"))
+    index.reset(ids, vectors)
+
+    query = vectors[17] + 0.01
+    hits = index.search(query, 5)
+    normed = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    expected = np.argsort(-(normed @ (query / np.linalg.norm(query))))[:5]
+    assert [doc_id for doc_id, _ in hits] == [ids[i] for i in expected]
+    assert hits[0][0] == "id17" and hits[0][1] > 0.99
+
+
+def test_upsert_delete_and_reload(tmp_path):
+    vectors = _vectors(10)
+    index = FlatIndex(str(tmp_path / "c"))
+    index.reset([f"id{i}" for i in range(10)], vectors)
+    # Overwrite id3 with id5's vector and delete id5
+    index.add(["id3"], vectors[5:6])
+    index.delete(["id5"])
+    assert index.count == 9
+
+    reloaded = FlatIndex(str(tmp_path / "c"))
+    assert reloaded.count == 9
+    hits = reloaded.search(vectors[5], 2)
+    assert hits[0][0] == "id3"
+    assert "id5" not in [doc_id for doc_id, _ in reloaded.search(vectors[5], 10)]
+
+
+def test_small_segments_are_merged(tmp_path):
+    index = FlatIndex(str(tmp_path / "c"))
+    for i in range(64):
+        index.add([f"id{i}"], _vectors(1, seed=i))
+    assert index.count == 64
+    assert len(index._segments) <= 8
+
+
+def test_store_rebuilds_when_out_of_sync_and_respects_threshold(tmp_path):
+    vectors = _vectors(30)
+    collection = FakeCollection("docs", [f"id{i}" for i in range(30)], vectors)
+    store = FlatIndexStore(str(tmp_path), max_vectors=100)
+    # The query falls back to HNSW instead of waiting for the rebuild
+    assert store.search(collection, vectors[4], 1) is None
+    store.schedule_rebuild(collection).result(timeout=5)
+    assert store.search(collection, vectors[4], 1)[0][0] == "id4"
+    gets = collection.gets
+    store.search(collection, vectors[4], 1)
+    assert collection.gets == gets  # in sync, no rebuild
+
+    collection.ids.append("new")
+    collection.vectors = np.vstack([vectors, vectors[:1] * -1])
+    assert store.search(collection, vectors[0] * -1, 1) is None
+    store.schedule_rebuild(collection).result(timeout=5)
+    assert store.search(collection, vectors[0] * -1, 1)[0][0] == "new"
+    assert store.search(collection, vectors[0], 1, max_vectors=10) is None
+
+
+def test_writes_during_a_rebuild_leave_the_index_stale(tmp_path):
+    vectors = _vectors(10)
+    collection = FakeCollection("docs", [f"id{i}" for i in range(10)], vectors)
+    store = FlatIndexStore(str(tmp_path))
+    index = store.get("docs")
+    get = collection.get
+
+    def get_then_write(include, limit, offset):
+        page = get(include, limit, offset)
+        index.delete(["id3"])
+        return page
+
+    collection.get = get_then_write
+    store.rebuild(index, collection)
+    assert index.count == 10 and index.stale
+    assert store.current(collection) is None
@@ -0,0 +1,76 @@
+import types
+import chromadb
+import pytest
+import src.vectorstorage.collection_writes as collection_writes
+import src.vectorstorage.hnsw_settings as hnsw_settings
+from langchain_core.documents import Document
+from src.vectorstorage.collection_settings import CollectionSettings
+
+
+def test_validate_hnsw():
+    assert hnsw_settings.validate_hnsw({"M": 32, "search_ef": 200.0}) == {"M": 32, "search_ef": 200}
+    for bad in ({"ef": 10}, {"M": 0}, {"M": 1.5}, {"batch_size": 2}, {"M": "16"}):
+        with pytest.raises(ValueError):
+            hnsw_settings.validate_hnsw(bad)
+
+
+def test_compaction_applies_settings_and_keeps_data(tmp_path, monkeypatch):
+    client = chromadb.EphemeralClient()
+    settings = CollectionSettings(str(tmp_path / "settings.sqlite"))
+    monkeypatch.setattr(hnsw_settings, "collection_settings", settings)
+    monkeypatch.setattr(hnsw_settings, "chroma_pool", types.SimpleNamespace(get_client=lambda path: client))
+    monkeypatch.setattr(hnsw_settings, "COMPACT_PAGE_SIZE", 4)
+
+    source = client.get_or_create_collection("crawl-docs", metadata={"hnsw:space": "cosine", "owner": "x"})
+    source.add(ids=[f"id{i}" for i in range(10)], embeddings=[[float(i), 1.0] for i in range(10)],
+               documents=[f"doc {i}" for i in range(10)], metadatas=[{"i": i} for i in range(10)])
+    source.delete(ids=["id3", "id4"])
+    settings.update("crawl-docs", hnsw={"M": 32, "construction_ef": 200})
+
+    events = list(hnsw_settings.compact_collection("crawl-docs"))
+    assert events[-1]["status"] == "success"
+    assert [e["data"]["chunk"] for e in events[:-1]] == [4, 8]
+
+    compacted = client.get_collection("crawl-docs")
+    assert compacted.count() == 8
+    assert hnsw_settings.active_hnsw(compacted) == {"space": "cosine", "M": 32, "construction_ef": 200}
+    assert compacted.metadata["owner"] == "x"
+    assert compacted.get(ids=["id7"], include=["documents", "metadatas"])["metadatas"] == [{"i": 7}]
+    # Staging and retired copies are gone
+    assert not [name for name in map(str, client.list_collections()) if name.startswith(("compact-", "retired-"))]
+
+
+def test_bulk_load_defers_derived_indexes(monkeypatch):
+    calls = []
+    fake_index = types.SimpleNamespace(add=lambda *a: calls.append("add"), delete=lambda *a: calls.append("delete"),
+                                       mark_stale=lambda *a: calls.append("stale"), drop=lambda *a: calls.append("drop"))
+    monkeypatch.setattr(collection_writes, "flat_index_store", fake_index)
+    monkeypatch.setattr(collection_writes, "lexical_index_store", fake_index)
+
+    with collection_writes.bulk_load("bulk"):
+        assert hnsw_settings.collection_metadata("bulk")["hnsw:batch_size"] == hnsw_settings.BULK_LOAD_PARAMS["batch_size"]
+        collection_writes.record_upsert("bulk", [Document(page_content="a")], ["a"], [[1.0]])
+        collection_writes.record_delete("bulk", ["a"])
+        assert calls == []
+    assert calls == ["stale", "drop"]
+    assert not collection_writes.is_bulk_loading("bulk")
+
+
+def test_bulk_loaded_collections_are_flagged_until_compacted(tmp_path, monkeypatch):
+    # Persistent, because bulk-load HNSW parameters only exist for on-disk indexes
+    client = chromadb.PersistentClient(str(tmp_path / "chroma"))
+    settings = CollectionSettings(str(tmp_path / "settings.sqlite"))
+    monkeypatch.setattr(hnsw_settings, "collection_settings", settings)
+    monkeypatch.setattr(hnsw_settings, "chroma_pool", types.SimpleNamespace(get_client=lambda path: client))
+
+    with collection_writes.bulk_load("bulk-docs"):
+        client.create_collection("bulk-docs", metadata=hnsw_settings.collection_metadata("bulk-docs"))
+        client.get_collection("bulk-docs").add(ids=["a", "b"], embeddings=[[1.0, 0.0], [0.0, 1.0]])
+    client.create_collection("plain-docs")
+    assert hnsw_settings.needs_compaction_after_bulk_load("bulk-docs")
+    assert not hnsw_settings.needs_compaction_after_bulk_load("plain-docs")
+    assert not hnsw_settings.needs_compaction_after_bulk_load("missing-docs")
+
+    list(hnsw_settings.compact_collection("bulk-docs"))
+    assert not hnsw_settings.needs_compaction_after_bulk_load("bulk-docs")
+    assert client.get_collection("bulk-docs").count() == 2
@@ -0,0 +1,120 @@
+import threading
+import time
+import pytest
+from langchain_core.documents import Document
+import src.vectorstorage.collection_writes as collection_writes
+from src.vectorstorage.ingest_pipeline import AdaptiveBatchSize, IngestPipeline, prefetch
+from src.vectorstorage.lexical_index import LexicalIndexStore
+
+
+@pytest.fixture(autouse=True)
+def lexical_index_dir(tmp_path, monkeypatch):
+    # Writes build the collection's lexical index; keep it out of the app data dir
+    monkeypatch.setattr(collection_writes, "lexical_index_store", LexicalIndexStore(str(tmp_path / "lexical")))
+
+
+class FakeEmbeddings:
+    def embed_documents(self, texts):
+        return [[float(len(t)), 1.0] for t in texts]
+
+
+class FakeCollection:
+    def __init__(self, fail=False):
+        self.rows = {}
+        self.fail = fail
+
+    def upsert(self, ids, embeddings, documents, metadatas):
+        if self.fail:
+            raise RuntimeError("disk full")
+        for i, e, d, m in zip(ids, embeddings, documents, metadatas):
+            self.rows[i] = (e, d, m)
+
+
+class FakeClient:
+    def get_max_batch_size(self):
+        return 7
+
+
+class FakeVectorDB:
+    def __init__(self, fail=False):
+        self._collection = FakeCollection(fail)
+        self._client = FakeClient()
+        self.embeddings = FakeEmbeddings()
+
+
+def _docs(n):
+    return [Document(page_content="x" * (i % 13 + 1), metadata={"source": "f.txt"}) for i in range(n)]
+
+
+def test_pipeline_writes_every_document():
+    vectordb = FakeVectorDB()
+    pipeline = IngestPipeline(vectordb, "test_collection")
+    events = list(pipeline.run(iter(_docs(250)), total=250))
+    assert len(vectordb._collection.rows) == 250
+    assert events[-1]["chunk"] == 250
+    assert events[-1]["percent_complete"] == 100
+
+
+def test_pipeline_surfaces_writer_errors():
+    pipeline = IngestPipeline(FakeVectorDB(fail=True), "test_collection")
+    with pytest.raises(RuntimeError):
+        list(pipeline.run(iter(_docs(100)), total=100))
+
+
+def test_pipeline_stops_on_cancel():
+    cancel = threading.Event()
+    cancel.set()
+    vectordb = FakeVectorDB()
+    list(IngestPipeline(vectordb, "test_collection",
+         cancel_event=cancel).run(iter(_docs(100))))
+    assert len(vectordb._collection.rows) == 0
+
+
+def test_pipeline_streams_unknown_length_input():
+    produced = []
+
+    def stream():
+        for doc in _docs(300):
+            produced.append(doc)
+            yield doc
+
+    vectordb = FakeVectorDB()
+    pipeline = IngestPipeline(vectordb, "test_collection")
+    events = list(pipeline.run(prefetch(stream(), maxsize=16), total=lambda: len(produced)))
+    assert len(vectordb._collection.rows) == 300
+    assert events[-1]["total_chunks"] == 300
+
+
+def test_prefetch_raises_producer_errors():
+    def broken():
+        yield 1
+        raise ValueError("bad page")
+
+    items = prefetch(broken())
+    assert next(items) == 1
+    with pytest.raises(ValueError):
+        next(items)
+
+
+def test_prefetch_stays_bounded():
+    produced = []
+
+    def stream():
+        for i in range(1000):
+            produced.append(i)
+            yield i
+
+    items = prefetch(stream(), maxsize=8)
+    assert next(items) == 0
+    time.sleep(0.1)
+    # The queue, one item in hand and one blocked put
+    assert len(produced) <= 11
+    items.close()
+
+
+def test_adaptive_batch_size_grows_and_backs_off():
+    sizer = AdaptiveBatchSize(initial=16, minimum=8, maximum=64)
+    assert sizer.update(16, 1.0) == 32
+    assert sizer.update(32, 1.0) == 64
+    assert sizer.update(64, 1.0) == 64
+    assert sizer.update(64, 10.0) == 32
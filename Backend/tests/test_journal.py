@@ -0,0 +1,58 @@
+from src.jobs.journal import IngestJournal, CANCELLED
+
+
+def test_ranges_merge_and_survive_reopen(tmp_path):
+    journal = IngestJournal(str(tmp_path / "journal.sqlite"))
+    key = journal.make_key("embed", "docs", "/tmp/a.pdf")
+    checkpoint = journal.open("embed", key, {"file_path": "/tmp/a.pdf"})
+    checkpoint.record_indices([0, 1, 2, 5])
+    checkpoint.record_indices([3, 4, 9])
+    assert checkpoint.ranges == [(0, 6), (9, 10)]
+
+    reopened = journal.open("embed", key, {"file_path": "/tmp/a.pdf"})
+    assert reopened.committed_count() == 7
+    assert reopened.is_committed(4) and reopened.is_committed(9)
+    assert not reopened.is_committed(6)
+
+
+def test_unfinished_jobs_and_completion(tmp_path):
+    journal = IngestJournal(str(tmp_path / "journal.sqlite"))
+    running = journal.open("webcrawl", "a", {"base_url": "https://a.dev"})
+    running.add_items("crawled", ["https://a.dev", "https://a.dev/x"])
+    journal.open("embed", "b", {"file_path": "b.txt"}).close(CANCELLED)
+    assert journal.unfinished() == [("webcrawl", {"base_url": "https://a.dev"})]
+    assert running.items("crawled") == {"https://a.dev", "https://a.dev/x"}
+
+    running.complete()
+    assert journal.unfinished() == []
+    assert running.items("crawled") == set()
+
+
+def test_secrets_are_not_persisted(tmp_path):
+    journal = IngestJournal(str(tmp_path / "journal.sqlite"))
+    journal.open("embed", "a", {"file_path": "a.txt", "api_key": "sk-secret", "user": 3})
+    assert journal.unfinished() == [("embed", {"file_path": "a.txt", "user": 3})]
+    assert b"sk-secret" not in (tmp_path / "journal.sqlite").read_bytes()
+
+
+def test_delete_then_reingest_starts_from_scratch(tmp_path):
+    journal = IngestJournal(str(tmp_path / "journal.sqlite"))
+    key = journal.make_key("embed", "docs", "/tmp/a.pdf")
+    journal.open("embed", key, {"file_path": "/tmp/a.pdf"}, "docs").record_indices(range(10))
+    journal.open("embed", "other", {"file_path": "/tmp/b.pdf"}, "notes").record_indices([0])
+
+    # Interrupted job, then the collection is deleted and the file ingested again
+    journal.forget_collection("docs")
+    assert journal.open("embed", key, {"file_path": "/tmp/a.pdf"}, "docs").ranges == []
+    assert journal.open("embed", "other", {"file_path": "/tmp/b.pdf"}, "notes").ranges == [(0, 1)]
+
+
+def test_cancelled_jobs_drop_their_progress(tmp_path):
+    journal = IngestJournal(str(tmp_path / "journal.sqlite"))
+    checkpoint = journal.open("webcrawl", "a", {"base_url": "https://a.dev"}, "docs")
+    checkpoint.record_indices([0, 1])
+    checkpoint.add_items("crawled", ["https://a.dev"])
+    checkpoint.close(CANCELLED)
+
+    reopened = journal.open("webcrawl", "a", {"base_url": "https://a.dev"}, "docs")
+    assert reopened.ranges == [] and reopened.items("crawled") == set()
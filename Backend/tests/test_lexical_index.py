@@ -0,0 +1,84 @@
+from langchain_core.documents import Document
+from src.vectorstorage.lexical_index import LexicalIndex, LexicalIndexStore, tokenize
+from src.vectorstorage.search import reciprocal_rank_fusion
+
+
+class FakeCollection:
+    def __init__(self, name, ids, documents):
+        self.name = name
+        self.ids = list(ids)
+        self.documents = list(documents)
+
+    def count(self):
+        return len(self.ids)
+
+    def get(self, include, limit, offset):
+        return {"ids": self.ids[offset:offset + limit],
+                "documents": self.documents[offset:offset + limit]}
+
+
+def test_tokenize_keeps_identifiers_and_parts():
+    terms = tokenize("Call get_vectorstore on ERR_CONNECTION_REFUSED via parseHTTPResponse")
+    assert "get_vectorstore" in terms and "vectorstore" in terms
+    assert "err_connection_refused" in terms and "refused" in terms
+    assert "parsehttpresponse" in terms and "http" in terms and "response" in terms
+
+
+def test_bm25_ranks_rare_exact_terms_first(tmp_path):
+    index = LexicalIndex(str(tmp_path / "c.sqlite"))
+    index.add(["a", "b", "c"], [
+        "the server returned an error",
+        "the server raised ERR_CONNECTION_REFUSED twice",
+        "the client logged an error and an error again",
+    ])
+    hits = index.search("ERR_CONNECTION_REFUSED error", 3)
+    assert hits[0][0] == "b"
+    assert {chunk_id for chunk_id, _ in hits} == {"a", "b", "c"}
+    assert index.search("nothing matches", 3) == []
+
+
+def test_upsert_delete_and_reload(tmp_path):
+    path = str(tmp_path / "c.sqlite")
+    index = LexicalIndex(path)
+    index.add(["a", "b"], ["alpha beta", "beta gamma"])
+    index.add(["a"], ["delta"])
+    index.delete(["b"])
+    assert index.count == 1
+    assert index.search("beta", 5) == []
+    index.close()
+
+    reloaded = LexicalIndex(path)
+    assert reloaded.count == 1
+    assert [chunk_id for chunk_id, _ in reloaded.search("delta", 5)] == ["a"]
+    df = dict(reloaded._conn.execute("SELECT term, df FROM terms").fetchall())
+    assert df["beta"] == 0 and df["delta"] == 1
+
+
+def test_store_rebuilds_from_collection_in_the_background(tmp_path):
+    store = LexicalIndexStore(str(tmp_path))
+    collection = FakeCollection("c", ["x", "y"], ["notate backend", "frontend only"])
+    # The query doesn't wait for the rebuild; it gets no lexical hits meanwhile
+    assert store.search(collection, "backend", 5) is None
+    store.schedule_rebuild(collection).result(timeout=5)
+    assert [chunk_id for chunk_id, _ in store.search(collection, "backend", 5)] == ["x"]
+    # Ingest updates an existing index without a rebuild
+    store.add("c", ["z"], ["backend worker"])
+    collection.ids.append("z")
+    collection.documents.append("backend worker")
+    assert {chunk_id for chunk_id, _ in store.search(collection, "backend", 5)} == {"x", "z"}
+
+
+def test_ingest_creates_the_index(tmp_path):
+    store = LexicalIndexStore(str(tmp_path))
+    store.add("fresh", ["a"], ["first chunk"])
+    collection = FakeCollection("fresh", ["a"], ["first chunk"])
+    assert [chunk_id for chunk_id, _ in store.search(collection, "chunk", 5)] == ["a"]
+    assert not store.rebuilds.is_pending("fresh")
+
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    docs = {name: Document(page_content=name, id=name) for name in "abcd"}
+    vector = [(docs["a"], 0.9), (docs["b"], 0.8), (docs["c"], 0.7)]
+    lexical = [(docs["b"], 12.0), (docs["d"], 8.0)]
+    fused = reciprocal_rank_fusion([vector, lexical], 3)
+    assert [doc.id for doc, _ in fused] == ["b", "a", "d"]
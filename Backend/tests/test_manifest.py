@@ -0,0 +1,65 @@
+import os
+from langchain_core.documents import Document
+import src.vectorstorage.manifest as manifest_module
+from src.vectorstorage.manifest import CollectionManifest, FileFingerprint, assign_chunk_ids, stream_chunk_ids
+
+
+def _docs(*texts, source="a.txt"):
+    return [Document(page_content=t, metadata={"source": source}) for t in texts]
+
+
+def test_chunk_ids_are_deterministic_and_content_addressed():
+    first = assign_chunk_ids("col", _docs("one", "two", "one"))
+    second = assign_chunk_ids("col", _docs("zero", "one", "two", "one"))
+    assert len({d.id for d in first}) == 3
+    # Unchanged chunks keep their IDs when new text is inserted before them
+    assert {d.id for d in first} <= {d.id for d in second}
+
+
+def test_chunk_ids_depend_on_collection_and_source():
+    base = assign_chunk_ids("col", _docs("one"))[0].id
+    assert assign_chunk_ids("other", _docs("one"))[0].id != base
+    assert assign_chunk_ids("col", _docs("one", source="b.txt"))[0].id != base
+
+
+def test_streamed_chunk_ids_match_batch_ids():
+    streamed = stream_chunk_ids("col", iter(_docs("one", "two", "one")))
+    assert next(streamed).id == assign_chunk_ids("col", _docs("one"))[0].id
+    assert [d.id for d in streamed] == [d.id for d in assign_chunk_ids("col", _docs("one", "two", "one"))[1:]]
+
+
+def test_manifest_detects_changes(tmp_path):
+    manifest = CollectionManifest(str(tmp_path / "manifest.sqlite"))
+    path = tmp_path / "doc.txt"
+    path.write_text("hello")
+
+    assert not manifest.is_unchanged("col", str(path))
+    manifest.record("col", str(path), chunks=1)
+    assert manifest.is_unchanged("col", str(path))
+
+    # Touched but identical content is still unchanged
+    os.utime(path, (1, 1))
+    assert manifest.is_unchanged("col", str(path))
+
+    path.write_text("hello, world")
+    assert not manifest.is_unchanged("col", str(path))
+    assert manifest.sources("col") == [str(path)]
+    manifest.remove("col")
+    assert manifest.sources("col") == []
+
+
+def test_fingerprint_hashes_the_file_once(tmp_path, monkeypatch):
+    manifest = CollectionManifest(str(tmp_path / "manifest.sqlite"))
+    path = tmp_path / "doc.txt"
+    path.write_text("hello")
+    manifest.record("col", str(path), chunks=1)
+    os.utime(path, (1, 1))
+
+    hashed = []
+    file_sha256 = manifest_module.file_sha256
+    monkeypatch.setattr(manifest_module, "file_sha256", lambda p: hashed.append(p) or file_sha256(p))
+    fingerprint = FileFingerprint(str(path))
+    assert manifest.is_unchanged("col", str(path), fingerprint)
+    manifest.record("col", str(path), chunks=2, fingerprint=fingerprint)
+    assert hashed == [str(path)]
+    assert manifest.get("col", str(path)).mtime == 1
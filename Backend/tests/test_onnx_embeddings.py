@@ -0,0 +1,34 @@
+import numpy as np
+from src.vectorstorage.onnx_embeddings import pool
+from src.vectorstorage.embedding_registry import EmbeddingRegistry
+
+
+def _batch():
+    hidden = np.arange(2 * 3 * 2, dtype=np.float32).reshape(2, 3, 2)
+    mask = np.array([[1, 1, 0], [1, 1, 1]])
+    return hidden, mask
+
+
+def test_mean_pooling_ignores_padding():
+    hidden, mask = _batch()
+    pooled = pool(hidden, mask, "mean")
+    np.testing.assert_allclose(pooled[0], hidden[0, :2].mean(axis=0))
+    np.testing.assert_allclose(pooled[1], hidden[1].mean(axis=0))
+
+
+def test_cls_and_last_token_pooling():
+    hidden, mask = _batch()
+    np.testing.assert_allclose(pool(hidden, mask, "cls"), hidden[:, 0])
+    last = pool(hidden, mask, "lasttoken")
+    np.testing.assert_allclose(last[0], hidden[0, 1])
+    np.testing.assert_allclose(last[1], hidden[1, 2])
+    # Left padding: the last attended token is the final position
+    left = pool(hidden, np.array([[0, 1, 1], [1, 1, 1]]), "lasttoken")
+    np.testing.assert_allclose(left[0], hidden[0, 2])
+
+
+def test_torch_keys_unchanged_by_backend_support():
+    kwargs = {"device": "cpu", "normalize_embeddings": True}
+    assert EmbeddingRegistry.make_key("m", "cpu", kwargs) == \
+        ("m", "cpu", (("device", "cpu"), ("normalize_embeddings", True)))
+    assert EmbeddingRegistry.make_key("m", "cpu", kwargs, "onnx-int8")[-1] == "onnx-int8"
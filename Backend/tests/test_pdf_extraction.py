@@ -0,0 +1,81 @@
+import time
+import pytest
+import src.data.dataIntake.fileTypes.pdfExtraction as pdf_extraction
+from src.data.dataIntake.fileTypes.pdfExtraction import PageTimeout, PdfExtractor, page_deadline
+
+
+def write_pdf(path, texts):
+    """Minimal PDF with one line of Helvetica text per page."""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None,
+               "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for text in texts:
+        stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>")
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(texts)} >>"
+    body, offsets = b"%PDF-1.4\n", []
+    for number, obj in enumerate(objects, 1):
+        offsets.append(len(body))
+        body += f"{number} 0 obj\n{obj}\nendobj\n".encode()
+    xref = len(body)
+    body += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    body += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode()
+    body += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    path.write_bytes(body)
+    return str(path)
+
+
+def test_pages_come_back_in_order_from_workers(tmp_path, monkeypatch):
+    monkeypatch.setattr(pdf_extraction, "PARALLEL_MIN_PAGES", 1)
+    path = write_pdf(tmp_path / "doc.pdf", [f"Page number {i}" if i != 4 else "" for i in range(9)])
+    extractor = PdfExtractor(workers=2, range_pages=2)
+    try:
+        pages = list(extractor.pages(path))
+    finally:
+        extractor._reset_pool()
+    assert [i for i, _, _ in pages] == list(range(9))
+    assert all(count == 9 for _, _, count in pages)
+    assert pages[7][1].strip() == "Page number 7"
+    assert pages[4][1].strip() == ""
+
+
+def test_timed_out_ranges_kill_the_pool_and_the_rest_continue(tmp_path, monkeypatch):
+    monkeypatch.setattr(pdf_extraction, "PARALLEL_MIN_PAGES", 1)
+    path = write_pdf(tmp_path / "doc.pdf", [f"Page number {i}" for i in range(6)])
+    # The backstop expires long before a worker starts, as it would for a hung page
+    extractor = PdfExtractor(workers=2, range_pages=2, page_timeout=0.001)
+    pools = []
+    get_pool = extractor._get_pool
+
+    def tracked_pool():
+        pool = get_pool()
+        if pool not in pools:
+            pools.append(pool)
+        return pool
+
+    monkeypatch.setattr(extractor, "_get_pool", tracked_pool)
+    try:
+        pages = list(extractor.pages(path))
+    finally:
+        extractor._reset_pool()
+    assert [(i, text) for i, text, _ in pages] == [(i, "") for i in range(6)]
+    assert len(pools) > 1
+    assert all(pool._flags.shutdown for pool in pools)
+
+
+def test_small_documents_stay_in_process(tmp_path):
+    path = write_pdf(tmp_path / "doc.pdf", ["one", "two", "three"])
+    extractor = PdfExtractor(workers=4, range_pages=2)
+    assert [text.strip() for _, text, _ in extractor.pages(path)] == ["one", "two", "three"]
+    assert extractor._pool is None
+
+
+def test_page_deadline_interrupts_slow_work():
+    with pytest.raises(PageTimeout):
+        with page_deadline(0.05):
+            time.sleep(1)
+    with page_deadline(1):
+        pass
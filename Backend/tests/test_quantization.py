@@ -0,0 +1,55 @@
+import numpy as np
+from src.vectorstorage.flat_index import FlatIndex, FlatIndexStore
+from src.vectorstorage.quantization import approximate_scores, encode, popcount
+
+
+def _index(tmp_path, mode, n=500, dim=64):
+    # Clustered like real embeddings, so neighbours are well separated
+    rng = np.random.default_rng(1)
+    centers = rng.normal(size=(25, dim))
+    vectors = (centers[rng.integers(0, 25, n)] + 0.3 * rng.normal(size=(n, dim))).astype(np.float32)
+    index = FlatIndex(str(tmp_path / mode), quantization=mode)
+    index.reset([f"id{i}" for i in range(n)], vectors)
+    return index, vectors
+
+
+def test_int8_codes_rank_like_floats():
+    vectors = np.random.default_rng(0).normal(size=(100, 32)).astype(np.float32)
+    query = vectors[3]
+    approx = approximate_scores(encode(vectors, "int8"), query, "int8")
+    np.testing.assert_allclose(approx, vectors @ query, rtol=0.05, atol=0.5)
+
+
+def test_binary_hamming_distance():
+    bits = np.packbits(np.array([[1, 0, 1, 1, 0, 0, 0, 0]], dtype=bool), axis=1)
+    assert popcount(np.bitwise_xor(bits, np.packbits(np.zeros(8, dtype=bool)))).sum() == 3
+    codes = encode(np.array([[1.0, -1.0, 1.0, 1.0, -1, -1, -1, -1]]), "binary")
+    assert approximate_scores(codes, np.array([1.0, -1, 1, 1, -1, -1, -1, 1]), "binary")[0] == -1
+
+
+def test_rescored_search_reports_recall_and_memory(tmp_path):
+    for mode, reduction in (("int8", 3.5), ("binary", 25)):
+        index, vectors = _index(tmp_path, mode)
+        hits = index.search(vectors[42], 5)
+        assert hits[0][0] == "id42" and abs(hits[0][1] - 1.0) < 1e-5
+        report = index.evaluate(k=10, samples=50)
+        assert report["memory_reduction"] >= reduction
+        assert report["recall_at_k"] >= 0.9
+
+
+def test_switching_modes_keeps_only_current_codes(tmp_path):
+    index, _ = _index(tmp_path, "int8", n=20)
+    index.set_quantization("binary")
+    files = sorted(p.name for p in (tmp_path / "int8").iterdir() if p.suffix == ".npz")
+    assert files and all(name.endswith(".binary.npz") for name in files)
+    reloaded = FlatIndex(str(tmp_path / "int8"), quantization="binary")
+    assert reloaded.codes_nbytes == index.codes_nbytes
+
+
+def test_switching_modes_before_anything_is_written(tmp_path):
+    # An empty collection's index has no directory yet
+    index = FlatIndexStore(str(tmp_path)).get("empty")
+    index.set_quantization("int8")
+    assert index.quantization == "int8"
+    assert index.search(np.ones(4, dtype=np.float32), 3) == []
+    assert not (tmp_path / "empty").exists()
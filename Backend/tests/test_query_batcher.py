@@ -0,0 +1,61 @@
+import threading
+import time
+from src.vectorstorage.query_batcher import QueryBatcher, QueryBatchers
+
+
+class SlowEmbeddings:
+    key = ("model-a", "cpu", ())
+
+    def __init__(self):
+        self.batch_sizes = []
+
+    def embed_documents(self, texts):
+        self.batch_sizes.append(len(texts))
+        time.sleep(0.02)
+        return [[float(len(t))] for t in texts]
+
+
+def test_concurrent_queries_share_forward_passes():
+    embeddings = SlowEmbeddings()
+    batcher = QueryBatcher(max_batch=16, max_wait_ms=5)
+    results = {}
+
+    def query(i):
+        results[i] = batcher.embed_query(embeddings, "q" * i)
+
+    threads = [threading.Thread(target=query, args=(i,)) for i in range(1, 41)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert results == {i: [float(i)] for i in range(1, 41)}
+    assert len(embeddings.batch_sizes) < 40
+    assert max(embeddings.batch_sizes) <= 16
+
+
+def test_single_query_is_not_delayed():
+    embeddings = SlowEmbeddings()
+    batcher = QueryBatcher(max_batch=16, max_wait_ms=200)
+    began = time.monotonic()
+    assert batcher.embed_query(embeddings, "abc") == [3.0]
+    assert time.monotonic() - began < 0.15
+
+
+def test_errors_reach_every_caller_and_remote_clients_bypass():
+    class Broken(SlowEmbeddings):
+        def embed_documents(self, texts):
+            raise RuntimeError("boom")
+
+    batcher = QueryBatcher()
+    future = batcher.submit(Broken(), "x")
+    try:
+        future.result(timeout=1)
+        assert False
+    except RuntimeError as e:
+        assert str(e) == "boom"
+
+    class Remote:
+        def embed_query(self, text):
+            return [1.0]
+
+    assert QueryBatchers().embed_query(Remote(), "x") == [1.0]
@@ -0,0 +1,45 @@
+from src.vectorstorage.query_cache import LRUCache, QueryCache
+
+
+class CountingEmbeddings:
+    key = ("model-a", "cpu", ())
+
+    def __init__(self):
+        self.calls = 0
+
+    def embed_documents(self, texts):
+        self.calls += len(texts)
+        return [[float(len(text))] for text in texts]
+
+
+def test_lru_evicts_oldest_and_counts_hits():
+    cache = LRUCache(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    stats = cache.stats()
+    assert stats["entries"] == 2 and stats["hits"] == 1 and stats["misses"] == 1
+
+
+def test_query_embeddings_are_encoded_once_per_model_and_text():
+    cache = QueryCache()
+    embeddings = CountingEmbeddings()
+    assert cache.embed_query(embeddings, "hello") == [5.0]
+    assert cache.embed_query(embeddings, "hello") == [5.0]
+    cache.embed_query(embeddings, "other")
+    assert embeddings.calls == 2
+
+
+def test_write_bumps_generation_and_hides_old_results():
+    cache = QueryCache()
+    key = cache.result_key("docs", "what is notate", 5, engine="auto")
+    cache.results.set(key, ["old"])
+    assert cache.results.get(cache.result_key("docs", "what is notate", 5, engine="auto")) == ["old"]
+
+    cache.bump("docs")
+    assert cache.results.get(cache.result_key("docs", "what is notate", 5, engine="auto")) is None
+    assert cache.results.stats()["entries"] == 0
+    # Other collections keep their generation
+    assert cache.generation("other") == 0
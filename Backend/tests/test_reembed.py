@@ -0,0 +1,100 @@
+import threading
+import types
+import chromadb
+import pytest
+import src.vectorstorage.hnsw_settings as hnsw_settings
+import src.vectorstorage.reembed as reembed
+from src.vectorstorage.collection_settings import CollectionSettings
+from src.vectorstorage.embedding_cache import EmbeddingCache
+
+
+class FakeEmbeddings:
+    key = ("fake-3d", "cpu")
+    model_name = "fake-3d"
+
+    def embed_documents(self, texts):
+        return [[float(len(text)), 1.0, 0.5] for text in texts]
+
+
+def setup(tmp_path, monkeypatch):
+    client = chromadb.EphemeralClient()
+    settings = CollectionSettings(str(tmp_path / "settings.sqlite"))
+    pool = types.SimpleNamespace(get_client=lambda path: client)
+    dropped = []
+    for module in (hnsw_settings, reembed):
+        monkeypatch.setattr(module, "collection_settings", settings)
+        monkeypatch.setattr(module, "chroma_pool", pool)
+    monkeypatch.setattr(reembed, "embedding_registry", types.SimpleNamespace(
+        get=lambda model_name, backend=None: FakeEmbeddings()))
+    monkeypatch.setattr(reembed, "embedding_cache", EmbeddingCache(str(tmp_path / "cache")))
+    monkeypatch.setattr(reembed, "flat_index_store", types.SimpleNamespace(drop=dropped.append))
+
+    # Ephemeral clients share one in-memory store per process
+    for name in map(str, client.list_collections()):
+        client.delete_collection(name)
+    source = client.create_collection("notes-2d", metadata={"hnsw:space": "cosine"})
+    source.add(ids=[f"id{i}" for i in range(10)], embeddings=[[float(i), 1.0] for i in range(10)],
+               documents=["x" * i for i in range(10)], metadatas=[{"i": i} for i in range(10)])
+    return client, settings, dropped
+
+
+def test_reembed_swaps_in_new_vectors(tmp_path, monkeypatch):
+    client, settings, dropped = setup(tmp_path, monkeypatch)
+    settings.update("notes-2d", embedding_backend="onnx")
+
+    events = list(reembed.reembed_collection("notes-2d", "fake-3d", batch_size=4, duty_cycle=1.0))
+    assert events[-1]["status"] == "success"
+    progress = [e["data"] for e in events[:-1]]
+    assert [p["chunk"] for p in progress] == [4, 8, 10]
+    assert all("est_remaining_time" in p for p in progress)
+
+    collection = client.get_collection("notes-2d")
+    page = collection.get(ids=["id7"], include=["embeddings", "documents", "metadatas"])
+    assert list(page["embeddings"][0]) == pytest.approx([7.0, 1.0, 0.5])
+    assert page["documents"] == ["x" * 7] and page["metadatas"] == [{"i": 7}]
+    assert collection.metadata["hnsw:space"] == "cosine"
+    assert settings.get("notes-2d") == {"embedding_model": "fake-3d"}
+    assert dropped == ["notes-2d"]
+    assert not [name for name in map(str, client.list_collections()) if name.startswith(("reembed-", "retired-"))]
+
+
+def test_cancelled_reembed_keeps_original(tmp_path, monkeypatch):
+    client, settings, dropped = setup(tmp_path, monkeypatch)
+    cancel = threading.Event()
+
+    events = []
+    for event in reembed.reembed_collection("notes-2d", "fake-3d", cancel_event=cancel, batch_size=4):
+        events.append(event)
+        cancel.set()
+    assert events[-1]["status"] == "cancelled"
+
+    assert [str(name) for name in client.list_collections()] == ["notes-2d"]
+    assert len(client.get_collection("notes-2d").get(ids=["id1"], include=["embeddings"])["embeddings"][0]) == 2
+    assert settings.get("notes-2d") == {}
+    assert dropped == []
+
+
+def test_swap_waits_for_queries_holding_the_collection(tmp_path, monkeypatch):
+    from src.vectorstorage.vectorstore import collection_lock
+    client, settings, dropped = setup(tmp_path, monkeypatch)
+    events = reembed.reembed_collection("notes-2d", "fake-3d", batch_size=4, duty_cycle=1.0)
+    progress = [next(events) for _ in range(3)]
+    assert progress[-1]["data"]["chunk"] == 10
+
+    finished = threading.Event()
+
+    def finish():
+        list(events)
+        finished.set()
+
+    # A query in flight keeps the old collection and model until it is done
+    with collection_lock("notes-2d").shared():
+        swapper = threading.Thread(target=finish)
+        swapper.start()
+        assert not finished.wait(0.2)
+        assert settings.get("notes-2d") == {}
+        assert len(client.get_collection("notes-2d").get(ids=["id1"], include=["embeddings"])["embeddings"][0]) == 2
+    swapper.join(5)
+    assert finished.is_set()
+    assert settings.get("notes-2d") == {"embedding_model": "fake-3d"}
+    assert len(client.get_collection("notes-2d").get(ids=["id1"], include=["embeddings"])["embeddings"][0]) == 3
@@ -0,0 +1,65 @@
+import asyncio
+from src.jobs.scheduler import JobScheduler, COMPLETED, CANCELLED
+
+
+def _runner(log, name, steps=3):
+    async def run(job):
+        for i in range(steps):
+            log.append((name, i))
+            await asyncio.sleep(0.01)
+            yield {"status": "progress", "data": {"chunk": i + 1}}
+        yield {"status": "success", "message": "done"}
+    return run
+
+
+async def _wait(*jobs):
+    for job in jobs:
+        async for _ in job.stream():
+            pass
+
+
+def test_same_collection_runs_serially_other_collections_in_parallel():
+    async def scenario():
+        log = []
+        scheduler = JobScheduler(max_workers=4)
+        a1 = scheduler.submit("embed", "a", _runner(log, "a1"))
+        a2 = scheduler.submit("embed", "a", _runner(log, "a2"))
+        b1 = scheduler.submit("embed", "b", _runner(log, "b1"))
+        await _wait(a1, a2, b1)
+        return log, (a1, a2, b1)
+
+    log, jobs = asyncio.run(scenario())
+    names = [name for name, _ in log]
+    # a2 only starts after a1 finished, b1 overlaps with a1
+    assert names.index("a2") > max(i for i, n in enumerate(names) if n == "a1")
+    assert names.index("b1") < names.index("a2")
+    assert all(job.status == COMPLETED for job in jobs)
+
+
+def test_priority_and_cancel_of_queued_job():
+    async def scenario():
+        log = []
+        scheduler = JobScheduler(max_workers=1)
+        first = scheduler.submit("embed", "a", _runner(log, "first"))
+        low = scheduler.submit("embed", "b", _runner(log, "low"), priority=0)
+        high = scheduler.submit("embed", "c", _runner(log, "high"), priority=5)
+        dropped = scheduler.submit("embed", "d", _runner(log, "dropped"))
+        assert scheduler.cancel(dropped.id)
+        await _wait(first, low, high, dropped)
+        return log, dropped
+
+    log, dropped = asyncio.run(scenario())
+    names = [name for name, _ in log]
+    assert names.index("high") < names.index("low")
+    assert "dropped" not in names
+    assert dropped.status == CANCELLED
+
+
+def test_late_subscriber_replays_events():
+    async def scenario():
+        scheduler = JobScheduler()
+        job = scheduler.submit("embed", "a", _runner([], "a"))
+        await _wait(job)
+        return [event["status"] async for event in job.stream()]
+
+    assert asyncio.run(scenario()) == ["progress"] * 3 + ["success"]
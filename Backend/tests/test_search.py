@@ -0,0 +1,170 @@
+import time
+from langchain_core.documents import Document
+from src.vectorstorage.search import search_collections
+
+
+def _hits(*scores):
+    return lambda: [(Document(page_content=str(score), id=str(score)), score) for score in scores]
+
+
+def test_results_are_merged_by_score():
+    hits, errors = search_collections({"a": _hits(0.9, 0.5), "b": _hits(0.8, 0.7)}, 3)
+    assert [(name, score) for name, _, score in hits] == [("a", 0.9), ("b", 0.8), ("b", 0.7)]
+    assert errors == {}
+
+
+def test_slow_and_failing_collections_do_not_stall():
+    def slow():
+        time.sleep(1)
+        return _hits(1.0)()
+
+    def broken():
+        raise RuntimeError("collection missing")
+
+    began = time.perf_counter()
+    hits, errors = search_collections({"fast": _hits(0.4), "slow": slow, "broken": broken}, 5, timeout=0.2)
+    assert time.perf_counter() - began < 0.9
+    assert [name for name, _, _ in hits] == ["fast"]
+    assert errors == {"slow": "timeout", "broken": "collection missing"}
+
+
+
+def test_filters_are_pushed_into_chroma(tmp_path):
+    import chromadb
+    import numpy as np
+    from src.vectorstorage.flat_index import FlatIndex
+    from src.vectorstorage.search import fetch_documents, hnsw_search, matching_ids
+
+    vectors = np.random.default_rng(0).normal(size=(6, 8)).astype(np.float32)
+    collection = chromadb.EphemeralClient().get_or_create_collection(
+        "filters", metadata={"hnsw:space": "cosine"})
+    ids = [f"id{i}" for i in range(6)]
+    collection.upsert(ids=ids, embeddings=vectors.tolist(),
+                      documents=[f"chunk {i} error" if i % 2 else f"chunk {i}" for i in range(6)],
+                      metadatas=[{"source": "a.pdf" if i < 3 else "b.pdf", "page": i} for i in range(6)])
+
+    hits = hnsw_search(collection, vectors[4].tolist(), 6, where={"source": "a.pdf"})
+    assert {doc.id for doc, _ in hits} == {"id0", "id1", "id2"}
+    hits = hnsw_search(collection, vectors[4].tolist(), 6, where_document={"$contains": "error"})
+    assert {doc.id for doc, _ in hits} == {"id1", "id3", "id5"}
+
+    # Flat search is masked to the ids Chroma matches
+    index = FlatIndex(str(tmp_path / "flat"))
+    index.reset(ids, vectors)
+    allowed = matching_ids(collection, where={"page": {"$gte": 4}})
+    assert {doc_id for doc_id, _ in index.search(vectors[0], 6, allowed=allowed)} == {"id4", "id5"}
+
+    # Lexical hits are filtered when their documents are fetched
+    docs = fetch_documents(collection, [("id5", 2.0), ("id1", 1.0)], where={"source": "b.pdf"})
+    assert [doc.id for doc, _ in docs] == ["id5"]
+
+
+def test_large_metadata_is_projected_out():
+    from src.endpoint.vectorQuery import project_metadata
+    metadata = {"source": "https://youtu.be/x", "description": "long " * 500, "chunk_start": 30}
+    assert project_metadata(metadata, None) == {"source": "https://youtu.be/x", "chunk_start": 30}
+    assert project_metadata(metadata, ["description"]) == {"description": metadata["description"]}
+    assert project_metadata(metadata, ["*"]) == metadata
+
+
+def test_min_score_filters_diversified_results():
+    from src.endpoint.models import VectorStoreQueryRequest
+    from src.endpoint.vectorQuery import apply_cutoffs
+    # MMR pick order: a near-duplicate of the top hit was pushed behind a weak one
+    results = [(Document(page_content=text), score) for text, score in
+               [("best", 0.9), ("novel but weak", 0.2), ("second", 0.8), ("third", 0.6)]]
+    data = VectorStoreQueryRequest(query="q", collection_name="docs", user=1, min_score=0.5, diversity=0.7)
+    kept = apply_cutoffs(results, data, None)
+    assert [doc.page_content for doc, _ in kept] == ["best", "second", "third"]
+
+    ranked = VectorStoreQueryRequest(query="q", collection_name="docs", user=1, min_score=0.5)
+    assert [doc.page_content for doc, _ in apply_cutoffs(results, ranked, None)] == ["best"]
+
+
+def test_batch_search_encodes_per_window_and_keeps_order(monkeypatch):
+    import types
+    import src.vectorstorage.search as search
+    from src.vectorstorage.query_cache import QueryCache
+
+    class CountingEmbeddings:
+        calls = []
+
+        def embed_documents(self, texts):
+            self.calls.append(list(texts))
+            return [[float(len(text))] for text in texts]
+
+    cache = QueryCache()
+    monkeypatch.setattr(search, "query_cache", cache)
+    monkeypatch.setattr(search, "similarity_search", lambda vectordb, name, query, k, mode, **options: (
+        [(query, cache.embed_query(vectordb.embeddings, query)[0])] if query != "bad" else 1 / 0))
+
+    vectordb = types.SimpleNamespace(embeddings=CountingEmbeddings())
+    queries = [f"q{'x' * i}" for i in range(7)] + ["bad"]
+    results = list(search.batch_search(vectordb, "c", iter(queries), 5, window=3))
+
+    assert [query for query, _ in results] == queries
+    assert results[2][1] == [("qxx", 3.0)]
+    assert isinstance(results[-1][1], ZeroDivisionError)
+    # One encoder call per window; per-query lookups hit the cache
+    assert [len(batch) for batch in CountingEmbeddings.calls] == [3, 3, 2]
+
+
+def test_mmr_skips_near_duplicates():
+    import numpy as np
+    from src.vectorstorage.search import maximal_marginal_relevance
+    base = np.eye(4, dtype=np.float32)
+    # Candidates 0-2 are copies of one chunk, 3 and 4 are distinct
+    vectors = np.stack([base[0], base[0] + 0.01, base[0] + 0.02, base[1], base[2]])
+    relevance = np.array([1.0, 0.99, 0.98, 0.7, 0.6])
+    assert maximal_marginal_relevance(relevance, vectors, 3, 0.0) == [0, 1, 2]
+    assert maximal_marginal_relevance(relevance, vectors, 3, 0.5) == [0, 3, 4]
+    assert maximal_marginal_relevance(relevance, vectors, 10, 0.5)[:3] == [0, 3, 4]
+
+
+def test_mmr_is_fast_for_a_hundred_candidates():
+    import time
+    import numpy as np
+    from src.vectorstorage.search import maximal_marginal_relevance
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(100, 384)).astype(np.float32)
+    relevance = rng.random(100).astype(np.float32)
+    maximal_marginal_relevance(relevance, vectors, 10, 0.3)
+    began = time.perf_counter()
+    for _ in range(20):
+        maximal_marginal_relevance(relevance, vectors, 10, 0.3)
+    assert (time.perf_counter() - began) / 20 < 0.005
+
+
+def test_batch_stream_releases_the_collection_between_windows(monkeypatch):
+    import json
+    import threading
+    import src.endpoint.vectorQuery as vector_query
+    from src.endpoint.models import VectorStoreQueryRequest
+    from src.vectorstorage.chroma_pool import SharedLock
+
+    lock = SharedLock()
+    windows = []
+    monkeypatch.setattr(vector_query, "BATCH_WINDOW", 2)
+    monkeypatch.setattr(vector_query, "collection_lock", lambda name: lock)
+    monkeypatch.setattr(vector_query, "get_vectorstore", lambda *args: object())
+    monkeypatch.setattr(vector_query, "batch_search", lambda vectordb, name, queries, k, mode, **options: (
+        windows.append(list(queries)) or [(query, [(Document(page_content=query), 1.0)]) for query in queries]))
+
+    data = VectorStoreQueryRequest(query="", collection_name="docs", user=1)
+    lines = vector_query.query_vectorstore_batch(data, ["a", "b", "c"])
+    first = json.loads(next(lines))
+
+    # A swap can take the collection while the client is slow to read
+    def swap():
+        with lock.exclusive():
+            windows.append("swapped")
+
+    swapper = threading.Thread(target=swap)
+    swapper.start()
+    swapper.join(1)
+    assert not swapper.is_alive()
+
+    rest = [json.loads(line) for line in lines]
+    assert [line["index"] for line in [first] + rest] == [0, 1, 2]
+    assert [line["query"] for line in [first] + rest] == ["a", "b", "c"]
+    assert windows == [["a", "b"], "swapped", ["c"]]
@@ -0,0 +1,92 @@
+import types
+import chromadb
+import numpy as np
+import pytest
+import src.vectorstorage.snapshot as snapshot
+from src.vectorstorage.collection_settings import CollectionSettings
+from src.vectorstorage.flat_index import FlatIndexStore
+from src.vectorstorage.manifest import CollectionManifest
+from src.jobs.journal import IngestJournal
+
+
+def setup(tmp_path, monkeypatch):
+    # Persistent, because bulk-load HNSW parameters only exist for on-disk indexes
+    client = chromadb.PersistentClient(str(tmp_path / "chroma"))
+    settings = CollectionSettings(str(tmp_path / "settings.sqlite"))
+    flat = FlatIndexStore(str(tmp_path / "flat"))
+    monkeypatch.setattr(snapshot, "collection_settings", settings)
+    monkeypatch.setattr(snapshot, "chroma_pool", types.SimpleNamespace(get_client=lambda path: client))
+    monkeypatch.setattr(snapshot, "flat_index_store", flat)
+    monkeypatch.setattr(snapshot, "collection_manifest", CollectionManifest(str(tmp_path / "manifest.sqlite")))
+    monkeypatch.setattr(snapshot, "ingest_journal", IngestJournal(str(tmp_path / "journal.sqlite")))
+    monkeypatch.setattr(snapshot, "lexical_index_store", types.SimpleNamespace(drop=lambda name: None))
+    monkeypatch.setattr(snapshot, "EXPORT_PAGE_SIZE", 4)
+    monkeypatch.setattr(snapshot, "IMPORT_PAGE_SIZE", 3)
+
+    source = client.create_collection("papers", metadata={"hnsw:space": "cosine", "owner": "x"})
+    source.add(ids=[f"id{i}" for i in range(10)], embeddings=[[float(i), 1.0, -0.5] for i in range(10)],
+               documents=[f"chunk {i} – ünïcode" for i in range(10)],
+               metadatas=[{"i": i} if i % 3 else None for i in range(10)])
+    settings.update("papers", quantization="int8", hnsw={"M": 24})
+    return client, settings, flat
+
+
+def test_snapshot_round_trip(tmp_path, monkeypatch):
+    client, settings, flat = setup(tmp_path, monkeypatch)
+    path = str(tmp_path / "papers.notate-snapshot")
+
+    events = list(snapshot.export_collection("papers", path, "float16", embedding_model="mini-lm"))
+    assert [e["data"]["chunk"] for e in events[:-1]] == [4, 8, 10]
+    assert events[-1]["data"]["file_path"] == path
+
+    snap = snapshot.Snapshot(path)
+    assert (snap.count, snap.dimension) == (10, 3)
+    assert isinstance(snap.vectors, np.memmap) and snap.vectors.dtype == np.float16
+    assert snap.text("ids", 2, 5) == ["id2", "id3", "id4"]
+
+    events = list(snapshot.import_collection(path, "papers-copy"))
+    assert events[-1]["status"] == "success"
+    assert events[-1]["data"]["embedding_model"] == "mini-lm"
+    copy = client.get_collection("papers-copy")
+    page = copy.get(ids=["id4", "id6"], include=["embeddings", "documents", "metadatas"])
+    assert page["documents"] == ["chunk 4 – ünïcode", "chunk 6 – ünïcode"]
+    assert page["metadatas"] == [{"i": 4}, None]
+    assert list(page["embeddings"][0]) == pytest.approx([4.0, 1.0, -0.5])
+    assert copy.metadata["hnsw:space"] == "cosine" and copy.metadata["hnsw:M"] == 24
+    assert copy.metadata["owner"] == "x"
+    assert settings.get("papers-copy") == {"quantization": "int8", "hnsw": {"M": 24}, "embedding_model": "mini-lm"}
+
+    index = flat.get("papers-copy", create=False)
+    assert index is not None and index.count == 10 and not index.stale
+    assert index.search([4.0, 1.0, -0.5], 1)[0][0] == "id4"
+
+
+def test_import_refuses_existing_collection_unless_overwriting(tmp_path, monkeypatch):
+    client, settings, flat = setup(tmp_path, monkeypatch)
+    path = str(tmp_path / "papers.notate-snapshot")
+    list(snapshot.export_collection("papers", path, "float32"))
+    client.get_collection("papers").delete(ids=["id0", "id1"])
+
+    notes = tmp_path / "notes.txt"
+    notes.write_text("old contents")
+    snapshot.collection_manifest.record("papers", str(notes), 1)
+    snapshot.ingest_journal.open("embed", "job", {"file_path": str(notes)}, "papers").record_indices([0])
+
+    with pytest.raises(ValueError):
+        list(snapshot.import_collection(path, "papers"))
+    events = list(snapshot.import_collection(path, "papers", overwrite=True, flat_index=False))
+    assert events[-1]["status"] == "success"
+    assert events[-1]["data"]["hnsw"]["batch_size"] == snapshot.BULK_LOAD_PARAMS["batch_size"]
+    # Records of the replaced contents would make a later sync skip the file
+    assert not snapshot.collection_manifest.is_unchanged("papers", str(notes))
+    assert snapshot.ingest_journal.unfinished() == []
+    assert client.get_collection("papers").count() == 10
+    assert sorted(map(str, client.list_collections())) == ["papers"]
+    assert flat.get("papers", create=False) is None
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "notes.txt"
+    path.write_bytes(b"hello world, not a snapshot")
+    with pytest.raises(ValueError):
+        snapshot.Snapshot(str(path))
@@ -0,0 +1,55 @@
+import random
+import pytest
+from langchain_core.documents import Document
+from src.data.dataIntake.textSplitting import split_stream, split_text
+
+
+def sample_sections(count=400, seed=7):
+    rng = random.Random(seed)
+    words = ["alpha", "beta", "gamma", "delta", "epsilon", "zeta", "eta", "theta"]
+    sections = []
+    for _ in range(count):
+        sentences = [" ".join(rng.choice(words) for _ in range(rng.randint(3, 25))) + rng.choice([". ", "? ", "\n\n", " "])
+                     for _ in range(rng.randint(1, 4))]
+        sections.append("".join(sentences))
+    return sections
+
+
+def test_streamed_chunks_match_whole_text_split():
+    sections = sample_sections()
+    text = "".join(sections)
+    window = 2000
+    assert len(text) > 10 * window
+
+    expected = [doc.page_content for doc in split_text(text, "notes.txt")]
+    streamed = list(split_stream(sections, "notes.txt", {"tag": "x"}, window=window))
+    assert [doc.page_content for doc in streamed] == expected
+    assert streamed[0].metadata == {"tag": "x", "source": "notes.txt"}
+
+
+@pytest.mark.parametrize("seed,window", [(1, 1000), (4, 2000), (45, 9000), (62, 1000), (73, 5000), (92, 5000)])
+def test_window_ending_on_a_sentence_boundary(seed, window):
+    # Windows that end on a separator leave the last piece one character
+    # longer than in the whole text; it must not decide where chunks close
+    sections = sample_sections(seed=seed)
+    expected = [doc.page_content for doc in split_text("".join(sections), "notes.txt")]
+    assert [doc.page_content for doc in split_stream(sections, "notes.txt", window=window)] == expected
+
+
+def test_carried_chunk_is_resplit_at_each_window():
+    # Every window ends inside a chunk that is carried into the next window
+    # and cut again there; the long "sentences" are themselves split further
+    short = [f"sentence {i} " + "word " * 60 + ". " for i in range(200)]
+    long = [f"part {i} " + "clause and more words? " * (10 + i % 40) + ". " for i in range(200)]
+    for sections in (short, long):
+        expected = [doc.page_content for doc in split_text("".join(sections), "notes.txt")]
+        for window in (500, 1234, 4096):
+            streamed = [doc.page_content for doc in split_stream(sections, "notes.txt", window=window)]
+            assert streamed == expected
+
+
+def test_documents_pass_through_and_flush_pending_text():
+    page = Document(page_content="a pdf page", metadata={"page": 1})
+    docs = list(split_stream(["before the page ", page, "after the page "], "mixed.pdf"))
+    assert [doc.page_content for doc in docs] == ["before the page", "a pdf page", "after the page"]
+    assert docs[1] is page